@@ -0,0 +1,277 @@
+"""
+Benchmarks end-to-end crawls against the local fixture site and mock rules API, and writes the results as JSON.
+
+Each scenario runs in a fresh interpreter with empty rules and HTTP caches: read_list over the recorded list pages,
+read_article over copies of the recorded article, ScrapyListSpider over the list pages and the crawl command of the
+CLI. For each scenario, pages/sec, items/sec, the peak memory of the process and the time to import its entry point
+are recorded. Results of two runs, e.g. of two releases, can be compared with --compare.
+
+Usage:
+    python -m benchmarks.bench_crawl [--pages N] [--articles N] [--latency SECONDS] [--rounds N]
+        [--scenarios NAME ...] [-o results.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.mock_server import MockServer
+
+SCENARIOS = ["read_list", "read_article", "scrapy_list_spider", "cli"]
+
+# metrics compared between runs, and whether higher values are better
+COMPARED_METRICS = {
+    "pages_per_second": True,
+    "items_per_second": True,
+    "startup_seconds": False,
+    "peak_memory_mb": False,
+}
+
+
+def get_peak_memory_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_read_list(url: str, articles: int, output_dir: str) -> int:
+    from crawlab_ai import read_list
+
+    return len(read_list(url, as_dataframe=False))
+
+
+def run_read_article(url: str, articles: int, output_dir: str) -> int:
+    from crawlab_ai import read_article
+
+    for i in range(articles):
+        read_article("%s/article/%d" % (url, i + 1))
+    return articles
+
+
+def run_scrapy_list_spider(url: str, articles: int, output_dir: str) -> int:
+    from scrapy.crawler import CrawlerProcess
+
+    from crawlab_ai import ScrapyListSpider
+
+    class BenchmarkListSpider(ScrapyListSpider):
+        name = "benchmark_list_spider"
+        start_urls = [url + "/"]
+
+    process = CrawlerProcess({"LOG_ENABLED": False, "TELNETCONSOLE_ENABLED": False})
+    crawler = process.create_crawler(BenchmarkListSpider)
+    process.crawl(crawler)
+    process.start()
+    return crawler.stats.get_value("item_scraped_count", 0)
+
+
+def run_cli(url: str, articles: int, output_dir: str) -> int:
+    from crawlab_ai.cli import main
+
+    output = os.path.join(output_dir, "items.jsonl")
+    sys.argv = ["crawlab-ai", "crawl", url + "/", "-o", output]
+    main()
+    with open(output, "r", encoding="utf-8") as f:
+        return sum(1 for line in f if line.strip())
+
+
+RUNNERS = {
+    "read_list": (run_read_list, "crawlab_ai.spider.list_spider"),
+    "read_article": (run_read_article, "crawlab_ai.spider.article_spider"),
+    "scrapy_list_spider": (run_scrapy_list_spider, "crawlab_ai.scrapy.list_spider"),
+    "cli": (run_cli, "crawlab_ai.cli"),
+}
+
+
+def run_scenario(name: str, url: str, articles: int):
+    """
+    Runs a scenario in the current interpreter, and prints its measurements as JSON.
+    """
+    import importlib
+    import logging
+
+    func, module = RUNNERS[name]
+    start = time.perf_counter()
+    importlib.import_module(module)
+    startup = time.perf_counter() - start
+    logging.getLogger("crawlab_ai").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        items = func(url, articles, output_dir)
+        elapsed = time.perf_counter() - start
+    print(
+        json.dumps(
+            {
+                "startup_seconds": startup,
+                "elapsed_seconds": elapsed,
+                "items": items,
+                "peak_memory_mb": get_peak_memory_mb(),
+            }
+        )
+    )
+
+
+def bench(name: str, server: MockServer, articles: int, rounds: int) -> dict:
+    runs = []
+    for _ in range(rounds):
+        server.reset()
+        with tempfile.TemporaryDirectory() as data_dir:
+            env = dict(
+                os.environ,
+                CRAWLAB_AI_API_ENDPOINT=server.url,
+                CRAWLAB_TOKEN="benchmark",
+                CRAWLAB_AI_RULES_CACHE_PATH=os.path.join(data_dir, "rules_cache.db"),
+                CRAWLAB_AI_HTTP_CACHE_PATH=os.path.join(data_dir, "http_cache.db"),
+                CRAWLAB_AI_SEEN_STORE_PATH=os.path.join(data_dir, "seen_items.db"),
+            )
+            res = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.bench_crawl",
+                    "--run-scenario",
+                    name,
+                    "--url",
+                    server.url,
+                    "--articles",
+                    str(articles),
+                ],
+                env=env,
+                stdout=subprocess.PIPE,
+                check=True,
+            )
+        run = json.loads(res.stdout.decode().strip().splitlines()[-1])
+        run["pages"] = server.requests.get("page", 0) + server.requests.get(
+            "article", 0
+        )
+        run["api_calls"] = server.requests.get("rules", 0)
+        runs.append(run)
+
+    elapsed = statistics.median(run["elapsed_seconds"] for run in runs)
+    pages = runs[-1]["pages"]
+    items = runs[-1]["items"]
+    peak_memory = [run["peak_memory_mb"] for run in runs if run["peak_memory_mb"]]
+    return {
+        "pages": pages,
+        "items": items,
+        "rules_api_calls": runs[-1]["api_calls"],
+        "elapsed_seconds": elapsed,
+        "pages_per_second": pages / elapsed,
+        "items_per_second": items / elapsed,
+        "startup_seconds": statistics.median(run["startup_seconds"] for run in runs),
+        "peak_memory_mb": max(peak_memory) if peak_memory else None,
+    }
+
+
+def get_version() -> str | None:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("crawlab-ai")
+    except PackageNotFoundError:
+        return None
+
+
+def compare(results: dict, baseline: dict):
+    print()
+    print("Compared with %s:" % (baseline.get("version") or "baseline"))
+    for name, result in results["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if not result.get(metric) or not base.get(metric):
+                continue
+            ratio = result[metric] / base[metric]
+            # differences within the noise of a run are not reported as regressions
+            worse = ratio < 0.95 if higher_is_better else ratio > 1.05
+            print(
+                "%-20s %-18s %10.3f -> %10.3f %6.2fx %s"
+                % (
+                    name,
+                    metric,
+                    base[metric],
+                    result[metric],
+                    ratio,
+                    "(worse)" if worse else "",
+                )
+            )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--pages", type=int, default=20)
+    arg_parser.add_argument("--articles", type=int, default=20)
+    arg_parser.add_argument(
+        "--latency", type=float, default=0.0, help="Delay of each response in seconds"
+    )
+    arg_parser.add_argument("--rounds", type=int, default=3)
+    arg_parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS
+    )
+    arg_parser.add_argument("-o", "--output", help="Write the results to a JSON file")
+    arg_parser.add_argument(
+        "--compare", help="Compare the results with those of an earlier JSON file"
+    )
+    arg_parser.add_argument("--run-scenario", choices=SCENARIOS, help=argparse.SUPPRESS)
+    arg_parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.run_scenario:
+        run_scenario(args.run_scenario, args.url, args.articles)
+        return
+
+    results = {
+        "version": get_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "pages": args.pages,
+            "articles": args.articles,
+            "latency": args.latency,
+            "rounds": args.rounds,
+        },
+        "results": {},
+    }
+    with MockServer(args.pages, args.latency) as server:
+        for name in args.scenarios:
+            result = bench(name, server, args.articles, args.rounds)
+            results["results"][name] = result
+            print(
+                "%-20s %5d pages %6d items %8.3fs %10.1f pages/sec %10.1f items/sec "
+                "%8.1fms startup %8.1fMB"
+                % (
+                    name,
+                    result["pages"],
+                    result["items"],
+                    result["elapsed_seconds"],
+                    result["pages_per_second"],
+                    result["items_per_second"],
+                    result["startup_seconds"] * 1000,
+                    result["peak_memory_mb"] or 0,
+                )
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmarks list item extraction on the saved fixture pages.
+
+Compares the per-item BeautifulSoup extraction that ListSpider used before compiled extraction plans ("legacy") with
+ExtractionPlan on every installed parser backend, and prints items/sec for each.
+
+Usage:
+    python -m benchmarks.bench_extract [--rounds N]
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+
+from bs4 import BeautifulSoup
+
+from crawlab_ai.spider.extraction import ExtractionPlan, PARSERS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixtures():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "list_page_*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(f.read())
+    with open(os.path.join(FIXTURES_DIR, "list_rules.json"), "r") as f:
+        rules = json.load(f)
+    return pages, rules
+
+
+def extract_legacy(html: str, rules: dict) -> int:
+    soup = BeautifulSoup(html, "html.parser")
+    list_items = soup.select(rules["list_model"]["list_element_css_selector"])
+    rows = []
+    for item in list_items:
+        row = {}
+        for field in rules["list_model"]["fields"]:
+            name = field["name"]
+            field_element = item.select_one(field["element_css_selector"])
+            if not field_element:
+                continue
+            if field["type"] == "text":
+                value = field_element.text.strip()
+            else:
+                value = field_element.get(field["attribute"])
+            row[name] = value
+        rows.append(row)
+    return len(rows)
+
+
+def extract_plan(html: str, plan: ExtractionPlan) -> int:
+    return len(plan.extract_rows(plan.parse(html)))
+
+
+def bench(name, func, pages, rounds):
+    items = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for html in pages:
+            items += func(html)
+    elapsed = time.perf_counter() - start
+    print(
+        "%-22s %8d items %8.3fs %12.0f items/sec"
+        % (name, items, elapsed, items / elapsed)
+    )
+    return items / elapsed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--rounds", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    pages, rules = load_fixtures()
+    baseline = bench(
+        "legacy (html.parser)",
+        lambda html: extract_legacy(html, rules),
+        pages,
+        args.rounds,
+    )
+    for parser in PARSERS:
+        try:
+            plan = ExtractionPlan(rules, parser)
+        except ImportError:
+            print("%-22s not installed" % ("plan (%s)" % parser))
+            continue
+        rate = bench(
+            "plan (%s)" % parser,
+            lambda html: extract_plan(html, plan),
+            pages,
+            args.rounds,
+        )
+        print("%-22s %.1fx" % ("", rate / baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Benchmarks the import time of the package, the CLI and the exports in fresh interpreters.
+
+Usage:
+    python -m benchmarks.bench_import [--rounds N]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+STATEMENTS = [
+    "import crawlab_ai",
+    "import crawlab_ai.cli",
+    "from crawlab_ai import read_list",
+    "from crawlab_ai import ScrapyListSpider",
+]
+
+
+def bench(statement: str, rounds: int) -> float:
+    # the interpreter startup is measured separately and subtracted
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--rounds", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    startup = bench("pass", args.rounds)
+    print("%-42s %8.1fms" % ("interpreter startup", startup * 1000))
+    for statement in STATEMENTS:
+        elapsed = bench(statement, args.rounds) - startup
+        print("%-42s %8.1fms" % (statement, elapsed * 1000))
+
+
+if __name__ == "__main__":
+    main()
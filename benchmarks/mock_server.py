@@ -0,0 +1,182 @@
+"""
+A local server for offline benchmarks, serving both a fixture site and a stand-in for the Crawlab AI API.
+
+The site serves the recorded list pages at /page/N/ (the fixtures repeated up to the number of pages, each linking to
+the next one) and the recorded article at /article/N. The API answers POST /rules/list and /rules/article with the
+recorded rules, and /code/list and /code/article with a small generated spider. Every response can be delayed to
+simulate network latency.
+
+Usage:
+    python -m benchmarks.mock_server [--port PORT] [--pages N] [--latency SECONDS]
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+_NEXT_PAGE_LINK = re.compile(r'<li class="next">.*?</li>', re.S)
+
+SOURCE_CODE = """import scrapy
+
+
+class BenchmarkSpider(scrapy.Spider):
+    name = "benchmark"
+    start_urls = [%r]
+
+    def parse(self, response):
+        yield {"title": response.css("title::text").get()}
+"""
+
+
+def _read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class MockServer(object):
+    """
+    The fixture site and mock rules API, served from a daemon thread.
+
+    Attributes:
+        pages (int): The number of list pages of the site.
+        latency (float): The delay before each response, in seconds.
+        requests (dict): The number of requests served by path prefix, e.g. "page", "article" or "rules".
+    """
+
+    def __init__(
+        self, pages: int = 20, latency: float = 0.0, host="127.0.0.1", port: int = 0
+    ):
+        self.pages = pages
+        self.latency = latency
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._list_pages = [
+            _NEXT_PAGE_LINK.sub("", _read_fixture(os.path.basename(path)))
+            for path in sorted(
+                glob.glob(os.path.join(FIXTURES_DIR, "list_page_*.html"))
+            )
+        ]
+        self._article_page = _read_fixture("article_page.html")
+        # the rules API returns the list rules as the first of a list of models
+        self._rules = {
+            "list": {"model_list": [json.loads(_read_fixture("list_rules.json"))]},
+            "article": json.loads(_read_fixture("article_rules.json")),
+        }
+        self._server = ThreadingHTTPServer((host, port), self._get_handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://%s:%d" % (host, port)
+
+    def start(self) -> "MockServer":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}
+
+    def get_list_page(self, page: int) -> str:
+        html = self._list_pages[(page - 1) % len(self._list_pages)]
+        if page < self.pages:
+            next_link = '<li class="next"><a href="/page/%d/">Next</a></li>' % (
+                page + 1
+            )
+            html = html.replace("</ul>", next_link + "</ul>", 1)
+        return html
+
+    def _count(self, kind: str):
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def _get_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                if parts == [""]:
+                    parts = ["page", "1"]
+                if len(parts) == 2 and parts[0] == "page" and parts[1].isdigit():
+                    page = int(parts[1])
+                    if 1 <= page <= server.pages:
+                        self._send("page", server.get_list_page(page), "text/html")
+                        return
+                elif len(parts) == 2 and parts[0] == "article":
+                    self._send("article", server._article_page, "text/html")
+                    return
+                self._send("not_found", "Not Found", "text/plain", 404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                parts = self.path.strip("/").split("/")
+                if len(parts) == 2 and parts[1] in server._rules:
+                    if parts[0] == "rules":
+                        body = server._rules[parts[1]]
+                    elif parts[0] == "code":
+                        body = {"source_code": SOURCE_CODE % payload.get("url")}
+                    else:
+                        body = None
+                    if body is not None:
+                        self._send(parts[0], json.dumps(body), "application/json")
+                        return
+                self._send("not_found", "{}", "application/json", 404)
+
+            def _send(self, kind: str, text: str, content_type: str, status=200):
+                server._count(kind)
+                if server.latency:
+                    time.sleep(server.latency)
+                body = text.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type + "; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--port", type=int, default=8000)
+    arg_parser.add_argument("--pages", type=int, default=20)
+    arg_parser.add_argument("--latency", type=float, default=0.0)
+    args = arg_parser.parse_args()
+
+    with MockServer(args.pages, args.latency, port=args.port) as server:
+        print("Serving the fixture site and the mock API at %s" % server.url)
+        print("Set CRAWLAB_AI_API_ENDPOINT=%s to use the mock API" % server.url)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
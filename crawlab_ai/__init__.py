@@ -1,9 +1,48 @@
 __all__ = [
     "read_list",
+    "iter_list",
     "read_article",
+    "read_lists",
+    "read_articles",
+    "aread_list",
+    "aread_article",
+    "async_http_session",
     "ScrapyListSpider",
 ]
 
-from crawlab_ai.scrapy.list_spider import ScrapyListSpider
-from crawlab_ai.spider.article_spider import read_article
-from crawlab_ai.spider.list_spider import read_list
+from typing import TYPE_CHECKING
+
+# exports are imported on first access, so that importing the package (e.g. for the CLI) does not load pandas,
+# aiohttp or Scrapy until they are needed
+_exports = {
+    "read_list": "crawlab_ai.spider.list_spider",
+    "iter_list": "crawlab_ai.spider.list_spider",
+    "aread_list": "crawlab_ai.spider.list_spider",
+    "read_article": "crawlab_ai.spider.article_spider",
+    "aread_article": "crawlab_ai.spider.article_spider",
+    "read_lists": "crawlab_ai.spider.batch",
+    "read_articles": "crawlab_ai.spider.batch",
+    "async_http_session": "crawlab_ai.utils.async_http",
+    "ScrapyListSpider": "crawlab_ai.scrapy.list_spider",
+}
+
+if TYPE_CHECKING:
+    from crawlab_ai.scrapy.list_spider import ScrapyListSpider
+    from crawlab_ai.spider.article_spider import read_article, aread_article
+    from crawlab_ai.spider.batch import read_lists, read_articles
+    from crawlab_ai.spider.list_spider import read_list, iter_list, aread_list
+    from crawlab_ai.utils.async_http import async_http_session
+
+
+def __getattr__(name: str):
+    if name not in _exports:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    import importlib
+
+    value = getattr(importlib.import_module(_exports[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -3,6 +3,8 @@ import argparse
 from crawlab_ai.cli.codegen import setup_codegen_parser
 from crawlab_ai.cli.config import setup_config_parser
 from crawlab_ai.cli.crawl import setup_crawl_parser
+from crawlab_ai.cli.extract import setup_extract_parser
+from crawlab_ai.cli.worker import setup_worker_parser
 
 parser = argparse.ArgumentParser(description="Web scraping tool")
 subparsers = parser.add_subparsers(dest="command")
@@ -10,6 +12,8 @@ subparsers = parser.add_subparsers(dest="command")
 setup_crawl_parser(subparsers)
 setup_codegen_parser(subparsers)
 setup_config_parser(subparsers)
+setup_extract_parser(subparsers)
+setup_worker_parser(subparsers)
 
 
 def main():
@@ -1,13 +1,19 @@
-from crawlab_ai.code.article import get_code_article
-from crawlab_ai.code.list import get_code_list
+from crawlab_ai.cli.stats import add_stats_arguments, report_stats
 from crawlab_ai.utils.auth import get_token
+from crawlab_ai.utils.logger import logger
+from crawlab_ai.utils.metrics import CrawlStats
 
 
 def setup_codegen_parser(subparsers):
     codegen_parser = subparsers.add_parser(
         "codegen", help="Generate crawler code for a webpage"
     )
-    codegen_parser.add_argument("url", help="URL to generate code for")
+    codegen_parser.add_argument("url", help="URL to generate code for", nargs="?")
+    codegen_parser.add_argument(
+        "-i",
+        "--input",
+        help="File with one URL per line to generate code for in a batch, written to --output-dir",
+    )
     codegen_parser.add_argument(
         "-t",
         "--type",
@@ -16,19 +22,60 @@ def setup_codegen_parser(subparsers):
         choices=["article", "list"],
     )
     codegen_parser.add_argument("-o", "--output", help="Output file path")
+    codegen_parser.add_argument(
+        "-d",
+        "--output-dir",
+        help="Directory to write the module of each URL to in batch mode, named after its site",
+        default=".",
+    )
+    codegen_parser.add_argument(
+        "--no-cache",
+        help="Do not read or write the local rules and code caches",
+        dest="use_cache",
+        action="store_false",
+    )
+    codegen_parser.add_argument(
+        "--refresh-rules",
+        help="Fetch fresh rules from the API and update the local rules cache",
+        action="store_true",
+    )
+    codegen_parser.add_argument(
+        "-w",
+        "--workers",
+        help="Maximum number of URLs processed at the same time in batch mode",
+        type=int,
+        default=8,
+    )
+    add_stats_arguments(codegen_parser)
     codegen_parser.set_defaults(func=codegen)
 
 
 def codegen(args):
+    if not args.url and not args.input:
+        raise SystemExit("Either a URL or --input is required")
     get_token()
-    if args.type == "list":
-        codegen_list(args)
+    stats = CrawlStats()
+    errors = {}
+    if args.input:
+        errors = codegen_batch(args, stats)
+    elif args.type == "list":
+        codegen_list(args, stats)
     elif args.type == "article":
-        codegen_article(args)
+        codegen_article(args, stats)
+    report_stats(args, stats)
+    if errors:
+        raise SystemExit("Failed to generate code for %d URLs" % len(errors))
 
 
-def codegen_list(args):
-    code = get_code_list(args.url)
+def codegen_list(args, stats: CrawlStats = None):
+    from crawlab_ai.code.list import get_code_list
+
+    code = get_code_list(
+        args.url,
+        use_cache=args.use_cache,
+        refresh_rules=args.refresh_rules,
+        stats=stats,
+    )
     if args.output:
         with open(args.output, "w") as f:
             f.write(code)
@@ -36,10 +83,38 @@ def codegen_list(args):
         print(code)
 
 
-def codegen_article(args):
-    code = get_code_article(args.url)
+def codegen_article(args, stats: CrawlStats = None):
+    from crawlab_ai.code.article import get_code_article
+
+    code = get_code_article(
+        args.url,
+        use_cache=args.use_cache,
+        refresh_rules=args.refresh_rules,
+        stats=stats,
+    )
     if args.output:
         with open(args.output, "w") as f:
             f.write(code)
     else:
         print(code)
+
+
+def codegen_batch(args, stats: CrawlStats = None) -> dict:
+    from crawlab_ai.code.batch import iter_code, write_code
+
+    with open(args.input, "r") as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    results = iter_code(
+        urls,
+        kind=args.type,
+        max_workers=args.workers,
+        use_cache=args.use_cache,
+        refresh_rules=args.refresh_rules,
+        stats=stats,
+    )
+    paths, errors = write_code(results, args.output_dir, urls)
+    logger.info(
+        "Generated code for %d of %d URLs in %s", len(paths), len(urls), args.output_dir
+    )
+    return errors
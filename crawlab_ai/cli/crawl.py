@@ -1,14 +1,37 @@
-import json
+from __future__ import annotations
 
-from tabulate import tabulate
+import json
+from typing import TYPE_CHECKING
 
-from crawlab_ai import read_list, read_article
+# the spiders and their dependencies are imported in the commands, so that parsing arguments stays fast
+from crawlab_ai.cli.stats import add_stats_arguments, report_stats
+from crawlab_ai.spider.extraction import ARTICLE_FIELDS, PARSERS
+from crawlab_ai.spider.fetchers import (
+    DEFAULT_POOL_SIZE,
+    FETCHER_BROWSER,
+    FETCHER_HTTP,
+    FETCHERS,
+)
+from crawlab_ai.spider.health import DEFAULT_DRIFT_THRESHOLD
 from crawlab_ai.utils.auth import get_token
+from crawlab_ai.utils.logger import logger
+from crawlab_ai.utils.metrics import CrawlStats
+from crawlab_ai.utils.rules import save_rules
+from crawlab_ai.utils.writers import FORMATS, get_format, get_writer
+
+if TYPE_CHECKING:
+    from crawlab_ai.spider.fetchers import Fetcher
+    from crawlab_ai.utils.throttle import HostScheduler
 
 
 def setup_crawl_parser(subparsers):
     crawl_parser = subparsers.add_parser("crawl", help="Crawl a website")
-    crawl_parser.add_argument("url", help="URL to crawl")
+    crawl_parser.add_argument("url", help="URL to crawl", nargs="?")
+    crawl_parser.add_argument(
+        "-i",
+        "--input",
+        help="File with one URL per line to crawl in a batch. Results are written as JSON lines by default",
+    )
     crawl_parser.add_argument(
         "-t",
         "--type",
@@ -17,29 +40,364 @@ def setup_crawl_parser(subparsers):
         choices=["article", "list"],
     )
     crawl_parser.add_argument("-o", "--output", help="Output file path")
+    crawl_parser.add_argument(
+        "-f",
+        "--format",
+        help="Output format. Rows are written page by page as they are crawled, except for CSV and Parquet batches "
+        "of lists without --rules, written at the end with the fields of all sites. Inferred from the output file "
+        "extension if not set",
+        choices=FORMATS,
+    )
+    crawl_parser.add_argument(
+        "--no-cache",
+        help="Do not read or write the local rules cache",
+        dest="use_cache",
+        action="store_false",
+    )
+    crawl_parser.add_argument(
+        "--refresh-rules",
+        help="Fetch fresh rules from the API and update the local rules cache",
+        action="store_true",
+    )
+    crawl_parser.add_argument(
+        "-c",
+        "--concurrency",
+        help="Maximum number of list pages crawled at the same time",
+        type=int,
+        default=5,
+    )
+    crawl_parser.add_argument(
+        "-m", "--max-pages", help="Maximum number of list pages to crawl", type=int
+    )
+    crawl_parser.add_argument(
+        "-p",
+        "--parser",
+        help="HTML parser backend used to extract data",
+        choices=PARSERS,
+    )
+    crawl_parser.add_argument(
+        "-r",
+        "--rules",
+        help="Path of a rules JSON file to extract with, instead of calling the rules API",
+    )
+    crawl_parser.add_argument(
+        "--drift-threshold",
+        help="Minimum share of filled fields on the first list page below which cached rules are fetched again",
+        type=float,
+        default=DEFAULT_DRIFT_THRESHOLD,
+    )
+    crawl_parser.add_argument(
+        "--save-rules", help="Save the rules used for extraction to a JSON file"
+    )
+    crawl_parser.add_argument(
+        "-w",
+        "--workers",
+        help="Maximum number of URLs crawled at the same time in batch mode",
+        type=int,
+        default=8,
+    )
+    crawl_parser.add_argument(
+        "--per-host-concurrency",
+        help="Maximum number of concurrent page fetches per host in batch mode",
+        type=int,
+        default=2,
+    )
+    crawl_parser.add_argument(
+        "--per-host-delay",
+        help="Minimum number of seconds between page fetches from the same host",
+        type=float,
+        default=0.0,
+    )
+    crawl_parser.add_argument(
+        "--per-host-rate",
+        help="Maximum number of page fetches per second per host",
+        type=float,
+    )
+    crawl_parser.add_argument(
+        "--max-connections",
+        help="Maximum number of concurrent page fetches over all hosts in batch mode",
+        type=int,
+    )
+    crawl_parser.add_argument(
+        "--respect-robots",
+        help="Skip URLs disallowed by robots.txt and honor its Crawl-delay",
+        action="store_true",
+    )
+    crawl_parser.add_argument(
+        "--http-cache",
+        help="Revalidate pages fetched by earlier crawls and reuse the items of unchanged pages",
+        action="store_true",
+    )
+    crawl_parser.add_argument(
+        "--incremental",
+        help="Only output list items not seen by earlier crawls, stopping at the first page of seen items",
+        action="store_true",
+    )
+    crawl_parser.add_argument(
+        "--key-fields",
+        help="Comma-separated fields identifying a list item in incremental mode. Defaults to its URL field",
+    )
+    crawl_parser.add_argument(
+        "--parse-workers",
+        help="Number of processes parsing list pages, to use several cores. Defaults to parsing in the fetching threads",
+        type=int,
+    )
+    crawl_parser.add_argument(
+        "--fetcher",
+        help="How pages are fetched: with the HTTP client, or rendered in a pooled headless browser (requires "
+        "playwright)",
+        choices=FETCHERS,
+        default=FETCHER_HTTP,
+    )
+    crawl_parser.add_argument(
+        "--browser-pool-size",
+        help="Number of pages rendered at the same time by the browser fetcher",
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+    )
+    crawl_parser.add_argument(
+        "--checkpoint",
+        help="Record the progress of list crawls page by page, so that they can be resumed with --resume",
+        action="store_true",
+    )
+    crawl_parser.add_argument(
+        "--resume",
+        help="Resume the interrupted crawl of the same list from its checkpoint, outputting the items of the recorded "
+        "pages again without fetching them or the rules. Implies --checkpoint",
+        action="store_true",
+    )
+    add_stats_arguments(crawl_parser)
     crawl_parser.set_defaults(func=crawl)
 
 
 def crawl(args):
-    get_token()
-    if args.type == "list":
-        crawl_list(args)
-    elif args.type == "article":
-        crawl_article(args)
+    if not args.url and not args.input:
+        raise SystemExit("Either a URL or --input is required")
+    if not args.rules:
+        get_token()
+    stats = CrawlStats()
+    fetcher = _get_fetcher(args)
+    errors = {}
+    try:
+        if args.input:
+            errors = crawl_batch(args, stats, fetcher)
+        elif args.type == "list":
+            crawl_list(args, stats, fetcher)
+        elif args.type == "article":
+            crawl_article(args, stats, fetcher)
+    finally:
+        if fetcher is not None:
+            fetcher.close()
+    report_stats(args, stats)
+    if errors:
+        raise SystemExit("Failed to crawl %d URLs" % len(errors))
+
+
+def crawl_list(args, stats: CrawlStats = None, fetcher: Fetcher = None):
+    from tabulate import tabulate
 
+    from crawlab_ai.spider.list_spider import read_list
 
-def crawl_list(args):
-    df = read_list(args.url)
+    format_ = args.format or get_format(args.output)
+    # a .csv output without --format keeps the DataFrame CSV with its index column
+    if format_ is not None and (format_ != "csv" or args.format):
+        crawl_list_stream(args, format_, stats, fetcher)
+        return
+
+    df, rules = read_list(
+        args.url,
+        use_cache=args.use_cache,
+        refresh_rules=args.refresh_rules,
+        concurrency=args.concurrency,
+        max_pages=args.max_pages,
+        parser=args.parser,
+        rules=args.rules,
+        drift_threshold=args.drift_threshold,
+        scheduler=_get_scheduler(args),
+        http_cache=args.http_cache,
+        incremental=args.incremental,
+        key_fields=_get_key_fields(args),
+        parse_workers=args.parse_workers,
+        stats=stats,
+        fetcher=fetcher,
+        checkpoint=args.checkpoint,
+        resume=args.resume,
+        return_rules=True,
+    )
+    if args.save_rules:
+        save_rules(rules, args.save_rules)
     if args.output:
         df.to_csv(args.output)
     else:
         print(tabulate(df, headers="keys", tablefmt="psql"))
 
 
-def crawl_article(args):
-    data = read_article(args.url)
+def crawl_list_stream(
+    args, format_: str, stats: CrawlStats = None, fetcher: Fetcher = None
+):
+    from crawlab_ai.spider.list_spider import ListSpider
+
+    spider = ListSpider(
+        args.url,
+        use_cache=args.use_cache,
+        refresh_rules=args.refresh_rules,
+        concurrency=args.concurrency,
+        max_pages=args.max_pages,
+        parser=args.parser,
+        rules=args.rules,
+        drift_threshold=args.drift_threshold,
+        scheduler=_get_scheduler(args),
+        http_cache=args.http_cache,
+        incremental=args.incremental,
+        key_fields=_get_key_fields(args),
+        parse_workers=args.parse_workers,
+        stats=stats,
+        fetcher=fetcher,
+        checkpoint=args.checkpoint,
+        resume=args.resume,
+    )
+    writer = None
+    try:
+        for _, rows in spider.iter_pages():
+            if writer is None:
+                writer = get_writer(format_, spider.plan.field_names, args.output)
+            writer.write_rows(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+    if args.save_rules:
+        save_rules(spider.rules, args.save_rules)
+
+
+def crawl_article(args, stats: CrawlStats = None, fetcher: Fetcher = None):
+    from crawlab_ai.spider.article_spider import read_article
+
+    data, rules = read_article(
+        args.url,
+        use_cache=args.use_cache,
+        refresh_rules=args.refresh_rules,
+        rules=args.rules,
+        parser=args.parser,
+        scheduler=_get_scheduler(args),
+        http_cache=args.http_cache,
+        stats=stats,
+        fetcher=fetcher,
+        return_rules=True,
+    )
+    if args.save_rules:
+        save_rules(rules, args.save_rules)
     if args.output:
         with open(args.output, "w") as f:
             f.write(json.dumps(data))
     else:
         print(json.dumps(data, indent=2))
+
+
+def crawl_batch(args, stats: CrawlStats = None, fetcher: Fetcher = None) -> dict:
+    from crawlab_ai.spider.batch import iter_articles, iter_lists
+    from crawlab_ai.utils.rules_templates import get_rules_templates
+
+    with open(args.input, "r") as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    kwargs = dict(
+        use_cache=args.use_cache,
+        refresh_rules=args.refresh_rules,
+        parser=args.parser,
+        rules=args.rules,
+        max_workers=args.workers,
+        per_host_concurrency=args.per_host_concurrency,
+        per_host_delay=args.per_host_delay,
+        per_host_rate=args.per_host_rate,
+        max_concurrency=args.max_connections,
+        respect_robots=args.respect_robots,
+        http_cache=args.http_cache,
+        stats=stats,
+        fetcher=fetcher,
+    )
+    if args.type == "list":
+        results = iter_lists(
+            urls,
+            concurrency=args.concurrency,
+            max_pages=args.max_pages,
+            drift_threshold=args.drift_threshold,
+            incremental=args.incremental,
+            key_fields=_get_key_fields(args),
+            parse_workers=args.parse_workers,
+            checkpoint=args.checkpoint,
+            resume=args.resume,
+            **kwargs,
+        )
+    else:
+        results = iter_articles(urls, **kwargs)
+
+    format_ = args.format or get_format(args.output) or "jsonl"
+    # CSV and Parquet have one set of columns, while the lists of different sites have different fields unless rules
+    # are given, so their rows are buffered until the fields of all sites are known
+    buffered = format_ != "jsonl" and args.type == "list" and args.rules is None
+    writer = None
+    field_names = []
+    buffer = []
+    errors = {}
+    try:
+        for result in results:
+            if result.error is not None:
+                # the error is logged as the URL fails
+                errors[result.url] = result.error
+                continue
+            if args.type == "list":
+                rows = [{"source_url": result.url, **row} for row in result.data]
+                names = ["source_url"] + _get_field_names(result.rules)
+            else:
+                rows = [result.data]
+                names = ["url"] + ARTICLE_FIELDS
+            field_names += [name for name in names if name not in field_names]
+            if buffered:
+                buffer += rows
+                continue
+            if writer is None:
+                writer = get_writer(format_, field_names, args.output)
+            # written per URL so that consumers can start on finished URLs right away
+            writer.write_rows(rows)
+        if buffered and field_names:
+            writer = get_writer(format_, field_names, args.output)
+            writer.write_rows(buffer)
+    finally:
+        if writer is not None:
+            writer.close()
+    logger.info("Failed to crawl %d of %d URLs", len(errors), len(urls))
+    logger.info("Rules template stats: %s", get_rules_templates().stats.as_dict())
+    return errors
+
+
+def _get_scheduler(args) -> HostScheduler | None:
+    # single URLs are only scheduled when politeness options are given, so that they keep their full concurrency
+    if not args.respect_robots and not args.per_host_rate and not args.per_host_delay:
+        return None
+    from crawlab_ai.utils.throttle import HostScheduler
+
+    return HostScheduler(
+        per_host_concurrency=args.concurrency,
+        per_host_rate=args.per_host_rate,
+        per_host_delay=args.per_host_delay,
+        respect_robots=args.respect_robots,
+    )
+
+
+def _get_fetcher(args) -> Fetcher | None:
+    # the default HTTP client is used as is, so that the HTTP cache still applies
+    if args.fetcher != FETCHER_BROWSER:
+        return None
+    from crawlab_ai.spider.fetchers import get_fetcher
+
+    return get_fetcher(args.fetcher, pool_size=args.browser_pool_size)
+
+
+def _get_key_fields(args) -> list | None:
+    if not args.key_fields:
+        return None
+    return [name.strip() for name in args.key_fields.split(",") if name.strip()]
+
+
+def _get_field_names(rules: dict) -> list:
+    return [field["name"] for field in rules["list_model"]["fields"]]
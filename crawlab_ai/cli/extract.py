@@ -0,0 +1,79 @@
+import glob
+import os
+
+from crawlab_ai.spider.extraction import (
+    PARSERS,
+    ArticleExtractionPlan,
+    ExtractionPlan,
+    extract_files,
+)
+from crawlab_ai.utils.rules import load_rules
+from crawlab_ai.utils.writers import FORMATS, get_format, get_writer
+
+
+def setup_extract_parser(subparsers):
+    extract_parser = subparsers.add_parser(
+        "extract", help="Extract data from saved HTML files with a rules file"
+    )
+    extract_parser.add_argument(
+        "rules", help="Path of a rules JSON file, e.g. saved with crawl --save-rules"
+    )
+    extract_parser.add_argument(
+        "input", help="Directory of saved HTML files, or a single HTML file"
+    )
+    extract_parser.add_argument(
+        "-t",
+        "--type",
+        help="Type of the rules and the saved webpages",
+        default="list",
+        choices=["article", "list"],
+    )
+    extract_parser.add_argument("-o", "--output", help="Output file path")
+    extract_parser.add_argument(
+        "-f",
+        "--format",
+        help="Output format. Inferred from the output file extension if not set, else JSON lines. Parquet output "
+        "requires pyarrow",
+        choices=FORMATS,
+    )
+    extract_parser.add_argument(
+        "--pattern",
+        help="Glob pattern of the HTML files in the input directory",
+        default="**/*.html",
+    )
+    extract_parser.add_argument(
+        "-w",
+        "--workers",
+        help="Number of worker processes. Defaults to the number of CPUs",
+        type=int,
+    )
+    extract_parser.add_argument(
+        "-p",
+        "--parser",
+        help="HTML parser backend used to extract data",
+        choices=PARSERS,
+    )
+    extract_parser.set_defaults(func=extract)
+
+
+def extract(args):
+    rules = load_rules(args.rules)
+    if os.path.isdir(args.input):
+        paths = glob.iglob(os.path.join(args.input, args.pattern), recursive=True)
+    else:
+        paths = [args.input]
+    results = extract_files(
+        paths, rules, parser=args.parser, max_workers=args.workers, type_=args.type
+    )
+
+    if args.type == "article":
+        field_names = ArticleExtractionPlan(rules, args.parser).field_names
+    else:
+        field_names = ExtractionPlan(rules, args.parser).field_names
+    format_ = args.format or get_format(args.output) or "jsonl"
+    writer = get_writer(format_, ["file"] + field_names, args.output)
+    try:
+        for path, rows in results:
+            writer.write_rows([{"file": path, **row} for row in rows])
+    finally:
+        writer.close()
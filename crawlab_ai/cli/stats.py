@@ -0,0 +1,22 @@
+import sys
+
+from crawlab_ai.utils.metrics import CrawlStats
+
+
+def add_stats_arguments(parser):
+    parser.add_argument(
+        "--stats",
+        help="Print the timings of each stage, the counters and the cache hit rates when done",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help="Write the metrics in the OpenMetrics text format to this file when done",
+    )
+
+
+def report_stats(args, stats: CrawlStats):
+    if args.stats:
+        print(stats.format(), file=sys.stderr)
+    if args.metrics_file:
+        stats.write_openmetrics(args.metrics_file)
@@ -0,0 +1,157 @@
+import threading
+
+# the spiders and their dependencies are imported in the command, so that parsing arguments stays fast
+from crawlab_ai.cli.stats import add_stats_arguments, report_stats
+from crawlab_ai.spider.extraction import ARTICLE_FIELDS, PARSERS
+from crawlab_ai.utils.auth import get_token
+from crawlab_ai.utils.frontier import (
+    DEFAULT_FRONTIER_NAME,
+    DEFAULT_LEASE_TIMEOUT,
+    DEFAULT_MAX_ATTEMPTS,
+    get_frontier,
+)
+from crawlab_ai.utils.logger import logger
+from crawlab_ai.utils.metrics import CrawlStats
+from crawlab_ai.utils.writers import FORMATS, get_format, get_writer
+
+
+def setup_worker_parser(subparsers):
+    worker_parser = subparsers.add_parser(
+        "worker",
+        help="Run a worker of a crawl distributed over several processes or hosts sharing a frontier",
+    )
+    worker_parser.add_argument(
+        "frontier",
+        help="Frontier shared by the workers: a Redis URL such as redis://host:6379/0 (requires redis), or the path "
+        "of a SQLite database file for workers on the same host",
+    )
+    worker_parser.add_argument(
+        "--name",
+        help="Name of the crawl, so that several crawls can share a frontier",
+        default=DEFAULT_FRONTIER_NAME,
+    )
+    worker_parser.add_argument(
+        "-i",
+        "--input",
+        help="File with one start URL per line to push to the frontier. URLs already pushed by any worker are skipped",
+    )
+    worker_parser.add_argument(
+        "-t",
+        "--type",
+        help="Type of the start URLs",
+        default="list",
+        choices=["article", "list"],
+    )
+    worker_parser.add_argument(
+        "--reset",
+        help="Delete the pages, URLs and rules of the crawl from the frontier before starting",
+        action="store_true",
+    )
+    worker_parser.add_argument(
+        "-o", "--output", help="Output file path of the items crawled by this worker"
+    )
+    worker_parser.add_argument(
+        "-f",
+        "--format",
+        help="Output format. Inferred from the output file extension if not set, else JSON lines",
+        choices=FORMATS,
+    )
+    worker_parser.add_argument(
+        "--no-cache",
+        help="Do not read or write the local rules cache",
+        dest="use_cache",
+        action="store_false",
+    )
+    worker_parser.add_argument(
+        "-c",
+        "--concurrency",
+        help="Number of pages crawled at the same time by this worker",
+        type=int,
+        default=4,
+    )
+    worker_parser.add_argument(
+        "-m", "--max-pages", help="Maximum number of pages to crawl per list", type=int
+    )
+    worker_parser.add_argument(
+        "-p",
+        "--parser",
+        help="HTML parser backend used to extract data",
+        choices=PARSERS,
+    )
+    worker_parser.add_argument(
+        "-r",
+        "--rules",
+        help="Path of a rules JSON file to extract with, instead of calling the rules API",
+    )
+    worker_parser.add_argument(
+        "--lease-timeout",
+        help="Number of seconds after which a page not crawled by its worker is handed to another worker",
+        type=float,
+        default=DEFAULT_LEASE_TIMEOUT,
+    )
+    worker_parser.add_argument(
+        "--max-attempts",
+        help="Number of times a page that fails is attempted before it is given up",
+        type=int,
+        default=DEFAULT_MAX_ATTEMPTS,
+    )
+    add_stats_arguments(worker_parser)
+    worker_parser.set_defaults(func=run_worker)
+
+
+def run_worker(args):
+    from crawlab_ai.spider.distributed import DistributedWorker
+
+    if not args.rules:
+        get_token()
+    stats = CrawlStats()
+    format_ = args.format or get_format(args.output) or "jsonl"
+    writer = None
+    lock = threading.Lock()
+
+    def on_items(task, rows):
+        nonlocal writer
+        if task.kind == "list":
+            rows = [{"source_url": task.source, **row} for row in rows]
+            field_names = ["source_url"] + [
+                field["name"]
+                for field in worker.get_rules(task)["list_model"]["fields"]
+            ]
+        else:
+            field_names = ["url"] + ARTICLE_FIELDS
+        with lock:
+            if writer is None:
+                writer = get_writer(format_, field_names, args.output)
+            writer.write_rows(rows)
+
+    with get_frontier(args.frontier, args.name) as frontier:
+        if args.reset:
+            frontier.clear()
+        worker = DistributedWorker(
+            frontier,
+            rules=args.rules,
+            max_pages=args.max_pages,
+            concurrency=args.concurrency,
+            lease_timeout=args.lease_timeout,
+            max_attempts=args.max_attempts,
+            on_items=on_items,
+            stats=stats,
+            use_cache=args.use_cache,
+            parser=args.parser,
+        )
+        if args.input:
+            with open(args.input, "r") as f:
+                urls = [
+                    line.strip()
+                    for line in f
+                    if line.strip() and not line.startswith("#")
+                ]
+            logger.info(
+                "Pushed %s new URLs to the frontier", worker.seed(urls, args.type)
+            )
+        try:
+            worker.run()
+        finally:
+            if writer is not None:
+                writer.close()
+    report_stats(args, stats)
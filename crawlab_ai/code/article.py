@@ -1,19 +1,28 @@
-import requests
+from crawlab_ai.code.base import generate_code
 from crawlab_ai.spider.article_spider import extract_article_rules
-from crawlab_ai.utils.auth import get_auth_headers
-from crawlab_ai.utils.env import get_api_endpoint
+from crawlab_ai.utils.metrics import CrawlStats
+from crawlab_ai.utils.rules import load_rules
 
 
-def get_code_article(url: str):
-    rules = extract_article_rules(url)
-    res = requests.post(
-        url=get_api_endpoint() + "/code/article",
-        headers=get_auth_headers(),
-        json={"url": url, "rules": rules},
-    )
-    res.raise_for_status()
-    data = res.json()
-    return data["source_code"]
+def get_code_article(
+    url: str,
+    use_cache: bool = True,
+    refresh_rules: bool = False,
+    stats: CrawlStats = None,
+    rules: dict | str = None,
+    return_rules: bool = False,
+) -> str | tuple[str, dict]:
+    stats = stats or CrawlStats()
+    if rules is not None:
+        rules = load_rules(rules)
+    else:
+        rules = extract_article_rules(
+            url, use_cache=use_cache, refresh_rules=refresh_rules, stats=stats
+        )
+    source_code = generate_code("article", url, rules, use_cache=use_cache, stats=stats)
+    if return_rules:
+        return source_code, rules
+    return source_code
 
 
 if __name__ == "__main__":
@@ -0,0 +1,47 @@
+from crawlab_ai.utils.auth import get_auth_headers
+from crawlab_ai.utils.code_cache import get_code_cache
+from crawlab_ai.utils.env import get_api_endpoint
+from crawlab_ai.utils.http import http_post
+from crawlab_ai.utils.logger import logger
+from crawlab_ai.utils.metrics import CrawlStats
+
+
+def generate_code(
+    kind: str, url: str, rules: dict, use_cache: bool = True, stats: CrawlStats = None
+) -> str:
+    """
+    Generates the source code of a spider from rules with the code generation API, unless code generated from the
+    same rules for the same URL is cached.
+
+    Args:
+        kind (str): The kind of rules, "list" or "article".
+        url (str): The URL the rules were extracted from.
+        rules (dict): The rules.
+        use_cache (bool): Whether to read and write the on-disk code cache.
+        stats (CrawlStats): Stats object to record the API calls and cache hits in.
+
+    Returns:
+        str: The source code.
+    """
+    stats = stats or CrawlStats()
+    if use_cache:
+        source_code = get_code_cache().get(kind, url, rules)
+        if source_code is not None:
+            stats.incr("code_cache_hits")
+            logger.info("Code loaded from cache for URL: %s", url)
+            return source_code
+        stats.incr("code_cache_misses")
+
+    logger.info("Generating code for URL: %s", url)
+    stats.incr("codegen_api_calls")
+    with stats.time("codegen_api"):
+        res = http_post(
+            get_api_endpoint() + "/code/" + kind,
+            headers=get_auth_headers(),
+            json={"url": url, "rules": rules},
+        )
+    res.raise_for_status()
+    source_code = res.json()["source_code"]
+    if use_cache:
+        get_code_cache().set(kind, url, rules, source_code)
+    return source_code
@@ -0,0 +1,113 @@
+import os
+import re
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+from crawlab_ai.code.article import get_code_article
+from crawlab_ai.code.list import get_code_list
+from crawlab_ai.spider.batch import BatchResult, _iter_batch
+from crawlab_ai.utils.logger import logger
+from crawlab_ai.utils.rules import load_rules
+
+
+def iter_code(
+    urls: List[str],
+    kind: str = "list",
+    fields: List[str] | dict = None,
+    rules: dict | str = None,
+    max_workers: int = 8,
+    share_rules: bool = True,
+    **kwargs,
+) -> Iterator[BatchResult]:
+    """
+    Generates spider code for many URLs concurrently and yields the result of each URL as soon as it finishes.
+
+    Args:
+        urls (List[str]): The URLs to generate code for.
+        kind (str): The kind of the pages, "list" or "article". Defaults to "list".
+        fields (List[str] | dict): A list of fields to be extracted from each list element.
+        rules (dict | str): Rules, or the path of a JSON file containing them, used for all URLs. If given, the rules
+            API is not called.
+        max_workers (int): The maximum number of URLs processed at the same time. Defaults to 8.
+        share_rules (bool): Whether to fetch rules for the first URL of each site only and reuse them for the other
+            URLs of the same site. Defaults to True.
+        **kwargs: Other arguments passed to get_code_list or get_code_article, e.g. use_cache, refresh_rules or
+            stats, a CrawlStats shared by all URLs.
+
+    Returns:
+        Iterator[BatchResult]: The results, in the order in which the URLs finish, with the source code as data.
+    """
+    if kind not in ("list", "article"):
+        raise ValueError("Unknown kind of pages: %s" % kind)
+    rules = load_rules(rules) if rules is not None else None
+
+    def generate_url_code(
+        url: str, site_rules: Optional[dict], rules_url: Optional[str]
+    ):
+        # the code embeds the rules and no page is crawled, so the rules of the site are applied as given
+        if kind == "list":
+            return get_code_list(
+                url, fields, rules=rules or site_rules, return_rules=True, **kwargs
+            )
+        return get_code_article(
+            url, rules=rules or site_rules, return_rules=True, **kwargs
+        )
+
+    return _iter_batch(
+        urls, generate_url_code, max_workers, share_rules and rules is None
+    )
+
+
+def get_module_name(url: str, taken: Dict[str, int] = None) -> str:
+    """
+    Returns a Python module name for the spider of a URL, derived from its site, e.g. "quotes_toscrape_com".
+
+    Args:
+        url (str): The URL.
+        taken (Dict[str, int]): The number of modules already named after each site, updated in place. Later URLs of
+            a site get a numbered name, e.g. "quotes_toscrape_com_2".
+    """
+    site = urlsplit(url.strip()).netloc.lower().split("@")[-1]
+    if site.startswith("www."):
+        site = site[4:]
+    name = re.sub(r"\W+", "_", site, flags=re.A).strip("_") or "site"
+    if name[0].isdigit():
+        name = "site_" + name
+    if taken is not None:
+        taken[name] = taken.get(name, 0) + 1
+        if taken[name] > 1:
+            name += "_%d" % taken[name]
+    return name
+
+
+def write_code(
+    results: Iterator[BatchResult], output_dir: str, urls: List[str]
+) -> tuple[Dict[str, str], Dict[str, Exception]]:
+    """
+    Writes the code generated for each URL to a module of its own in the output directory, named after its site, e.g.
+    example_com.py for the first URL of example.com and example_com_2.py for the second one.
+
+    Module names are assigned in the order of the URLs rather than in the order the results finish, so that the same
+    input always gives the same files.
+
+    Returns:
+        tuple[Dict[str, str], Dict[str, Exception]]: The path of the module written for each URL whose code was
+        generated, and the error raised for each URL whose code was not.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    taken = {}
+    module_names = [get_module_name(url, taken) for url in urls]
+    paths = {}
+    errors = {}
+    for result in results:
+        if result.error is not None:
+            logger.error(
+                "Failed to generate code for URL: %s: %s", result.url, result.error
+            )
+            errors[result.url] = result.error
+            continue
+        path = os.path.join(output_dir, module_names[result.index] + ".py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(result.data)
+        paths[result.url] = path
+    return paths, errors
@@ -4,4 +4,8 @@ from crawlab_ai.utils.env import get_api_endpoint
 
 
 class BaseSpider(scrapy.Spider):
-    _api_endpoint: str = get_api_endpoint()
+    @property
+    def _api_endpoint(self) -> str:
+        # resolved when the spider runs rather than at import, so that configuration changes made after importing
+        # the module are picked up
+        return get_api_endpoint()
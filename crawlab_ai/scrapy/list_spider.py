@@ -1,23 +1,32 @@
-from typing import Any, List, Iterable
+from typing import Any, AsyncIterator, Iterable, List
+from urllib.parse import urlsplit
 
-import requests
 from scrapy import Request
-from scrapy.http import Response
+from scrapy.http import JsonRequest, Response
 
 from crawlab_ai.scrapy.base import BaseSpider
+from crawlab_ai.scrapy.rules import CompiledRules
 from crawlab_ai.utils.auth import get_auth_headers
 from crawlab_ai.utils.logger import logger
+from crawlab_ai.utils.rules import load_rules
+from crawlab_ai.utils.rules_cache import get_rules_cache
 
 
 class ScrapyListSpider(BaseSpider):
     """
     The ScrapyListSpider class is responsible for crawling a given URL and extracting data based on specified fields.
     It fetches rules from an API endpoint, which are used to identify list elements and fields within the webpage.
+    Rules are fetched with Scrapy requests once per domain of the start URLs, so that fetching them does not block the
+    reactor and goes through Scrapy's downloader settings such as concurrency and retries.
     The class also supports pagination by identifying the next page element and recursively crawling until no more pages
     are found.
 
     Attributes:
         fields (List[dict]): A list of fields to be extracted from each list element.
+        rules (dict | str): Rules returned by read_list(..., return_rules=True), or the path of a JSON file containing
+            them. If set, the rules API is not called. Can also be passed as a spider argument, e.g.
+            `scrapy crawl my_list_spider -a rules=rules.json`.
+        use_cache (bool): Whether to read and write rules from the on-disk rules cache. Defaults to True.
 
     Methods:
         parse(response: Response, **kwargs: Any) -> Iterable: Parses the response object and extracts data from the list
@@ -47,71 +56,106 @@ class ScrapyListSpider(BaseSpider):
 
     """
 
-    _fields: List[dict] = None
-    _list_element_css_selector: str = None
-    _next_page_element_css_selector: str = None
-
     fields: List[dict] = None
+    rules: dict | str = None
+    use_cache: bool = True
+
+    def __init__(self, *args, **kwargs):
+        super(ScrapyListSpider, self).__init__(*args, **kwargs)
+        self._given_rules = load_rules(self.rules) if self.rules is not None else None
+        # rules by domain, and start URLs waiting for the rules of their domain to be fetched
+        self._domain_rules = {}
+        self._waiting_urls = {}
 
-    def __init__(self):
-        super(ScrapyListSpider, self).__init__()
-        self._fetch_rules()
+    async def start(self) -> AsyncIterator[Request]:
+        for request in self.start_requests():
+            yield request
 
     def start_requests(self) -> Iterable[Request]:
-        yield Request(self.start_urls[0], self.parse)
+        for url in self.start_urls:
+            domain = urlsplit(url).netloc
+            if domain in self._domain_rules:
+                yield self._get_start_request(url, domain)
+            elif domain in self._waiting_urls:
+                self._waiting_urls[domain].append(url)
+            elif self._load_local_rules(url, domain):
+                yield self._get_start_request(url, domain)
+            else:
+                self._waiting_urls[domain] = [url]
+                yield self._get_rules_request(url, domain)
+
+    def _get_start_request(self, url: str, domain: str) -> Request:
+        return Request(
+            url, self.parse, dont_filter=True, cb_kwargs={"rules_domain": domain}
+        )
 
-    def _fetch_rules(self):
-        logger.info("Fetching rules for URL: " + self.start_urls[0])
-        res = requests.post(
-            url=self._api_endpoint + "/rules/list",
+    def _load_local_rules(self, url: str, domain: str) -> bool:
+        if self._given_rules is not None:
+            self._set_rules(domain, self._given_rules)
+            return True
+        if self.use_cache:
+            rules = get_rules_cache().get("list", url, self.fields)
+            if rules is not None:
+                logger.info("Rules loaded from cache for URL: %s", url)
+                self._set_rules(domain, rules)
+                return True
+        return False
+
+    def _get_rules_request(self, url: str, domain: str) -> Request:
+        logger.info("Fetching rules for URL: %s", url)
+        return JsonRequest(
+            self._api_endpoint + "/rules/list",
+            data={"url": url, "fields": self.fields},
             headers=get_auth_headers(),
-            json={
-                "url": self.start_urls[0],
-                "fields": self.fields,
-            },
+            callback=self._parse_rules,
+            errback=self._handle_rules_error,
+            dont_filter=True,
+            cb_kwargs={"url": url, "domain": domain},
+        )
+
+    def _parse_rules(self, response: Response, url: str, domain: str):
+        rules = load_rules(response.json())
+        logger.info("Rules fetched for domain: %s", domain)
+        if self.use_cache:
+            get_rules_cache().set("list", url, self.fields, rules)
+        self._set_rules(domain, rules)
+        for waiting_url in self._waiting_urls.pop(domain, []):
+            yield self._get_start_request(waiting_url, domain)
+
+    def _handle_rules_error(self, failure):
+        domain = failure.request.cb_kwargs["domain"]
+        urls = self._waiting_urls.pop(domain, [])
+        logger.error(
+            "Failed to fetch rules for domain: %s, skipping URLs: %s: %s",
+            domain,
+            urls,
+            failure.value,
+        )
+
+    def _set_rules(self, domain: str, rules: dict):
+        self._domain_rules[domain] = CompiledRules(rules)
+        list_model = rules["list_model"]
+        logger.info(
+            "List element CSS selector: %s", list_model["list_element_css_selector"]
         )
-        res.raise_for_status()
-
-        data = res.json()
-        self._list_element_css_selector = data["model_list"][0]["list_model"][
-            "list_element_css_selector"
-        ]
-        self._fields = data["model_list"][0]["list_model"]["fields"]
-        self._next_page_element_css_selector = data["model_list"][0][
-            "next_page_element_css_selector"
-        ]
-        logger.info("Rules fetched.")
-        logger.info("List element CSS selector: " + self._list_element_css_selector)
-        logger.info("Fields: " + str(self._fields))
+        logger.info("Fields: %s", list_model["fields"])
         logger.info(
-            "Next page element CSS selector: "
-            + str(self._next_page_element_css_selector)
+            "Next page element CSS selector: %s",
+            rules.get("next_page_element_css_selector"),
         )
 
-    def parse(self, response: Response, **kwargs: Any) -> Any:
-        list_items = response.css(self._list_element_css_selector)
-        for item in list_items:
-            data = {}
-            for field in self._fields:
-                name = field["name"]
-                if field["type"] == "text":
-                    selector = field["element_css_selector"] + "::text"
-                else:
-                    selector = (
-                        field["element_css_selector"]
-                        + "::attr("
-                        + field["attribute"]
-                        + ")"
-                    )
-                value = item.css(selector).get()
-                data[name] = value
-            yield data
-
-        if self._next_page_element_css_selector:
-            next_page_element = response.css(self._next_page_element_css_selector)
-            next_page_href = next_page_element.css("a::attr(href)").get()
-            if next_page_href:
-                yield response.follow(next_page_href, self.parse)
+    def parse(self, response: Response, rules_domain: str = None, **kwargs: Any) -> Any:
+        rules_domain = rules_domain or urlsplit(response.url).netloc
+        compiled_rules = self._domain_rules[rules_domain]
+        yield from compiled_rules.extract_items(response)
+
+        next_page_href = compiled_rules.get_next_page_href(response)
+        if next_page_href:
+            yield response.follow(
+                next_page_href,
+                self.parse,
+                cb_kwargs={"rules_domain": rules_domain},
+            )
 
 
 if __name__ == "__main__":
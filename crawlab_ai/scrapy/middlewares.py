@@ -0,0 +1,166 @@
+from typing import Any, AsyncIterator, Optional
+from urllib.parse import urlsplit
+
+from scrapy import Request
+from scrapy.http import JsonRequest, Response, TextResponse
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet.defer import Deferred
+
+from crawlab_ai.scrapy.rules import (
+    CompiledRules,
+    get_compiled_rules_cache,
+    get_compiled_rules_key,
+)
+from crawlab_ai.utils.auth import get_auth_headers
+from crawlab_ai.utils.env import get_api_endpoint
+from crawlab_ai.utils.logger import logger
+from crawlab_ai.utils.rules import load_rules
+from crawlab_ai.utils.rules_cache import get_rules_cache
+
+
+class CrawlabRulesMiddleware(object):
+    """
+    A spider middleware that extracts list items with Crawlab AI rules from the responses of any spider.
+
+    Rules are fetched once per domain through Scrapy's downloader, compiled once and kept in a bounded in-memory cache
+    shared by all spiders of the process. The items are yielded after the output of the spider's callback.
+
+    Enable it in the settings:
+
+        SPIDER_MIDDLEWARES = {"crawlab_ai.scrapy.middlewares.CrawlabRulesMiddleware": 500}
+        CRAWLAB_AI_ENABLED = True
+
+    Settings (each can be overridden with a spider attribute of the same name in lower case):
+        CRAWLAB_AI_ENABLED (bool): Whether to extract items from all responses. Defaults to False. Requests can opt in
+            or out with `meta={"crawlab_ai": True}` or `meta={"crawlab_ai": False}`.
+        CRAWLAB_AI_FIELDS (list): The fields to extract. Defaults to the fields suggested by the rules API.
+        CRAWLAB_AI_RULES (dict | str): Rules, or the path of a JSON file containing them, used for all domains. If
+            set, the rules API is not called.
+        CRAWLAB_AI_FOLLOW_NEXT_PAGE (bool): Whether to follow the next page found with the rules, with the callback
+            of the current request. Defaults to False.
+        CRAWLAB_AI_USE_CACHE (bool): Whether to read and write rules from the on-disk rules cache. Defaults to True.
+        CRAWLAB_AI_RULES_CACHE_SIZE (int): Maximum number of domains kept in the in-memory cache. Defaults to 256.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.cache = get_compiled_rules_cache(
+            crawler.settings.getint("CRAWLAB_AI_RULES_CACHE_SIZE", 256)
+        )
+        # futures of the rules being fetched, by cache key
+        self._fetching = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def _get_setting(self, spider, name: str, default: Any = None) -> Any:
+        value = getattr(spider, name.lower(), None)
+        if value is not None:
+            return value
+        return self.crawler.settings.get(name, default)
+
+    def _is_enabled(self, response: Response, spider) -> bool:
+        if not isinstance(response, TextResponse) or response.status != 200:
+            return False
+        enabled = response.meta.get("crawlab_ai")
+        if enabled is None:
+            enabled = self._get_setting(spider, "CRAWLAB_AI_ENABLED", False)
+        return bool(enabled)
+
+    async def process_spider_output(
+        self, response: Response, result, spider=None
+    ) -> AsyncIterator[Any]:
+        async for output in result:
+            yield output
+
+        spider = spider or self.crawler.spider
+        if not self._is_enabled(response, spider):
+            return
+        compiled_rules = await self._get_compiled_rules(response.url, spider)
+        if compiled_rules is None:
+            return
+        for item in compiled_rules.extract_items(response):
+            yield item
+
+        if self._get_setting(spider, "CRAWLAB_AI_FOLLOW_NEXT_PAGE", False):
+            next_page_href = compiled_rules.get_next_page_href(response)
+            if next_page_href:
+                yield response.follow(
+                    next_page_href,
+                    callback=response.request.callback,
+                    cb_kwargs=response.request.cb_kwargs,
+                    meta={"crawlab_ai": True},
+                )
+
+    async def _get_compiled_rules(self, url: str, spider) -> Optional[CompiledRules]:
+        fields = self._get_setting(spider, "CRAWLAB_AI_FIELDS")
+        given_rules = self._get_setting(spider, "CRAWLAB_AI_RULES")
+        if given_rules is not None:
+            # given rules apply to all domains
+            key = get_compiled_rules_key("", given_rules)
+        else:
+            key = get_compiled_rules_key(urlsplit(url).netloc, fields)
+
+        compiled_rules = self.cache.get(key)
+        if compiled_rules is not None:
+            return compiled_rules
+
+        if key in self._fetching:
+            deferred = Deferred()
+            self._fetching[key].append(deferred)
+            return await maybe_deferred_to_future(deferred)
+
+        self._fetching[key] = []
+        compiled_rules = None
+        try:
+            if given_rules is not None:
+                rules = load_rules(given_rules)
+            else:
+                rules = await self._fetch_rules(url, fields, spider)
+            if rules is not None:
+                compiled_rules = CompiledRules(rules)
+                self.cache.set(key, compiled_rules)
+        finally:
+            for deferred in self._fetching.pop(key):
+                deferred.callback(compiled_rules)
+        return compiled_rules
+
+    async def _fetch_rules(self, url: str, fields, spider) -> Optional[dict]:
+        use_cache = self._get_setting(spider, "CRAWLAB_AI_USE_CACHE", True)
+        if use_cache:
+            rules = get_rules_cache().get("list", url, fields)
+            if rules is not None:
+                logger.info("Rules loaded from cache for URL: %s", url)
+                return rules
+
+        logger.info("Fetching rules for URL: %s", url)
+        request = JsonRequest(
+            get_api_endpoint() + "/rules/list",
+            data={"url": url, "fields": fields},
+            headers=get_auth_headers(),
+            dont_filter=True,
+        )
+        # failures are not cached, so that the next response of the domain tries again
+        try:
+            response = await self._download(request)
+        except Exception as e:
+            logger.error("Failed to fetch rules for URL: %s: %s", url, e)
+            return None
+        if response.status != 200:
+            logger.error(
+                "Failed to fetch rules for URL: %s: HTTP status %s",
+                url,
+                response.status,
+            )
+            return None
+        rules = load_rules(response.json())
+        if use_cache:
+            get_rules_cache().set("list", url, fields, rules)
+        return rules
+
+    async def _download(self, request: Request) -> Response:
+        engine = self.crawler.engine
+        if hasattr(engine, "download_async"):
+            return await engine.download_async(request)
+        return await maybe_deferred_to_future(engine.download(request))
@@ -0,0 +1,92 @@
+import json
+from typing import Any, Iterator, List, Optional
+
+from lxml import etree
+from parsel.csstranslator import HTMLTranslator
+from scrapy.http import Response
+
+from crawlab_ai.utils.rules_cache import MemoryRulesCache
+
+_translator = HTMLTranslator()
+
+
+def _compile(selector: str) -> etree.XPath:
+    # the same translation as Selector.css, compiled once instead of on every call
+    return etree.XPath(_translator.css_to_xpath(selector))
+
+
+class CompiledRules(object):
+    """
+    List rules compiled to XPath expressions that are applied to the parsed document of Scrapy responses.
+
+    The extracted values are the same as with the equivalent `response.css(...)` calls: the first text node of a
+    text field, or the value of the attribute of an attribute field.
+
+    Attributes:
+        rules (dict): The list rules, as returned by the rules API.
+    """
+
+    def __init__(self, rules: dict):
+        self.rules = rules
+        list_model = rules["list_model"]
+        self._list_selector = _compile(list_model["list_element_css_selector"])
+        self._fields = []
+        for field in list_model["fields"]:
+            if field["type"] == "text":
+                selector = field["element_css_selector"] + "::text"
+            else:
+                selector = (
+                    field["element_css_selector"] + "::attr(" + field["attribute"] + ")"
+                )
+            self._fields.append((field["name"], _compile(selector)))
+        next_page_element_css_selector = rules.get("next_page_element_css_selector")
+        self._next_page_selector = (
+            _compile(next_page_element_css_selector)
+            if next_page_element_css_selector
+            else None
+        )
+        self._next_page_href_selector = _compile("a::attr(href)")
+
+    @property
+    def field_names(self) -> List[str]:
+        return [name for name, _ in self._fields]
+
+    def extract_items(self, response: Response) -> Iterator[dict]:
+        fields = self._fields
+        for element in self._list_selector(response.selector.root):
+            item = {}
+            for name, selector in fields:
+                values = selector(element)
+                item[name] = str(values[0]) if values else None
+            yield item
+
+    def get_next_page_href(self, response: Response) -> Optional[str]:
+        if self._next_page_selector is None:
+            return None
+        for element in self._next_page_selector(response.selector.root):
+            hrefs = self._next_page_href_selector(element)
+            if hrefs:
+                return str(hrefs[0])
+        return None
+
+
+_compiled_rules_cache: Optional[MemoryRulesCache] = None
+
+
+def get_compiled_rules_cache(max_entries: int = None) -> MemoryRulesCache:
+    """
+    Returns the in-memory cache of compiled rules shared by all spiders of the process.
+
+    Args:
+        max_entries (int): If given, the maximum number of entries of the cache.
+    """
+    global _compiled_rules_cache
+    if _compiled_rules_cache is None:
+        _compiled_rules_cache = MemoryRulesCache()
+    if max_entries is not None:
+        _compiled_rules_cache.max_entries = max_entries
+    return _compiled_rules_cache
+
+
+def get_compiled_rules_key(domain: str, fields: Any = None) -> tuple:
+    return domain, json.dumps(fields, sort_keys=True)
@@ -1,35 +1,140 @@
-import requests
+import asyncio
 
-from crawlab_ai.spider.base import BaseSpider
+from crawlab_ai.spider.base import BaseSpider, get_extraction_key
+from crawlab_ai.spider.extraction import ARTICLE_FIELDS, ArticleExtractionPlan
+from crawlab_ai.spider.fetchers import Fetcher
+from crawlab_ai.utils.async_http import async_http_session, async_post_json
 from crawlab_ai.utils.auth import get_auth_headers
 from crawlab_ai.utils.env import get_api_endpoint
+from crawlab_ai.utils.http import http_post
+from crawlab_ai.utils.http_cache import HttpCache
 from crawlab_ai.utils.logger import logger
+from crawlab_ai.utils.metrics import CrawlStats
+from crawlab_ai.utils.rules_cache import get_rules_cache
+from crawlab_ai.utils.throttle import HostScheduler
 
 
 class ArticleSpider(BaseSpider):
-    def __init__(self, url: str, get_html=None):
-        super().__init__(url, get_html)
+    """
+    The ArticleSpider class is responsible for extracting the title, author, publish date and content of an article.
+    It fetches rules from an API endpoint, fetches the article page with get_html, and applies the CSS selectors of
+    the rules locally. Since the rules of a site apply to all its articles, they can be passed to the spiders of other
+    articles of the same site to avoid calling the API again.
+
+    Attributes:
+        url (str): The URL of the article.
+        rules (dict): The article rules. If given upfront, as a dict or the path of a JSON file, the rules API is not
+            called.
+        data (dict): The extracted article data.
+        parser (str): The HTML parser backend, "lxml", "selectolax" or "html.parser". Defaults to lxml if installed.
+        scheduler (HostScheduler): The scheduler that fetches the article within the limits of its host, if any.
+        http_cache (HttpCache): The HTTP cache that revalidates articles fetched before, if any. The data of an
+            article that was not modified since is reused without parsing it again.
+        stats (CrawlStats): The timings and counters of the crawl. It can be shared by several spiders.
+        fetcher (Fetcher): The fetcher of the article, e.g. a BrowserFetcher for articles rendered with JavaScript,
+            which waits for the content elements once the rules are known. Defaults to the HTTP client.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        get_html=None,
+        use_cache: bool = True,
+        refresh_rules: bool = False,
+        rules: dict | str = None,
+        parser: str = None,
+        scheduler: HostScheduler = None,
+        http_cache: HttpCache | bool = None,
+        stats: CrawlStats = None,
+        fetcher: Fetcher = None,
+    ):
+        super().__init__(
+            url,
+            get_html,
+            use_cache,
+            refresh_rules,
+            rules,
+            scheduler,
+            http_cache,
+            stats,
+            fetcher,
+        )
         self.rules: dict | None = None
         self.url = url
-        self.get_html = get_html or self.crawl
+        self.parser = parser
+        self.data: dict | None = None
 
-    def fetch_rules(self):
-        logger.info("Fetching rules for URL: " + self.url)
-        res = requests.post(
-            url=get_api_endpoint() + "/rules/article",
-            headers=get_auth_headers(),
-            json={
-                "url": self.url,
-            },
+    def _get_wait_selector(self) -> str | None:
+        if not self.rules:
+            return None
+        return self.rules.get("content_css_selector") or self.rules.get(
+            "title_css_selector"
         )
+
+    def fetch_rules(self):
+        if self._load_local_rules() or self._load_template_rules("article"):
+            return
+
+        logger.info("Fetching rules for URL: %s", self.url)
+        self.stats.incr("rules_api_calls")
+        with self.stats.time("rules_api"):
+            res = http_post(
+                get_api_endpoint() + "/rules/article",
+                headers=get_auth_headers(),
+                json=self._get_rules_payload(),
+            )
         res.raise_for_status()
+        self._set_rules(res.json())
 
-        self.rules = res.json()
-        logger.info("Rules fetched successfully for URL: " + self.url)
+    async def afetch_rules(self):
+        if self._load_local_rules() or await self._aload_template_rules("article"):
+            return
+
+        logger.info("Fetching rules for URL: %s", self.url)
+        self.stats.incr("rules_api_calls")
+        with self.stats.time("rules_api"):
+            data = await async_post_json(
+                get_api_endpoint() + "/rules/article",
+                headers=get_auth_headers(),
+                json=self._get_rules_payload(),
+            )
+        self._set_rules(data)
+
+    def _load_local_rules(self) -> bool:
+        if self.given_rules is not None:
+            self.rules = self.given_rules
+            self.rules_url = None
+            logger.info("Using given rules for URL: %s", self.url)
+            return True
+        if self._load_reused_rules():
+            return True
+        if self.use_cache and not self.refresh_rules:
+            rules = get_rules_cache().get("article", self.url)
+            if rules is not None:
+                self.rules = rules
+                self.rules_url = self.url
+                self.stats.incr("rules_cache_hits")
+                logger.info("Rules loaded from cache for URL: %s", self.url)
+                return True
+            self.stats.incr("rules_cache_misses")
+        return False
+
+    def _get_rules_payload(self) -> dict:
+        return {
+            "url": self.url,
+        }
+
+    def _set_rules(self, data: dict):
+        self.rules = data
+        self.rules_url = self.url
+        if self.use_cache:
+            get_rules_cache().set("article", self.url, None, self.rules)
+        self._add_rules_template("article")
+        logger.info("Rules fetched successfully for URL: %s", self.url)
         logger.info("Title: %s", self.rules.get("title"))
         logger.info("Author: %s", self.rules.get("author"))
         logger.info("Publish date: %s", self.rules.get("publish_date"))
-        logger.info("Content: %s", self.rules.get("content")[:200])
+        logger.info("Content: %s", (self.rules.get("content") or "")[:200])
         logger.info("Title CSS selector: %s", self.rules.get("title_css_selector"))
         logger.info("Author CSS selector: %s", self.rules.get("author_css_selector"))
         logger.info(
@@ -38,43 +143,213 @@ class ArticleSpider(BaseSpider):
         logger.info("Content CSS selector: %s", self.rules.get("content_css_selector"))
 
     def crawl(self):
-        logger.info("Crawling URL: " + self.url)
+        logger.info("Crawling URL: %s", self.url)
+        self._crawling = True
         self.fetch_rules()
-        logger.info("Crawling completed for URL: " + self.url)
+        plan = ArticleExtractionPlan(self.rules, self.parser)
+        html = self._pop_prefetched_html(self.url)
+        if html is None:
+            html = self.fetch_html(self.url)
+        key = get_extraction_key("article", self.rules, plan.backend.name)
+        data = self._get_extracted(self.url, key)
+        if data is None:
+            with self.stats.time("parse"):
+                document = plan.parse(html)
+            with self.stats.time("extract"):
+                data = plan.extract(document)
+            self._set_extracted(self.url, key, data)
+        self.stats.incr("items")
+        self._set_data(data)
+        logger.info("Crawling completed for URL: %s", self.url)
+
+    async def acrawl(self):
+        logger.info("Crawling URL: %s", self.url)
+        self._crawling = True
+        await self.afetch_rules()
+        plan = ArticleExtractionPlan(self.rules, self.parser)
+        html = self._pop_prefetched_html(self.url)
+        if html is None:
+            html = await self.aget_html(self.url)
+        key = get_extraction_key("article", self.rules, plan.backend.name)
+        data = self._get_extracted(self.url, key)
+        if data is None:
+            with self.stats.time("parse"):
+                document = await asyncio.to_thread(plan.parse, html)
+            with self.stats.time("extract"):
+                data = plan.extract(document)
+            self._set_extracted(self.url, key, data)
+        self.stats.incr("items")
+        self._set_data(data)
+        logger.info("Crawling completed for URL: %s", self.url)
 
+    def _set_data(self, data: dict):
+        if self.given_rules is None and self.rules_url in (None, self.url):
+            # the rules were generated for this very article rather than reused from another article of the same
+            # layout, so the values extracted by the API can fill the gaps
+            for name in ARTICLE_FIELDS:
+                if data[name] is None and self.rules.get(name):
+                    data[name] = self.rules[name]
+        self.data = {"url": self.url, **data}
 
-def read_article(url: str, get_html=None) -> dict:
+
+def read_article(
+    url: str,
+    get_html=None,
+    use_cache: bool = True,
+    refresh_rules: bool = False,
+    rules: dict | str = None,
+    parser: str = None,
+    return_rules: bool = False,
+    scheduler: HostScheduler = None,
+    http_cache: HttpCache | bool = None,
+    stats: CrawlStats = None,
+    fetcher: Fetcher = None,
+) -> dict | tuple[dict, dict]:
     """
     Read an article from a URL
 
     Args:
         url (str): URL of the article
         get_html (function): Function to get HTML content
+        use_cache (bool): Whether to use the on-disk rules cache
+        refresh_rules (bool): Whether to fetch fresh rules even if cached ones exist
+        rules (dict | str): Article rules or the path of a JSON file containing them. If given, the rules API is not
+            called
+        parser (str): HTML parser backend, "lxml", "selectolax" or "html.parser"
+        return_rules (bool): Whether to also return the rules used for extraction
+        scheduler (HostScheduler): Scheduler that fetches the article within the limits of its host
+        http_cache (HttpCache | bool): HTTP cache, or True for the default on-disk one, that revalidates the article
+            if it was fetched before and reuses its data if it was not modified
+        stats (CrawlStats): Stats object to record the timings and counters of the crawl in
+        fetcher (Fetcher): Fetcher of the article, e.g. a BrowserFetcher for articles rendered with JavaScript
 
     Returns:
-        dict: Article data
+        dict | tuple[dict, dict]: Article data with url, title, author, publish_date and content, or a tuple of the
+        article data and the rules if return_rules is True
     """
-    spider = ArticleSpider(url, get_html)
+    spider = ArticleSpider(
+        url,
+        get_html,
+        use_cache,
+        refresh_rules,
+        rules,
+        parser,
+        scheduler,
+        http_cache,
+        stats,
+        fetcher,
+    )
     spider.crawl()
-    return spider.rules
+    if return_rules:
+        return spider.data, spider.rules
+    return spider.data
+
+
+async def aread_article(
+    url: str,
+    get_html=None,
+    use_cache: bool = True,
+    refresh_rules: bool = False,
+    rules: dict | str = None,
+    parser: str = None,
+    return_rules: bool = False,
+    scheduler: HostScheduler = None,
+    http_cache: HttpCache | bool = None,
+    stats: CrawlStats = None,
+    fetcher: Fetcher = None,
+) -> dict | tuple[dict, dict]:
+    """
+    Read an article from a URL without blocking the event loop. The pooled async HTTP client of the running event loop
+    is closed on return, unless the call is made within an async_http_session block
 
+    Args:
+        url (str): URL of the article
+        get_html (function): Function to get HTML content, either a regular or an async function
+        use_cache (bool): Whether to use the on-disk rules cache
+        refresh_rules (bool): Whether to fetch fresh rules even if cached ones exist
+        rules (dict | str): Article rules or the path of a JSON file containing them. If given, the rules API is not
+            called
+        parser (str): HTML parser backend, "lxml", "selectolax" or "html.parser"
+        return_rules (bool): Whether to also return the rules used for extraction
+        scheduler (HostScheduler): Scheduler that fetches the article within the limits of its host
+        http_cache (HttpCache | bool): HTTP cache, or True for the default on-disk one, that revalidates the article
+            if it was fetched before and reuses its data if it was not modified
+        stats (CrawlStats): Stats object to record the timings and counters of the crawl in
+        fetcher (Fetcher): Fetcher of the article, e.g. a BrowserFetcher for articles rendered with JavaScript
 
-def extract_article_rules(url: str, get_html=None) -> dict:
+    Returns:
+        dict | tuple[dict, dict]: Article data, or a tuple of the article data and the rules if return_rules is True
+    """
+    spider = ArticleSpider(
+        url,
+        get_html,
+        use_cache,
+        refresh_rules,
+        rules,
+        parser,
+        scheduler,
+        http_cache,
+        stats,
+        fetcher,
+    )
+    async with async_http_session():
+        await spider.acrawl()
+    if return_rules:
+        return spider.data, spider.rules
+    return spider.data
+
+
+def extract_article_rules(
+    url: str,
+    get_html=None,
+    use_cache: bool = True,
+    refresh_rules: bool = False,
+    stats: CrawlStats = None,
+) -> dict:
     """
     Extract article rules from a URL
 
     Args:
         url (str): URL of the article
         get_html (function): Function to get HTML content
+        use_cache (bool): Whether to use the on-disk rules cache
+        refresh_rules (bool): Whether to fetch fresh rules even if cached ones exist
+        stats (CrawlStats): Stats object to record the rules API call in
 
     Returns:
         dict: Article rules
     """
-    spider = ArticleSpider(url, get_html)
+    spider = ArticleSpider(url, get_html, use_cache, refresh_rules, stats=stats)
     spider.fetch_rules()
     return spider.rules
 
 
+async def aextract_article_rules(
+    url: str,
+    get_html=None,
+    use_cache: bool = True,
+    refresh_rules: bool = False,
+    stats: CrawlStats = None,
+) -> dict:
+    """
+    Extract article rules from a URL without blocking the event loop
+
+    Args:
+        url (str): URL of the article
+        get_html (function): Function to get HTML content, either a regular or an async function
+        use_cache (bool): Whether to use the on-disk rules cache
+        refresh_rules (bool): Whether to fetch fresh rules even if cached ones exist
+        stats (CrawlStats): Stats object to record the rules API call in
+
+    Returns:
+        dict: Article rules
+    """
+    spider = ArticleSpider(url, get_html, use_cache, refresh_rules, stats=stats)
+    async with async_http_session():
+        await spider.afetch_rules()
+    return spider.rules
+
+
 if __name__ == "__main__":
     data = read_article("https://www.36kr.com/p/2601845967059847")
     print(data)
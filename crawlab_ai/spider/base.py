@@ -1,20 +1,271 @@
+import asyncio
+import hashlib
+import inspect
+import json
 from abc import abstractmethod
 
-import requests
+from crawlab_ai.spider.fetchers import Fetcher
+from crawlab_ai.utils.async_http import async_get_text
+from crawlab_ai.utils.http import http_get
+from crawlab_ai.utils.http_cache import HttpCache, get_http_cache
+from crawlab_ai.utils.logger import logger
+from crawlab_ai.utils.metrics import CrawlStats
+from crawlab_ai.utils.rules import load_rules
+from crawlab_ai.utils.rules_templates import RulesTemplate, get_rules_templates
+from crawlab_ai.utils.throttle import HostScheduler
 
 
 class BaseSpider(object):
-    def __init__(self, url: str, get_html=None):
+    def __init__(
+        self,
+        url: str,
+        get_html=None,
+        use_cache: bool = True,
+        refresh_rules: bool = False,
+        rules: dict | str = None,
+        scheduler: HostScheduler = None,
+        http_cache: HttpCache | bool = None,
+        stats: CrawlStats = None,
+        fetcher: Fetcher = None,
+    ):
         self.url = url
-        self.get_html = get_html or self._get_html
+        self.stats = stats or CrawlStats()
+        # a fetcher is used in place of the default HTTP client, unless a get_html function is given
+        self.fetcher = fetcher
+        if fetcher is not None and get_html is None:
+            get_html = self._fetch_with_fetcher
+        # the HTTP cache revalidates pages fetched with the default HTTP client, a custom get_html is used as is
+        if http_cache is True:
+            http_cache = get_http_cache()
+        self.http_cache = http_cache if isinstance(http_cache, HttpCache) else None
+        self._not_modified_urls = set()
+        # the URLs whose last fetch with the HTTP client was answered with an error status
+        self._error_urls = set()
+        if self.http_cache is not None and get_html is None:
+            get_html = self._get_cached_html
+        # with a scheduler, pages are fetched within the limits of their host, in threads for the async methods
+        self.scheduler = scheduler
+        if scheduler is not None:
+            self.get_html = scheduler.wrap(get_html, self._record_status)
+        else:
+            self.get_html = get_html or self._get_html
+        self.use_cache = use_cache
+        self.refresh_rules = refresh_rules
+        # rules given upfront (as a dict or a JSON file path) are applied locally without calling the API
+        self.given_rules = load_rules(rules) if rules is not None else None
+        # the URL the rules were generated for, which differs from url when they are reused from a page of the same
+        # layout
+        self.rules_url: str | None = None
+        self._reused_rules: tuple[dict, str] | None = None
+        self._prefetched_html: str | None = None
+        # whether the page is crawled after its rules are fetched, so that its HTML can be fetched beforehand
+        self._crawling = False
 
-    @staticmethod
-    def _get_html(url):
-        res = requests.get(url)
+    def _get_html(self, url):
+        res = http_get(url)
+        self._record_status(url, res.status_code)
         return res.text
 
+    def _record_status(self, url: str, status: int):
+        if status >= 400:
+            self._error_urls.add(url)
+        else:
+            self._error_urls.discard(url)
+
+    def _fetch_with_fetcher(self, url) -> str:
+        return self.fetcher.fetch(url, self._get_wait_selector())
+
+    def _get_wait_selector(self) -> str | None:
+        """
+        Returns the CSS selector of the elements that fetchers rendering pages should wait for, once rules are known.
+        """
+        return None
+
+    def _get_cached_html(self, url) -> str:
+        html, not_modified = self.http_cache.fetch(url, on_status=self._record_status)
+        if not_modified:
+            self._not_modified_urls.add(url)
+        self.stats.incr("http_cache_hits" if not_modified else "http_cache_misses")
+        return html
+
+    def fetch_html(self, url) -> str:
+        """
+        Fetches the HTML content of a webpage with get_html, recording the time spent and the size of the page.
+
+        An async get_html is run in a new event loop for each page, within the limits of the scheduler if any, so the
+        synchronous methods of spiders should be given a regular get_html function.
+        """
+        with self.stats.time("fetch"):
+            html = self.get_html(url)
+            if inspect.isawaitable(html):
+                html = asyncio.run(html)
+        self._record_page_size(html)
+        return html
+
+    def _record_page_size(self, html: str):
+        self.stats.incr("pages_fetched")
+        if html:
+            self.stats.incr("bytes_downloaded", len(html.encode("utf-8")))
+
+    def _pop_not_modified(self, url: str) -> bool:
+        """
+        Returns whether the last fetch of the URL was answered from the HTTP cache as not modified.
+        """
+        if url not in self._not_modified_urls:
+            return False
+        self._not_modified_urls.discard(url)
+        return True
+
+    def _get_extracted(self, url: str, key: str):
+        """
+        Returns the data extracted from the page at the URL during an earlier crawl, if the page was not modified
+        since and the extraction identified by key is the same.
+        """
+        if not self._pop_not_modified(url):
+            return None
+        extracted = self.http_cache.get_extracted(url, key)
+        if extracted is not None:
+            self.stats.incr("extractions_reused")
+            logger.info("Page not modified, reusing extracted data for URL: %s", url)
+        return extracted
+
+    def _set_extracted(self, url: str, key: str, data):
+        if self.http_cache is not None:
+            self.http_cache.set_extracted(url, key, data)
+
+    async def aget_html(self, url) -> str:
+        """
+        Fetches the HTML content of a webpage without blocking the event loop. The pooled async HTTP client is used
+        unless a custom get_html function was given, which may be either a regular or an async function.
+        """
+        with self.stats.time("fetch"):
+            html = await self._aget_html(url)
+        self._record_page_size(html)
+        return html
+
+    async def _aget_html(self, url) -> str:
+        if self.get_html == self._get_html:
+            return await async_get_text(url, on_status=self._record_status)
+        if self.get_html == self._fetch_with_fetcher:
+            return await self.fetcher.afetch(url, self._get_wait_selector())
+        if _is_async_callable(self.get_html):
+            return await self.get_html(url)
+        html = await asyncio.to_thread(self.get_html, url)
+        if inspect.isawaitable(html):
+            html = await html
+        return html
+
+    def _prefetch_html(self) -> str:
+        """
+        Fetches the HTML of the spider's URL once, to be reused when the page is crawled.
+        """
+        if self._prefetched_html is None:
+            self._prefetched_html = self.fetch_html(self.url)
+        return self._prefetched_html
+
+    async def _aprefetch_html(self) -> str:
+        if self._prefetched_html is None:
+            self._prefetched_html = await self.aget_html(self.url)
+        return self._prefetched_html
+
+    def _pop_prefetched_html(self, url: str) -> str | None:
+        if url != self.url:
+            return None
+        html, self._prefetched_html = self._prefetched_html, None
+        return html
+
+    def _load_template_rules(self, kind: str, fields=None) -> RulesTemplate | None:
+        """
+        Looks up rules learned for a page of the same layout as the spider's URL, first by URL template, then by DOM
+        fingerprint when the page is crawled. The HTML of the page is fetched for the latter, and kept for the crawl
+        and so that it can be fingerprinted when the rules are fetched from the API.
+        """
+        if not self.use_cache or self.refresh_rules:
+            return None
+        templates = get_rules_templates()
+        template = templates.match_url(kind, self.url, fields)
+        if template is None and self._crawling:
+            html = self._prefetch_html()
+            template = templates.match_dom(kind, self.url, fields, html)
+        return self._use_template(template)
+
+    async def _aload_template_rules(
+        self, kind: str, fields=None
+    ) -> RulesTemplate | None:
+        if not self.use_cache or self.refresh_rules:
+            return None
+        templates = get_rules_templates()
+        template = await asyncio.to_thread(templates.match_url, kind, self.url, fields)
+        if template is None and self._crawling:
+            html = await self._aprefetch_html()
+            template = await asyncio.to_thread(
+                templates.match_dom, kind, self.url, fields, html
+            )
+        return self._use_template(template)
+
+    def _use_template(self, template: RulesTemplate | None) -> RulesTemplate | None:
+        if template is None:
+            get_rules_templates().stats.record("misses")
+            self.stats.incr("rules_template_misses")
+            return None
+        self.stats.incr("rules_template_hits")
+        self.rules = template.rules
+        self.rules_url = template.url
+        logger.info(
+            "Rules reused for URL: %s from URL of the same layout: %s",
+            self.url,
+            template.url,
+        )
+        return template
+
+    def reuse_rules(self, rules: dict, url: str):
+        """
+        Uses the rules generated for another page of the same site, e.g. by the spider of another URL of a batch, in
+        place of the cached rules. Unlike given rules, they are fetched again for this page if they turn out to be out
+        of date for it.
+
+        Args:
+            rules (dict): The rules to reuse.
+            url (str): The URL of the page the rules were generated for.
+        """
+        self.rules = rules
+        self.rules_url = url
+        self._reused_rules = rules, url
+
+    def _load_reused_rules(self) -> bool:
+        if self._reused_rules is None:
+            return False
+        # reused once, so that rules fetched again are not replaced by them
+        (self.rules, self.rules_url), self._reused_rules = self._reused_rules, None
+        logger.info(
+            "Rules reused for URL: %s from URL of the same site: %s",
+            self.url,
+            self.rules_url,
+        )
+        return True
+
+    def _add_rules_template(self, kind: str, fields=None):
+        if self.use_cache:
+            get_rules_templates().add(
+                kind, self.url, fields, self.rules, html=self._prefetched_html
+            )
+
     @abstractmethod
     def crawl(self): ...
 
     @abstractmethod
     def fetch_rules(self): ...
+
+
+def get_extraction_key(kind: str, rules: dict, parser: str) -> str:
+    """
+    Returns the key identifying the extraction of a page with the given rules and parser backend.
+    """
+    payload = json.dumps([kind, rules, parser], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _is_async_callable(func) -> bool:
+    return inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(
+        getattr(func, "__call__", None)
+    )
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Callable, Iterator, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+from crawlab_ai.spider.article_spider import ArticleSpider
+from crawlab_ai.spider.list_spider import ListSpider, _get_fields
+from crawlab_ai.utils.logger import logger
+from crawlab_ai.utils.rules import load_rules
+from crawlab_ai.utils.throttle import HostScheduler
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+
+class BatchResult(NamedTuple):
+    """
+    The result of crawling one URL of a batch.
+
+    Attributes:
+        index (int): The position of the URL in the batch.
+        url (str): The crawled URL.
+        data: The extracted data, or None if the crawl failed.
+        rules (dict): The rules used for extraction, or None if the crawl failed.
+        error (Exception): The error raised while crawling, or None if the crawl succeeded.
+    """
+
+    index: int
+    url: str
+    data: Any
+    rules: Optional[dict]
+    error: Optional[Exception]
+
+
+def _iter_batch(
+    urls: List[str],
+    crawl_url: Callable[[str, Optional[dict], Optional[str]], tuple[Any, dict]],
+    max_workers: int,
+    share_rules: bool,
+) -> Iterator[BatchResult]:
+    """
+    Crawls URLs in a bounded pool of threads and yields their results as they finish.
+
+    If share_rules is True, only the first URL of each site is crawled at first. Once it finishes, its rules are
+    passed to the other URLs of the same site along with its URL, so that the rules API is called once per site. If it
+    fails, the next URL of the site takes its place.
+    """
+    waiting = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        for index, url in enumerate(urls):
+            site = urlsplit(url).netloc
+            if share_rules and site in waiting:
+                waiting[site].append((index, url))
+                continue
+            if share_rules:
+                waiting[site] = deque()
+            pending[executor.submit(crawl_url, url, None, None)] = (index, url, site)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, url, site = pending.pop(future)
+                try:
+                    data, rules = future.result()
+                    yield BatchResult(index, url, data, rules, None)
+                except Exception as e:
+                    logger.error("Failed to crawl URL: %s: %s", url, e)
+                    rules = None
+                    yield BatchResult(index, url, None, None, e)
+
+                queue = waiting.get(site)
+                if not queue:
+                    continue
+                if rules is not None:
+                    del waiting[site]
+                    for next_index, next_url in queue:
+                        pending[executor.submit(crawl_url, next_url, rules, url)] = (
+                            next_index,
+                            next_url,
+                            None,
+                        )
+                else:
+                    next_index, next_url = queue.popleft()
+                    pending[executor.submit(crawl_url, next_url, None, None)] = (
+                        next_index,
+                        next_url,
+                        site,
+                    )
+
+
+def _collect(results: Iterator[BatchResult], size: int) -> List[Any]:
+    data = [None] * size
+    for result in results:
+        if result.error is not None:
+            raise result.error
+        data[result.index] = result.data
+    return data
+
+
+def iter_lists(
+    urls: List[str],
+    fields: List[str] | dict = None,
+    get_html=None,
+    as_dataframe: bool = False,
+    rules: dict | str = None,
+    max_workers: int = 8,
+    per_host_concurrency: int = 2,
+    per_host_delay: float = 0.0,
+    share_rules: bool = True,
+    per_host_rate: float = None,
+    max_concurrency: int = None,
+    respect_robots: bool = False,
+    **kwargs,
+) -> Iterator[BatchResult]:
+    """
+    Crawls many list pages concurrently and yields the result of each URL as soon as it finishes.
+
+    Args:
+        urls (List[str]): The URLs to be crawled.
+        fields (List[str] | dict): A list of fields to be extracted from each list element.
+        get_html (function): A function to fetch the HTML content of a webpage.
+        as_dataframe (bool): Whether to return the data of each URL as a DataFrame. Defaults to False.
+        rules (dict | str): Rules, or the path of a JSON file containing them, used for all URLs. If given, the rules
+            API is not called.
+        max_workers (int): The maximum number of URLs crawled at the same time. Defaults to 8.
+        per_host_concurrency (int): The maximum number of concurrent page fetches per host. Defaults to 2.
+        per_host_delay (float): The minimum number of seconds between two page fetches from the same host.
+        share_rules (bool): Whether to fetch rules for the first URL of each site only and reuse them for the other
+            URLs of the same site. Defaults to True.
+        per_host_rate (float): The maximum number of page fetches per second per host. Defaults to no limit.
+        max_concurrency (int): The maximum number of concurrent page fetches over all hosts. Defaults to no limit.
+        respect_robots (bool): Whether to skip URLs disallowed by robots.txt and honor its Crawl-delay.
+        **kwargs: Other arguments passed to ListSpider, e.g. concurrency, max_pages, parser or stats, a CrawlStats
+            shared by all URLs.
+
+    Returns:
+        Iterator[BatchResult]: The results, in the order in which the URLs finish.
+    """
+    scheduler = HostScheduler(
+        per_host_concurrency=per_host_concurrency,
+        max_concurrency=max_concurrency,
+        per_host_rate=per_host_rate,
+        per_host_delay=per_host_delay,
+        respect_robots=respect_robots,
+    )
+    rules = load_rules(rules) if rules is not None else None
+
+    def crawl_url(url: str, site_rules: Optional[dict], rules_url: Optional[str]):
+        spider = ListSpider(
+            url=url,
+            fields=_get_fields(fields),
+            get_html=get_html,
+            rules=rules,
+            scheduler=scheduler,
+            **kwargs,
+        )
+        if site_rules is not None:
+            # fetched again for this URL if they look out of date for it
+            spider.reuse_rules(site_rules, rules_url)
+        spider.crawl()
+        if as_dataframe:
+            with spider.stats.time("dataframe"):
+                data = spider.data.to_dataframe()
+        else:
+            data = spider.data.to_list()
+        return data, spider.rules
+
+    return _iter_batch(urls, crawl_url, max_workers, share_rules and rules is None)
+
+
+def read_lists(
+    urls: List[str],
+    fields: List[str] | dict = None,
+    get_html=None,
+    as_dataframe: bool = True,
+    **kwargs,
+) -> List[DataFrame | List[dict]]:
+    """
+    Reads many list pages concurrently. See iter_lists for the arguments.
+
+    Returns:
+        List[DataFrame | List[dict]]: The data of each URL, in the order of the URLs.
+    """
+    urls = list(urls)
+    results = iter_lists(
+        urls, fields=fields, get_html=get_html, as_dataframe=as_dataframe, **kwargs
+    )
+    return _collect(results, len(urls))
+
+
+def iter_articles(
+    urls: List[str],
+    get_html=None,
+    rules: dict | str = None,
+    max_workers: int = 8,
+    per_host_concurrency: int = 2,
+    per_host_delay: float = 0.0,
+    share_rules: bool = True,
+    per_host_rate: float = None,
+    max_concurrency: int = None,
+    respect_robots: bool = False,
+    **kwargs,
+) -> Iterator[BatchResult]:
+    """
+    Crawls many articles concurrently and yields the result of each URL as soon as it finishes.
+
+    Args:
+        urls (List[str]): The URLs of the articles.
+        get_html (function): A function to fetch the HTML content of a webpage.
+        rules (dict | str): Article rules, or the path of a JSON file containing them, used for all URLs. If given,
+            the rules API is not called.
+        max_workers (int): The maximum number of articles crawled at the same time. Defaults to 8.
+        per_host_concurrency (int): The maximum number of concurrent page fetches per host. Defaults to 2.
+        per_host_delay (float): The minimum number of seconds between two page fetches from the same host.
+        share_rules (bool): Whether to fetch rules for the first article of each site only and reuse them for the
+            other articles of the same site. Defaults to True.
+        per_host_rate (float): The maximum number of page fetches per second per host. Defaults to no limit.
+        max_concurrency (int): The maximum number of concurrent page fetches over all hosts. Defaults to no limit.
+        respect_robots (bool): Whether to skip URLs disallowed by robots.txt and honor its Crawl-delay.
+        **kwargs: Other arguments passed to ArticleSpider, e.g. use_cache, parser or stats, a CrawlStats shared by all
+            URLs.
+
+    Returns:
+        Iterator[BatchResult]: The results, in the order in which the URLs finish.
+    """
+    scheduler = HostScheduler(
+        per_host_concurrency=per_host_concurrency,
+        max_concurrency=max_concurrency,
+        per_host_rate=per_host_rate,
+        per_host_delay=per_host_delay,
+        respect_robots=respect_robots,
+    )
+    rules = load_rules(rules) if rules is not None else None
+
+    def crawl_url(url: str, site_rules: Optional[dict], rules_url: Optional[str]):
+        spider = ArticleSpider(
+            url,
+            get_html=get_html,
+            rules=rules,
+            scheduler=scheduler,
+            **kwargs,
+        )
+        if site_rules is not None:
+            spider.reuse_rules(site_rules, rules_url)
+        spider.crawl()
+        return spider.data, spider.rules
+
+    return _iter_batch(urls, crawl_url, max_workers, share_rules and rules is None)
+
+
+def read_articles(urls: List[str], get_html=None, **kwargs) -> List[dict]:
+    """
+    Reads many articles concurrently, fetching rules once per site. See iter_articles for the arguments.
+
+    Returns:
+        List[dict]: The data of each article, in the order of the URLs.
+    """
+    urls = list(urls)
+    return _collect(iter_articles(urls, get_html=get_html, **kwargs), len(urls))
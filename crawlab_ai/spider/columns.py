@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+# values of a column are interned until it has this many distinct values and more than INTERN_MAX_RATIO of its
+# values are distinct, at which point repeated values are too rare for interning to pay off
+INTERN_MIN_VALUES = 1000
+INTERN_MAX_RATIO = 0.5
+
+# marks the fields missing from a row, which are left out of the row rather than set to None
+_MISSING = object()
+
+
+class ColumnarRows(Sequence):
+    """
+    The rows of a list crawl stored column by column, with one list of values per field instead of one dict per row.
+
+    Field names are stored once rather than in every row, and repeated string values (e.g. authors, categories or
+    tags) are interned so that each distinct value is stored once per column. The rows can be converted to a
+    DataFrame or an Arrow table without building a list of dicts first. They also behave as a read-only sequence of
+    dicts, built on access, so that code written for a list of rows keeps working.
+
+    Attributes:
+        field_names (List[str]): The names of the fields, in column order. Fields found in rows but not given upfront
+            are appended in the order they are found.
+    """
+
+    def __init__(self, field_names: Iterable[str] = None):
+        self.field_names: List[str] = []
+        self._columns: Dict[str, list] = {}
+        self._pools: Dict[str, Optional[dict]] = {}
+        self._length = 0
+        for name in field_names or ():
+            self._add_column(name)
+
+    def _add_column(self, name: str):
+        self.field_names.append(name)
+        self._columns[name] = [_MISSING] * self._length
+        self._pools[name] = {}
+
+    def append(self, row: dict):
+        self.extend((row,))
+
+    def extend(self, rows: Iterable[dict]):
+        columns = self._columns
+        count = 0
+        for row in rows:
+            for name in row:
+                if name not in columns:
+                    self._add_column(name)
+            for name, values in columns.items():
+                value = row.get(name, _MISSING)
+                if value.__class__ is str:
+                    pool = self._pools[name]
+                    if pool is not None:
+                        value = pool.setdefault(value, value)
+                values.append(value)
+            self._length += 1
+            count += 1
+        if count:
+            self._check_pools()
+
+    def _check_pools(self):
+        for name, pool in self._pools.items():
+            if (
+                pool is not None
+                and len(pool) >= INTERN_MIN_VALUES
+                and len(pool) > INTERN_MAX_RATIO * self._length
+            ):
+                # mostly distinct values, e.g. titles or URLs
+                self._pools[name] = None
+
+    def get_column(self, name: str) -> list:
+        """
+        Returns the values of a field, with None for the rows missing the field.
+        """
+        return [None if value is _MISSING else value for value in self._columns[name]]
+
+    def is_categorical(self, name: str) -> bool:
+        """
+        Returns whether the values of a field repeat enough to be stored as categories.
+        """
+        return self._pools[name] is not None and len(self._pools[name]) > 0
+
+    def to_list(self) -> List[dict]:
+        return list(self)
+
+    def to_dataframe(self, categorical: bool = False) -> DataFrame:
+        """
+        Returns the rows as a DataFrame.
+
+        Args:
+            categorical (bool): Whether to store the fields whose values repeat as pandas categoricals, which take
+                less memory. Defaults to False.
+        """
+        from pandas import Categorical, DataFrame
+
+        data = {}
+        for name in self.field_names:
+            values = self.get_column(name)
+            if categorical and self.is_categorical(name):
+                values = Categorical(values)
+            data[name] = values
+        return DataFrame(data, columns=self.field_names)
+
+    def to_arrow(self, categorical: bool = False):
+        """
+        Returns the rows as an Arrow table.
+
+        Args:
+            categorical (bool): Whether to dictionary-encode the fields whose values repeat. Defaults to False.
+        """
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError(
+                "pyarrow is required to build Arrow tables. Install it with: pip install pyarrow"
+            )
+        arrays = []
+        for name in self.field_names:
+            array = pyarrow.array(self.get_column(name))
+            if categorical and self.is_categorical(name):
+                array = array.dictionary_encode()
+            arrays.append(array)
+        return pyarrow.Table.from_arrays(arrays, names=self.field_names)
+
+    def _get_row(self, index: int) -> dict:
+        row = {}
+        for name, values in self._columns.items():
+            value = values[index]
+            if value is not _MISSING:
+                row[name] = value
+        return row
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get_row(i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("row index out of range")
+        return self._get_row(index)
+
+    def __iter__(self) -> Iterator[dict]:
+        names = self.field_names
+        if not names:
+            # rows extracted without fields
+            yield from ({} for _ in range(self._length))
+            return
+        for values in zip(*(self._columns[name] for name in names)):
+            yield {
+                name: value
+                for name, value in zip(names, values)
+                if value is not _MISSING
+            }
+
+    def __len__(self):
+        return self._length
+
+    def __eq__(self, other):
+        if isinstance(other, (ColumnarRows, list, tuple)):
+            return len(self) == len(other) and all(
+                row == other_row for row, other_row in zip(self, other)
+            )
+        return NotImplemented
+
+    def __repr__(self):
+        return "ColumnarRows(%d rows, fields=%r)" % (self._length, self.field_names)
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from crawlab_ai.spider.article_spider import ArticleSpider
+from crawlab_ai.spider.list_spider import ListSpider, _get_fields
+from crawlab_ai.utils.frontier import (
+    DEFAULT_LEASE_TIMEOUT,
+    DEFAULT_MAX_ATTEMPTS,
+    Frontier,
+    Task,
+)
+from crawlab_ai.utils.logger import logger
+from crawlab_ai.utils.metrics import CrawlStats
+from crawlab_ai.utils.rules import load_rules
+from crawlab_ai.utils.rules_cache import get_cache_key
+
+# the spiders of the lists whose last page was crawled by another worker are evicted past this number
+_MAX_LIST_SPIDERS = 256
+
+
+class DistributedWorker(object):
+    """
+    A worker of a crawl distributed over several processes or hosts, which share its frontier.
+
+    Workers pull pages from the frontier, extract them, and push the next page of each list back, so that the pages
+    of many lists are spread over all workers. URLs are deduplicated by the frontier, so that pages are fetched once
+    whichever worker finds them, and seeding the same URLs from every worker is harmless. The rules of each site are
+    shared through the frontier too: the first worker to need them locks them and fetches them once, while the others
+    wait for them, as in batch crawls.
+
+    A task leased by a worker that dies is crawled again by another worker once its lease expires, so that items may
+    be output twice but are not lost. A task whose crawl fails is pushed back to the end of the frontier, until it has
+    failed max_attempts times.
+
+    Attributes:
+        frontier (Frontier): The frontier shared by the workers, e.g. a RedisFrontier.
+        fields (List[str] | dict): The fields to extract from list items.
+        get_html (function): A function to fetch the HTML content of a webpage. Defaults to the HTTP client.
+        rules (dict | str): Rules used for all pages, as a dict or the path of a JSON file. If given, the rules API is
+            not called.
+        max_pages (int): The maximum number of pages crawled per list. Defaults to no limit.
+        concurrency (int): The number of pages crawled at the same time by this worker. Defaults to 4.
+        lease_timeout (float): The number of seconds after which a task not done is handed to another worker.
+        poll_interval (float): The number of seconds to wait before polling the frontier again when it has no pending
+            task but other workers are still crawling, or when the rules of a site are being fetched.
+        rules_lock_timeout (float): The maximum number of seconds other workers wait for the rules of a site fetched
+            by a worker, before fetching them themselves.
+        max_attempts (int): The number of times a page is attempted before it is given up. Defaults to 3.
+        on_items (Callable[[Task, List[dict]], None]): Called with each crawled task and its items, from the threads
+            of the worker.
+        stats (CrawlStats): The timings and counters of the crawls of this worker.
+        kwargs (dict): Other arguments of the spiders, e.g. use_cache, parser, scheduler or fetcher.
+    """
+
+    def __init__(
+        self,
+        frontier: Frontier,
+        fields: List[str] | dict = None,
+        get_html=None,
+        rules: dict | str = None,
+        max_pages: int = None,
+        concurrency: int = 4,
+        lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+        poll_interval: float = 1.0,
+        rules_lock_timeout: float = 60.0,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        on_items: Callable[[Task, List[dict]], None] = None,
+        stats: CrawlStats = None,
+        **kwargs,
+    ):
+        self.frontier = frontier
+        self.fields = _get_fields(fields)
+        self.get_html = get_html
+        self.rules = load_rules(rules) if rules is not None else None
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+        self.rules_lock_timeout = rules_lock_timeout
+        self.max_attempts = max_attempts
+        self.on_items = on_items
+        self.stats = stats or CrawlStats()
+        self.kwargs = kwargs
+        self._lock = threading.Lock()
+        self._site_rules: Dict[str, dict] = {}
+        self._list_spiders: OrderedDict[str, ListSpider] = OrderedDict()
+        self._stopped = threading.Event()
+
+    def seed(self, urls: Iterable[str], kind: str = "list") -> int:
+        """
+        Pushes the start URLs of the crawl to the frontier, and returns the number of URLs not pushed before.
+        """
+        return self.frontier.push(Task(kind, url, url) for url in urls)
+
+    def run(self):
+        """
+        Crawls pages from the frontier until the crawl is over, i.e. until no task is pending or leased by any worker,
+        or until stop is called.
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [executor.submit(self._work) for _ in range(self.concurrency)]
+            for future in futures:
+                future.result()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _work(self):
+        while not self._stopped.is_set():
+            task = self.frontier.pop(self.lease_timeout)
+            if task is None:
+                if self.frontier.is_finished():
+                    return
+                # other workers may still push pages
+                self._stopped.wait(self.poll_interval)
+                continue
+            try:
+                rows = self.process(task)
+                if self.on_items is not None:
+                    self.on_items(task, rows)
+            except Exception as e:
+                self._fail(task, e)
+            else:
+                self.frontier.done(task)
+
+    def _fail(self, task: Task, e: Exception):
+        if task.attempts + 1 < self.max_attempts:
+            logger.warning(
+                "Failed to crawl URL: %s: %s, retrying it later", task.url, e
+            )
+            self.stats.incr("retried_tasks")
+            self.frontier.requeue(task)
+            return
+        logger.error(
+            "Failed to crawl URL: %s after %s attempts: %s",
+            task.url,
+            self.max_attempts,
+            e,
+        )
+        self.stats.incr("failed_tasks")
+        if task.kind == "list":
+            self._end_list(task)
+        self.frontier.done(task)
+
+    def process(self, task: Task) -> List[dict]:
+        """
+        Crawls the page of a task and returns its items, pushing the next page of a list to the frontier.
+        """
+        rules = self.get_rules(task)
+        if task.kind == "article":
+            spider = ArticleSpider(
+                task.url,
+                get_html=self.get_html,
+                rules=self.rules,
+                stats=self.stats,
+                **self.kwargs,
+            )
+            self._use_rules(spider, task, rules)
+            spider.crawl()
+            return [spider.data]
+
+        rows, next_page_url = self._get_list_spider(task, rules).crawl_page(task.url)
+        if next_page_url and (
+            self.max_pages is None or task.index + 1 < self.max_pages
+        ):
+            # pushed before the items are output, so that other workers can start on it
+            self.frontier.push(
+                [Task("list", next_page_url, task.source, task.index + 1)]
+            )
+        else:
+            self._end_list(task)
+        return rows
+
+    def _get_rules_key(self, task: Task) -> str:
+        # the rules of the first URL of each site apply to the other URLs of the site, as in batch crawls
+        return get_cache_key(task.kind, _get_site_url(task.source), self.fields)
+
+    def get_rules(self, task: Task) -> dict:
+        """
+        Returns the rules of the site of a task, from the frontier or else from the rules API.
+        """
+        if self.rules is not None:
+            return self.rules
+        key = self._get_rules_key(task)
+        rules = self._site_rules.get(key)
+        while rules is None:
+            rules = self.frontier.get_rules(key)
+            if rules is not None:
+                break
+            if self.frontier.lock_rules(key, self.rules_lock_timeout):
+                try:
+                    rules = self._fetch_rules(task)
+                    self.frontier.set_rules(key, rules)
+                finally:
+                    self.frontier.unlock_rules(key)
+                break
+            logger.info("Waiting for the rules of URL: %s", task.source)
+            self._stopped.wait(self.poll_interval)
+        self._site_rules[key] = rules
+        return rules
+
+    def _fetch_rules(self, task: Task) -> dict:
+        if task.kind == "article":
+            spider = ArticleSpider(task.source, stats=self.stats, **self.kwargs)
+        else:
+            spider = ListSpider(
+                task.source, fields=self.fields, stats=self.stats, **self.kwargs
+            )
+        spider.fetch_rules()
+        return spider.rules
+
+    def _get_list_spider(self, task: Task, rules: dict) -> ListSpider:
+        # one spider per list, whose rules are compiled once and whose pages are loaded from any thread
+        with self._lock:
+            spider = self._list_spiders.get(task.source)
+            if spider is not None:
+                self._list_spiders.move_to_end(task.source)
+            else:
+                spider = self._list_spiders[task.source] = ListSpider(
+                    task.source,
+                    fields=self.fields,
+                    get_html=self.get_html,
+                    rules=self.rules,
+                    stats=self.stats,
+                    **self.kwargs,
+                )
+                self._use_rules(spider, task, rules)
+                spider.compile_rules()
+                while len(self._list_spiders) > _MAX_LIST_SPIDERS:
+                    self._list_spiders.popitem(last=False)
+            return spider
+
+    def _end_list(self, task: Task):
+        # the spider of a list is dropped with its last page, so that a long running worker does not keep all of them
+        with self._lock:
+            self._list_spiders.pop(task.source, None)
+
+    def _use_rules(self, spider: ArticleSpider | ListSpider, task: Task, rules: dict):
+        spider.rules = rules
+        # rules given to the worker are applied as is, while the shared rules of a site can be fetched again
+        if self.rules is None:
+            spider.reuse_rules(rules, _get_site_url(task.source))
+
+
+def _get_site_url(url: str) -> str:
+    parts = urlsplit(url)
+    return parts.scheme + "://" + parts.netloc + "/"
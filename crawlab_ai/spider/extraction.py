@@ -0,0 +1,424 @@
+import atexit
+import os
+import threading
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional
+
+PARSER_LXML = "lxml"
+PARSER_SELECTOLAX = "selectolax"
+PARSER_HTML = "html.parser"
+PARSERS = [PARSER_LXML, PARSER_SELECTOLAX, PARSER_HTML]
+
+
+class _SoupBackend(object):
+    """
+    BeautifulSoup with the built-in html.parser. Slowest, but has no dependencies beyond bs4.
+    """
+
+    name = PARSER_HTML
+
+    def __init__(self):
+        import soupsieve
+        from bs4 import BeautifulSoup
+
+        self._soupsieve = soupsieve
+        self._soup = BeautifulSoup
+
+    def parse(self, html: str) -> Any:
+        return self._soup(html, "html.parser")
+
+    def compile(self, selector: str, first: bool = False) -> Any:
+        return self._soupsieve.compile(selector)
+
+    @staticmethod
+    def select(node, compiled) -> List[Any]:
+        return compiled.select(node)
+
+    @staticmethod
+    def select_one(node, compiled) -> Any:
+        return compiled.select_one(node)
+
+    @staticmethod
+    def text(node) -> str:
+        return node.text
+
+    @staticmethod
+    def text_lines(node) -> str:
+        return node.get_text("\n", strip=True)
+
+    @staticmethod
+    def attr(node, name: str) -> Optional[str]:
+        value = node.get(name)
+        if isinstance(value, list):
+            # multi-valued attributes such as class are returned as lists by bs4
+            return " ".join(value)
+        return value
+
+
+class _LxmlBackend(object):
+    """
+    lxml with CSS selectors translated to XPath expressions once and compiled.
+    """
+
+    name = PARSER_LXML
+
+    def __init__(self):
+        from lxml import etree, html
+        from cssselect import HTMLTranslator
+
+        self._etree = etree
+        self._html = html
+        self._parser = html.HTMLParser(encoding="utf-8")
+        self._translator = HTMLTranslator()
+
+    def parse(self, html: str) -> Any:
+        if isinstance(html, str):
+            html = html.encode("utf-8")
+        try:
+            return self._html.document_fromstring(html, parser=self._parser)
+        except self._etree.ParserError:
+            # the document is empty
+            return self._html.document_fromstring(b"<html></html>")
+
+    def compile(self, selector: str, first: bool = False) -> Any:
+        # only match descendants of the context node, like BeautifulSoup's select does
+        path = self._translator.css_to_xpath(selector, prefix="descendant::")
+        if first:
+            path = "(" + path + ")[1]"
+        return self._etree.XPath(path)
+
+    @staticmethod
+    def select(node, compiled) -> List[Any]:
+        return compiled(node)
+
+    @staticmethod
+    def select_one(node, compiled) -> Any:
+        elements = compiled(node)
+        return elements[0] if elements else None
+
+    @staticmethod
+    def text(node) -> str:
+        return node.text_content()
+
+    @staticmethod
+    def text_lines(node) -> str:
+        return "\n".join(t.strip() for t in node.itertext() if t.strip())
+
+    @staticmethod
+    def attr(node, name: str) -> Optional[str]:
+        return node.get(name)
+
+
+class _SelectolaxBackend(object):
+    """
+    selectolax (Lexbor). Selectors are passed as strings since selectolax does not expose compiled selectors.
+    """
+
+    name = PARSER_SELECTOLAX
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self._parser = LexborHTMLParser
+
+    def parse(self, html: str) -> Any:
+        return self._parser(html)
+
+    def compile(self, selector: str, first: bool = False) -> Any:
+        return selector
+
+    @staticmethod
+    def select(node, compiled) -> List[Any]:
+        return node.css(compiled)
+
+    @staticmethod
+    def select_one(node, compiled) -> Any:
+        return node.css_first(compiled)
+
+    @staticmethod
+    def text(node) -> str:
+        return node.text(deep=True)
+
+    @staticmethod
+    def text_lines(node) -> str:
+        return node.text(deep=True, separator="\n", strip=True)
+
+    @staticmethod
+    def attr(node, name: str) -> Optional[str]:
+        return node.attributes.get(name)
+
+
+_BACKEND_CLASSES = {
+    PARSER_LXML: _LxmlBackend,
+    PARSER_SELECTOLAX: _SelectolaxBackend,
+    PARSER_HTML: _SoupBackend,
+}
+
+_backends = {}
+
+
+def get_backend(parser: str = None):
+    """
+    Returns the parser backend with the given name. If no name is given, the fastest installed backend among lxml
+    and html.parser is returned.
+
+    Args:
+        parser (str): "lxml", "selectolax" or "html.parser".
+    """
+    if parser is None:
+        for name in (PARSER_LXML, PARSER_HTML):
+            try:
+                return get_backend(name)
+            except ImportError:
+                continue
+    if parser not in _BACKEND_CLASSES:
+        raise ValueError(
+            "Unknown parser: %s. Available parsers: %s" % (parser, ", ".join(PARSERS))
+        )
+    if parser not in _backends:
+        _backends[parser] = _BACKEND_CLASSES[parser]()
+    return _backends[parser]
+
+
+class ExtractionPlan(object):
+    """
+    Extraction rules of a list page compiled for a parser backend.
+
+    The CSS selectors are compiled and the field accessors are resolved once, so that extracting the items of a page
+    only runs the compiled selectors.
+
+    Attributes:
+        rules (dict): The list rules, as returned by the rules API.
+        backend: The parser backend the rules are compiled for.
+    """
+
+    def __init__(self, rules: dict, parser: str = None):
+        self.rules = rules
+        self.backend = get_backend(parser)
+        compile_ = self.backend.compile
+        list_model = rules["list_model"]
+        self._list_selector = compile_(list_model["list_element_css_selector"])
+        self._fields = [
+            (
+                field["name"],
+                compile_(field["element_css_selector"], first=True),
+                field["type"] == "text",
+                field.get("attribute"),
+            )
+            for field in list_model["fields"]
+        ]
+        next_page_element_css_selector = rules.get("next_page_element_css_selector")
+        self._next_page_selector = (
+            compile_(next_page_element_css_selector, first=True)
+            if next_page_element_css_selector
+            else None
+        )
+        self._anchor_selector = compile_("a[href]", first=True)
+
+    @property
+    def field_names(self) -> List[str]:
+        return [name for name, _, _, _ in self._fields]
+
+    def parse(self, html: str) -> Any:
+        return self.backend.parse(html)
+
+    def extract_rows(self, document) -> List[dict]:
+        backend = self.backend
+        select_one = backend.select_one
+        text = backend.text
+        attr = backend.attr
+        fields = self._fields
+        rows = []
+        for item in backend.select(document, self._list_selector):
+            row = {}
+            for name, selector, is_text, attribute in fields:
+                field_element = select_one(item, selector)
+                if field_element is None:
+                    continue
+                if is_text:
+                    row[name] = text(field_element).strip()
+                else:
+                    row[name] = attr(field_element, attribute)
+            rows.append(row)
+        return rows
+
+    def get_next_page_href(self, document) -> Optional[str]:
+        if self._next_page_selector is None:
+            return None
+        backend = self.backend
+        next_page_element = backend.select_one(document, self._next_page_selector)
+        if next_page_element is None:
+            return None
+        next_page_href = backend.attr(next_page_element, "href")
+        if not next_page_href:
+            anchor = backend.select_one(next_page_element, self._anchor_selector)
+            next_page_href = (
+                backend.attr(anchor, "href") if anchor is not None else None
+            )
+        return next_page_href or None
+
+
+ARTICLE_FIELDS = ["title", "author", "publish_date", "content"]
+
+
+class ArticleExtractionPlan(object):
+    """
+    Extraction rules of an article page compiled for a parser backend.
+
+    The same rules can be applied to any article of the site they were generated for.
+
+    Attributes:
+        rules (dict): The article rules, as returned by the rules API.
+        backend: The parser backend the rules are compiled for.
+    """
+
+    def __init__(self, rules: dict, parser: str = None):
+        self.rules = rules
+        self.backend = get_backend(parser)
+        self._fields = []
+        for name in ARTICLE_FIELDS:
+            selector = rules.get(name + "_css_selector")
+            if selector:
+                self._fields.append(
+                    (name, self.backend.compile(selector, first=name != "content"))
+                )
+
+    @property
+    def field_names(self) -> List[str]:
+        return list(ARTICLE_FIELDS)
+
+    def parse(self, html: str) -> Any:
+        return self.backend.parse(html)
+
+    def extract(self, document) -> dict:
+        backend = self.backend
+        data = dict.fromkeys(ARTICLE_FIELDS)
+        for name, selector in self._fields:
+            if name == "content":
+                # the content may be split over several elements, e.g. one per paragraph
+                lines = [
+                    backend.text_lines(element)
+                    for element in backend.select(document, selector)
+                ]
+                data[name] = "\n".join(line for line in lines if line) or None
+            else:
+                element = backend.select_one(document, selector)
+                if element is not None:
+                    data[name] = backend.text(element).strip() or None
+        return data
+
+
+_worker_plan: ExtractionPlan | ArticleExtractionPlan | None = None
+_worker_plans = {}
+_MAX_WORKER_PLANS = 16
+_parse_pools = {}
+_parse_pools_lock = threading.Lock()
+
+
+def _init_worker(rules: dict, parser: Optional[str], type_: str):
+    global _worker_plan
+    if type_ == "article":
+        _worker_plan = ArticleExtractionPlan(rules, parser)
+    else:
+        _worker_plan = ExtractionPlan(rules, parser)
+
+
+def _extract_file(path: str) -> tuple[str, List[dict]]:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        html = f.read()
+    document = _worker_plan.parse(html)
+    if isinstance(_worker_plan, ArticleExtractionPlan):
+        return path, [_worker_plan.extract(document)]
+    return path, _worker_plan.extract_rows(document)
+
+
+def extract_files(
+    paths: Iterable[str],
+    rules: dict,
+    parser: str = None,
+    max_workers: int = None,
+    chunksize: int = 16,
+    type_: str = "list",
+) -> Iterator[tuple[str, List[dict]]]:
+    """
+    Applies list or article rules to saved HTML files in a pool of processes, without any network access.
+
+    Each worker process compiles the rules once. Files are submitted in bounded batches so that memory stays flat
+    for any number of files.
+
+    Args:
+        paths (Iterable[str]): Paths of the HTML files.
+        rules (dict): The list or article rules.
+        parser (str): The HTML parser backend.
+        max_workers (int): The number of worker processes. Defaults to the number of CPUs.
+        chunksize (int): The number of files sent to a worker at a time.
+        type_ (str): "list" or "article".
+
+    Returns:
+        Iterator[tuple[str, List[dict]]]: The path and the extracted rows of each file, in input order. Article files
+        yield a single row.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(rules, parser, type_),
+    ) as executor:
+        batch_size = max_workers * chunksize * 4
+        paths = iter(paths)
+        while True:
+            batch = list(islice(paths, batch_size))
+            if not batch:
+                break
+            yield from executor.map(_extract_file, batch, chunksize=chunksize)
+
+
+def _extract_page(
+    key: str, rules: dict, parser: Optional[str], html: str
+) -> tuple[List[dict], Optional[str]]:
+    """
+    Parses a list page in a worker process and returns its rows and next-page href. The rules are compiled once per
+    worker and key.
+    """
+    plan = _worker_plans.get(key)
+    if plan is None:
+        if len(_worker_plans) >= _MAX_WORKER_PLANS:
+            _worker_plans.clear()
+        plan = _worker_plans[key] = ExtractionPlan(rules, parser)
+    document = plan.parse(html)
+    return plan.extract_rows(document), plan.get_next_page_href(document)
+
+
+def get_parse_pool(max_workers: int):
+    """
+    Returns the shared pool of processes that parse and extract list pages, creating it on first use. Pools are
+    kept per number of workers and shared by all spiders of the process.
+
+    Args:
+        max_workers (int): The number of worker processes.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _parse_pools_lock:
+        pool = _parse_pools.get(max_workers)
+        if pool is None:
+            if not _parse_pools:
+                atexit.register(shutdown_parse_pools)
+            pool = _parse_pools[max_workers] = ProcessPoolExecutor(
+                max_workers=max_workers
+            )
+        return pool
+
+
+def shutdown_parse_pools():
+    """
+    Shuts down the shared parse pools. They are shut down when the interpreter exits, or can be shut down earlier to
+    free their processes.
+    """
+    with _parse_pools_lock:
+        pools = list(_parse_pools.values())
+        _parse_pools.clear()
+    for pool in pools:
+        pool.shutdown()
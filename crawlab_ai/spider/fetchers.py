@@ -0,0 +1,245 @@
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from typing import Iterable, Optional
+
+from crawlab_ai.utils.logger import logger
+
+# the HTTP clients are imported on first use, so that the CLI can list the fetchers without loading them
+
+FETCHER_HTTP = "http"
+FETCHER_BROWSER = "browser"
+FETCHERS = [FETCHER_HTTP, FETCHER_BROWSER]
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_BLOCKED_RESOURCE_TYPES = ("image", "font", "media")
+
+
+class Fetcher(ABC):
+    """
+    Fetches the HTML of pages for spiders, in place of a get_html function.
+
+    Fetchers are shared by spiders and called from several threads at once. Spiders pass the CSS selector of the
+    elements they extract once their rules are known, so that fetchers rendering pages can wait for these elements.
+    """
+
+    @abstractmethod
+    def fetch(self, url: str, wait_for: str = None) -> str: ...
+
+    async def afetch(self, url: str, wait_for: str = None) -> str:
+        return await asyncio.to_thread(self.fetch, url, wait_for)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class HttpFetcher(Fetcher):
+    """
+    Fetches pages with the shared pooled HTTP clients, without rendering them.
+
+    Attributes:
+        kwargs (dict): Other arguments of the requests, e.g. headers or timeout.
+    """
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    def fetch(self, url: str, wait_for: str = None) -> str:
+        from crawlab_ai.utils.http import http_get
+
+        return http_get(url, **self.kwargs).text
+
+    async def afetch(self, url: str, wait_for: str = None) -> str:
+        from crawlab_ai.utils.async_http import async_get_text
+
+        return await async_get_text(url, **self.kwargs)
+
+
+class BrowserFetcher(Fetcher):
+    """
+    Fetches pages rendered by a pooled headless Chromium browser, for sites whose lists are rendered with JavaScript.
+
+    The browser and a fixed number of contexts are started on first use and kept warm, each with a page that is
+    reused from one fetch to the next, and replaced after a failed fetch. A fetch waits for a free page, so at most
+    ``pool_size`` pages are rendered at the same time whatever the number of threads. Requests for images, fonts and
+    media are aborted. Once the rules of a spider are known, each fetch waits for the list elements to be attached
+    before returning the HTML, or for ``wait_timeout`` seconds at most.
+
+    Playwright drives the browser from an event loop of its own in a background thread, so that the fetcher can be
+    used from any thread and from async spiders alike. It requires the playwright package and its Chromium build:
+    ``pip install playwright && playwright install chromium``.
+
+    Attributes:
+        pool_size (int): The number of browser contexts, and of pages rendered at the same time. Defaults to 4.
+        blocked_resource_types (Iterable[str]): The Playwright resource types whose requests are aborted.
+        wait_timeout (float): The maximum number of seconds to wait for the awaited elements. Defaults to 10.
+        timeout (float): The maximum number of seconds to load a page. Defaults to the timeout of the HTTP client.
+        launch_options (dict): Other arguments passed to chromium.launch, e.g. executable_path or proxy.
+        context_options (dict): Other arguments passed to browser.new_context, e.g. user_agent or locale.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        blocked_resource_types: Iterable[str] = DEFAULT_BLOCKED_RESOURCE_TYPES,
+        wait_timeout: float = 10.0,
+        timeout: float = None,
+        launch_options: dict = None,
+        context_options: dict = None,
+    ):
+        try:
+            import playwright.async_api
+        except ImportError:
+            raise ImportError(
+                "playwright is required to render pages in a browser. Install it with: pip install playwright && "
+                "playwright install chromium"
+            )
+        from crawlab_ai.utils.http import get_http_setting
+
+        self._playwright_api = playwright.async_api
+        self.pool_size = pool_size
+        self.blocked_resource_types = set(blocked_resource_types or ())
+        self.wait_timeout = wait_timeout
+        self.timeout = timeout or get_http_setting("timeout")
+        self.launch_options = launch_options or {}
+        self.context_options = context_options or {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._playwright = None
+        self._browser = None
+        self._contexts = []
+        self._pages: Optional[asyncio.Queue] = None
+
+    def fetch(self, url: str, wait_for: str = None) -> str:
+        future = asyncio.run_coroutine_threadsafe(
+            self._fetch(url, wait_for), self._get_loop()
+        )
+        return future.result()
+
+    async def afetch(self, url: str, wait_for: str = None) -> str:
+        future = asyncio.run_coroutine_threadsafe(
+            self._fetch(url, wait_for), self._get_loop()
+        )
+        return await asyncio.wrap_future(future)
+
+    def close(self):
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="crawlab-ai-browser", daemon=True
+                )
+                thread.start()
+                try:
+                    asyncio.run_coroutine_threadsafe(self._start(), loop).result()
+                except BaseException:
+                    loop.call_soon_threadsafe(loop.stop)
+                    thread.join()
+                    loop.close()
+                    raise
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    async def _start(self):
+        logger.info("Starting a headless browser with %s pages", self.pool_size)
+        self._playwright = await self._playwright_api.async_playwright().start()
+        try:
+            self._browser = await self._playwright.chromium.launch(
+                headless=True, **self.launch_options
+            )
+            self._pages = asyncio.Queue()
+            for _ in range(self.pool_size):
+                context = await self._browser.new_context(**self.context_options)
+                if self.blocked_resource_types:
+                    await context.route("**/*", self._route)
+                self._contexts.append(context)
+                self._pages.put_nowait((context, await context.new_page()))
+        except BaseException:
+            await self._stop()
+            raise
+
+    async def _stop(self):
+        for context in self._contexts:
+            await context.close()
+        self._contexts = []
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _route(self, route):
+        if route.request.resource_type in self.blocked_resource_types:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _fetch(self, url: str, wait_for: str = None) -> str:
+        # each context of the pool comes with its page, or None if it must be opened again
+        context, page = await self._pages.get()
+        try:
+            if page is None:
+                page = await context.new_page()
+            await page.goto(
+                url, wait_until="domcontentloaded", timeout=self.timeout * 1000
+            )
+            if wait_for:
+                try:
+                    await page.wait_for_selector(
+                        wait_for, state="attached", timeout=self.wait_timeout * 1000
+                    )
+                except self._playwright_api.TimeoutError:
+                    logger.warning(
+                        "Elements %s not rendered after %ss for URL: %s",
+                        wait_for,
+                        self.wait_timeout,
+                        url,
+                    )
+            return await page.content()
+        except BaseException:
+            # a page left in an unknown state is closed, and replaced by a fresh one on the next fetch of its context
+            failed, page = page, None
+            if failed is not None:
+                try:
+                    await failed.close()
+                except Exception as e:
+                    logger.warning("Failed to close browser page: %s", e)
+            raise
+        finally:
+            self._pages.put_nowait((context, page))
+
+
+def get_fetcher(name: str, **kwargs) -> Fetcher:
+    """
+    Returns a new fetcher of the given type.
+
+    Args:
+        name (str): "http" or "browser".
+        **kwargs: Arguments of the fetcher, e.g. pool_size for a browser fetcher.
+    """
+    if name == FETCHER_HTTP:
+        return HttpFetcher(**kwargs)
+    if name == FETCHER_BROWSER:
+        return BrowserFetcher(**kwargs)
+    raise ValueError(
+        "Unknown fetcher: %s. Available fetchers: %s" % (name, ", ".join(FETCHERS))
+    )
@@ -0,0 +1,35 @@
+from typing import List, NamedTuple
+
+DEFAULT_DRIFT_THRESHOLD = 0.5
+
+
+class PageHealth(NamedTuple):
+    """
+    Extraction health metrics of a list page.
+
+    Attributes:
+        items (int): The number of list items matched.
+        fill_rate (float): The share of fields of the matched items that have a value, between 0 and 1.
+        next_page_found (bool): Whether the next-page selector matched a link.
+    """
+
+    items: int
+    fill_rate: float
+    next_page_found: bool
+
+    def is_drifted(self, threshold: float = DEFAULT_DRIFT_THRESHOLD) -> bool:
+        """
+        Returns whether the rules look out of date for the page: no item matched, or less than `threshold` of the
+        fields have a value.
+        """
+        return self.items == 0 or self.fill_rate < threshold
+
+
+def get_page_health(
+    rows: List[dict], field_names: List[str], next_page_found: bool
+) -> PageHealth:
+    cells = len(rows) * len(field_names)
+    filled = sum(
+        1 for row in rows for name in field_names if row.get(name) not in (None, "")
+    )
+    return PageHealth(len(rows), filled / cells if cells else 0.0, next_page_found)
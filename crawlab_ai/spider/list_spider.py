@@ -1,15 +1,53 @@
-from typing import List, Optional
+from __future__ import annotations
+
+import asyncio
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+)
 from urllib.parse import urljoin
 
-import requests
-from bs4 import BeautifulSoup
-from pandas import DataFrame
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-from crawlab_ai.spider.base import BaseSpider
+from crawlab_ai.spider.base import BaseSpider, get_extraction_key
+from crawlab_ai.spider.columns import ColumnarRows
+from crawlab_ai.spider.extraction import ExtractionPlan, _extract_page, get_parse_pool
+from crawlab_ai.spider.fetchers import Fetcher
+from crawlab_ai.spider.health import (
+    DEFAULT_DRIFT_THRESHOLD,
+    PageHealth,
+    get_page_health,
+)
+from crawlab_ai.utils.async_http import async_http_session, async_post_json
 from crawlab_ai.utils.auth import get_auth_headers
+from crawlab_ai.utils.checkpoint import (
+    Checkpoint,
+    CheckpointPage,
+    CheckpointStore,
+    get_checkpoint_store,
+)
 from crawlab_ai.utils.env import get_api_endpoint
+from crawlab_ai.utils.http import http_post
+from crawlab_ai.utils.http_cache import HttpCache
 from crawlab_ai.utils.logger import logger
+from crawlab_ai.utils.metrics import COUNT_BUCKETS, CrawlStats
+from crawlab_ai.utils.pagination import PageUrlTemplate, detect_page_url_template
+from crawlab_ai.utils.rules_cache import get_rules_cache
+from crawlab_ai.utils.seen_store import (
+    SeenStore,
+    get_item_fingerprint,
+    get_seen_store,
+    get_site,
+)
+from crawlab_ai.utils.throttle import HostScheduler
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
 
 
 class ListSpider(BaseSpider):
@@ -22,19 +60,111 @@ class ListSpider(BaseSpider):
     Attributes:
         url (str): The URL to be crawled.
         fields (List[dict]): A list of fields to be extracted from each list element.
-        data (List[dict]): A list to store the extracted data from each list element.
+        data (ColumnarRows): The items extracted from the list, stored column by column. It behaves as a sequence of
+            dicts, and converts to a DataFrame or an Arrow table without building a dict per item.
         get_html (function): A function to fetch the HTML content of a webpage. Defaults to the _get_html method.
+        use_cache (bool): Whether to read and write rules from the on-disk rules cache.
+        refresh_rules (bool): Whether to ignore cached rules and fetch them again from the API.
+        concurrency (int): The maximum number of pages fetched and extracted at the same time.
+        max_pages (int): The maximum number of pages to crawl. Defaults to no limit.
+        page_url_template (PageUrlTemplate): The URL template of the list pages, e.g. "https://example.com?page={n}".
+            If not given, it is detected from the first next-page link, and pages are otherwise followed one by one.
+        parser (str): The HTML parser backend, "lxml", "selectolax" or "html.parser". Defaults to lxml if installed.
+        plan (ExtractionPlan): The rules compiled for the parser backend.
+        rules (dict): The rules used for extraction. If given upfront, as a dict or the path of a JSON file, they are
+            applied locally without calling the rules API.
+        drift_threshold (float): The minimum fill rate of the fields on the first page. If fewer fields are filled, or
+            no item is matched, cached or reused rules are considered out of date: they are fetched again from the
+            rules API and the page is extracted again. None disables the check.
+        page_health (Dict[int, PageHealth]): The extraction health metrics of each crawled page, by page index.
+        scheduler (HostScheduler): The scheduler that fetches pages within the limits of their host, if any.
+        http_cache (HttpCache): The HTTP cache that revalidates pages fetched before, if any. The items of a page that
+            was not modified since are reused without parsing the page again.
+        incremental (bool): Whether to only return the items not seen by earlier crawls of the site, and to stop
+            following pages at the first page whose items were all seen.
+        key_fields (List[str]): The fields identifying an item in incremental mode. Defaults to its URL field if it
+            has one, else all its fields.
+        seen_store (SeenStore): The store of the items seen on each site, in incremental mode.
+        parse_workers (int): The number of processes that parse and extract the pages, so that parsing is not bound
+            to one core by the GIL. Pages are then only fetched in threads, and their HTML is sent to a shared process
+            pool. Defaults to parsing in the fetching threads.
+        stats (CrawlStats): The timings and counters of the crawl: rules API calls, page fetches, parsing, extraction,
+            bytes downloaded, items per page and cache hits. It can be shared by several spiders.
+        fetcher (Fetcher): The fetcher of the pages, e.g. a BrowserFetcher for lists rendered with JavaScript, which
+            waits for the list elements once the rules are known. Defaults to the HTTP client.
+        checkpoint (bool): Whether to record the rules and the completed pages of the crawl with their items, so
+            that the crawl can be resumed if it is interrupted. The checkpoint is deleted once the crawl completes.
+        resume (bool): Whether to resume the interrupted crawl of the same URL and fields from its checkpoint: the
+            recorded items are returned again and the crawl goes on from the page after the last recorded one,
+            without fetching the recorded pages or the rules again. Implies checkpoint. If there is no checkpoint,
+            the crawl starts from the first page.
+        checkpoint_store (CheckpointStore): The store of the checkpoints, when checkpointing.
 
     Methods:
         crawl(url: str): Starts the crawling process for the given URL.
     """
 
-    def __init__(self, url: str, fields: List[dict] = None, get_html=None):
-        super().__init__(url, get_html)
+    def __init__(
+        self,
+        url: str,
+        fields: List[dict] = None,
+        get_html=None,
+        use_cache: bool = True,
+        refresh_rules: bool = False,
+        concurrency: int = 5,
+        max_pages: int = None,
+        page_url_template: PageUrlTemplate | str = None,
+        parser: str = None,
+        rules: dict | str = None,
+        drift_threshold: Optional[float] = DEFAULT_DRIFT_THRESHOLD,
+        scheduler: HostScheduler = None,
+        http_cache: HttpCache | bool = None,
+        incremental: bool = False,
+        key_fields: List[str] = None,
+        seen_store: SeenStore = None,
+        parse_workers: int = None,
+        stats: CrawlStats = None,
+        fetcher: Fetcher = None,
+        checkpoint: bool = False,
+        resume: bool = False,
+        checkpoint_store: CheckpointStore = None,
+    ):
+        super().__init__(
+            url,
+            get_html,
+            use_cache,
+            refresh_rules,
+            rules,
+            scheduler,
+            http_cache,
+            stats,
+            fetcher,
+        )
         self.rules = None
         self.url = url
         self.fields = fields
-        self.data = []
+        self.data = ColumnarRows()
+        self.concurrency = concurrency
+        self.max_pages = max_pages
+        self.drift_threshold = drift_threshold
+        self.page_health: Dict[int, PageHealth] = {}
+        # whether the rules were fetched from the API during this crawl rather than loaded from the cache
+        self.rules_fetched = False
+        if isinstance(page_url_template, str):
+            page_url_template = PageUrlTemplate(page_url_template)
+        self.page_url_template = page_url_template
+        self.parser = parser
+        self.plan: ExtractionPlan | None = None
+        self._extraction_key: str | None = None
+        self.incremental = incremental
+        self.key_fields = key_fields
+        self.seen_store = seen_store or (get_seen_store() if incremental else None)
+        self.parse_workers = parse_workers
+        self.resume = resume
+        self.checkpoint = checkpoint or resume
+        self.checkpoint_store = checkpoint_store or (
+            get_checkpoint_store() if self.checkpoint else None
+        )
 
     @property
     def list_element_css_selector(self):
@@ -48,71 +178,614 @@ class ListSpider(BaseSpider):
     def next_page_element_css_selector(self):
         return self.rules["next_page_element_css_selector"]
 
+    def _get_wait_selector(self) -> str | None:
+        return self.list_element_css_selector if self.rules else None
+
     def fetch_rules(self):
-        logger.info("Fetching rules for URL: " + self.url)
-        res = requests.post(
-            url=get_api_endpoint() + "/rules/list",
-            headers=get_auth_headers(),
-            json={
-                "url": self.url,
-                "fields": self.fields,
-            },
-        )
+        if self._load_local_rules() or self._load_template_rules("list", self.fields):
+            return
+
+        logger.info("Fetching rules for URL: %s", self.url)
+        self.stats.incr("rules_api_calls")
+        with self.stats.time("rules_api"):
+            res = http_post(
+                get_api_endpoint() + "/rules/list",
+                headers=get_auth_headers(),
+                json=self._get_rules_payload(),
+            )
         res.raise_for_status()
+        self._set_rules(res.json())
 
-        data = res.json()
+    async def afetch_rules(self):
+        if self._load_local_rules() or await self._aload_template_rules(
+            "list", self.fields
+        ):
+            return
+
+        logger.info("Fetching rules for URL: %s", self.url)
+        self.stats.incr("rules_api_calls")
+        with self.stats.time("rules_api"):
+            data = await async_post_json(
+                get_api_endpoint() + "/rules/list",
+                headers=get_auth_headers(),
+                json=self._get_rules_payload(),
+            )
+        self._set_rules(data)
+
+    def _load_local_rules(self) -> bool:
+        if self.given_rules is not None:
+            self.rules = self.given_rules
+            self.rules_url = None
+            logger.info("Using given rules for URL: %s", self.url)
+            return True
+        if self._load_reused_rules():
+            return True
+        if self.use_cache and not self.refresh_rules:
+            rules = get_rules_cache().get("list", self.url, self.fields)
+            if rules is not None:
+                self.rules = rules
+                self.rules_url = self.url
+                self.stats.incr("rules_cache_hits")
+                logger.info("Rules loaded from cache for URL: %s", self.url)
+                return True
+            self.stats.incr("rules_cache_misses")
+        return False
+
+    def _get_rules_payload(self) -> dict:
+        return {
+            "url": self.url,
+            "fields": self.fields,
+        }
+
+    def _set_rules(self, data: dict):
         self.rules = data["model_list"][0]
-        logger.info("Rules fetched successfully for URL: " + self.url)
-        logger.info("List element CSS selector: " + self.list_element_css_selector)
-        logger.info("Fields: " + str(self.item_fields))
+        self.rules_url = self.url
+        self.rules_fetched = True
+        if self.use_cache:
+            get_rules_cache().set("list", self.url, self.fields, self.rules)
+        self._add_rules_template("list", self.fields)
+        logger.info("Rules fetched successfully for URL: %s", self.url)
+        logger.info("List element CSS selector: %s", self.list_element_css_selector)
+        logger.info("Fields: %s", self.item_fields)
         logger.info(
-            "Next page element CSS selector: "
-            + str(self.next_page_element_css_selector)
+            "Next page element CSS selector: %s", self.next_page_element_css_selector
+        )
+
+    def compile_rules(self):
+        self.plan = ExtractionPlan(self.rules, self.parser)
+        self._extraction_key = get_extraction_key(
+            "list", self.rules, self.plan.backend.name
         )
 
     def crawl(self):
-        self.fetch_rules()
-        futures = []
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            futures.append(executor.submit(self._fetch_data, self.url))
+        self.data = ColumnarRows()
+        for _, rows in self.iter_pages():
+            self._add_rows(rows)
+
+    async def acrawl(self):
+        self.data = ColumnarRows()
+        async for _, rows in self.aiter_pages():
+            self._add_rows(rows)
 
-            for future in as_completed(futures):
-                next_page_url = future.result()
-                while next_page_url:
-                    future = executor.submit(self._fetch_data, next_page_url)
-                    next_page_url = future.result()
+    def _add_rows(self, rows: List[dict]):
+        if not self.data.field_names:
+            # columns in the order of the fields of the rules, including fields never matched
+            self.data = ColumnarRows(self.plan.field_names)
+        self.data.extend(rows)
+
+    def crawl_page(self, url: str) -> tuple[List[dict], Optional[str]]:
+        """
+        Loads and extracts a single page of the list with the current rules, and returns its rows and the URL of its
+        next page, if any. Used by workers of distributed crawls, which crawl the pages of a list one at a time.
+        """
+        if self.plan is None:
+            self.compile_rules()
+        url, document, next_page_url = self._load_page(url)
+        return self._extract_rows(url, document, None, next_page_url), next_page_url
+
+    def iter_pages(self) -> Iterator[tuple[int, List[dict]]]:
+        """
+        Crawls the list and yields the index and the extracted rows of each page as soon as the page and all pages
+        before it are extracted, so that pages are yielded in order.
+        """
+        self._crawling = True
+        checkpoint = self._load_checkpoint()
+        if checkpoint is None:
+            self.fetch_rules()
+        self.compile_rules()
+        pagination = _Pagination(self)
+        if checkpoint is None:
+            index, (url, next_page_url) = 0, self._load_first_page(pagination)
+        else:
+            index, url, next_page_url = pagination.restore(checkpoint)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = {
+                executor.submit(self._load_page, page_url): (_LOAD, next_index)
+                for next_index, page_url in pagination.get_next_pages(
+                    index, url, next_page_url, 0
+                )
+            }
+            yield from pagination.pop_ready_pages()
+
+            def load_next_pages(index: int, url: str, next_page_url: Optional[str]):
+                loading = sum(stage == _LOAD for stage, _ in pending.values())
+                for next_index, page_url in pagination.get_next_pages(
+                    index, url, next_page_url, loading
+                ):
+                    pending[executor.submit(self._load_page, page_url)] = (
+                        _LOAD,
+                        next_index,
+                    )
+
+            links = {}
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    # extracted pages first, so that they are recorded even if a load failed meanwhile
+                    for future in sorted(done, key=lambda f: _get_order(pending[f])):
+                        stage, index = pending.pop(future)
+                        if stage == _EXTRACT:
+                            pagination.add_rows(index, future.result())
+                            if index in links:
+                                load_next_pages(index, *links.pop(index))
+                            continue
+
+                        url, document, next_page_url = future.result()
+                        pagination.set_links(index, url, next_page_url)
+                        extract = executor.submit(
+                            self._extract_rows, url, document, index, next_page_url
+                        )
+                        pending[extract] = (_EXTRACT, index)
+                        if self.incremental:
+                            # the next pages are only loaded once this page turns out to have new items
+                            links[index] = (url, next_page_url)
+                        else:
+                            load_next_pages(index, url, next_page_url)
+                    yield from pagination.pop_ready_pages()
+            except BaseException:
+                pagination.save_ready_pages()
+                raise
+            finally:
+                for future in pending:
+                    future.cancel()
+        self._delete_checkpoint()
+
+    async def aiter_pages(self) -> AsyncIterator[tuple[int, List[dict]]]:
+        """
+        Async counterpart of iter_pages.
+        """
+        self._crawling = True
+        checkpoint = self._load_checkpoint()
+        if checkpoint is None:
+            await self.afetch_rules()
+        self.compile_rules()
+        pagination = _Pagination(self)
+        if checkpoint is None:
+            index, (url, next_page_url) = 0, await self._aload_first_page(pagination)
+        else:
+            index, url, next_page_url = pagination.restore(checkpoint)
+        pending = {
+            asyncio.ensure_future(self._aload_page(page_url)): (_LOAD, next_index)
+            for next_index, page_url in pagination.get_next_pages(
+                index, url, next_page_url, 0
+            )
+        }
+        for page in pagination.pop_ready_pages():
+            yield page
+
+        def load_next_pages(index: int, url: str, next_page_url: Optional[str]):
+            loading = sum(stage == _LOAD for stage, _ in pending.values())
+            for next_index, page_url in pagination.get_next_pages(
+                index, url, next_page_url, loading
+            ):
+                load = self._aload_page(page_url)
+                pending[asyncio.ensure_future(load)] = (_LOAD, next_index)
+
+        links = {}
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in sorted(done, key=lambda t: _get_order(pending[t])):
+                    stage, index = pending.pop(task)
+                    if stage == _EXTRACT:
+                        pagination.add_rows(index, task.result())
+                        if index in links:
+                            load_next_pages(index, *links.pop(index))
+                        continue
+
+                    url, document, next_page_url = task.result()
+                    pagination.set_links(index, url, next_page_url)
+                    extract = asyncio.to_thread(
+                        self._extract_rows, url, document, index, next_page_url
+                    )
+                    pending[asyncio.ensure_future(extract)] = (_EXTRACT, index)
+                    if self.incremental:
+                        links[index] = (url, next_page_url)
+                    else:
+                        load_next_pages(index, url, next_page_url)
+                for page in pagination.pop_ready_pages():
+                    yield page
+        except BaseException:
+            pagination.save_ready_pages()
+            raise
+        finally:
+            for task in pending:
+                task.cancel()
+        self._delete_checkpoint()
+
+    def _load_checkpoint(self) -> Optional[Checkpoint]:
+        if not self.checkpoint:
+            return None
+        if self.resume:
+            checkpoint = self.checkpoint_store.get("list", self.url, self.fields)
+            if checkpoint is not None and checkpoint.pages:
+                logger.info(
+                    "Resuming crawl of URL: %s after page %s",
+                    self.url,
+                    checkpoint.pages[-1].index + 1,
+                )
+                self.rules = checkpoint.rules
+                self.rules_url = self.url
+                self.stats.incr("resumed_pages", len(checkpoint.pages))
+                return checkpoint
+            logger.info("No checkpoint found for URL: %s, starting over", self.url)
+        # a new crawl does not mix its pages with those of an earlier one
+        self.checkpoint_store.delete("list", self.url, self.fields)
+        return None
+
+    def _add_checkpoint_page(self, page: CheckpointPage):
+        self.checkpoint_store.add_page(
+            "list", self.url, self.fields, self.rules, self.page_url_template, page
+        )
+
+    def _delete_checkpoint(self):
+        if self.checkpoint:
+            self.checkpoint_store.delete("list", self.url, self.fields)
+
+    def _load_first_page(self, pagination: _Pagination) -> tuple[str, Optional[str]]:
+        """
+        Loads and extracts the first page, fetching the rules again and extracting the page again if they look out of
+        date for it.
+        """
+        url, document, next_page_url = self._load_page(self.url)
+        rows = self._extract_rows(url, document, 0, next_page_url)
+        if self._should_refresh_rules():
+            self.refresh_rules = True
+            self.fetch_rules()
+            self.compile_rules()
+            document = self._get_document(document)
+            next_page_url = self._get_next_page_url(url, document)
+            rows = self._extract_rows(url, document, 0, next_page_url)
+        pagination.set_links(0, url, next_page_url)
+        pagination.add_rows(0, rows)
+        return url, next_page_url
+
+    async def _aload_first_page(
+        self, pagination: _Pagination
+    ) -> tuple[str, Optional[str]]:
+        url, document, next_page_url = await self._aload_page(self.url)
+        rows = await asyncio.to_thread(
+            self._extract_rows, url, document, 0, next_page_url
+        )
+        if self._should_refresh_rules():
+            self.refresh_rules = True
+            await self.afetch_rules()
+            self.compile_rules()
+            document = await asyncio.to_thread(self._get_document, document)
+            next_page_url = self._get_next_page_url(url, document)
+            rows = await asyncio.to_thread(
+                self._extract_rows, url, document, 0, next_page_url
+            )
+        pagination.set_links(0, url, next_page_url)
+        pagination.add_rows(0, rows)
+        return url, next_page_url
+
+    def _should_refresh_rules(self) -> bool:
+        health = self.page_health[0]
+        if self.drift_threshold is None or not health.is_drifted(self.drift_threshold):
+            return False
+        message = "Rules look out of date for URL: %s (%s items, fill rate %.0f%%)"
+        args = (self.url, health.items, health.fill_rate * 100)
+        # an error page, e.g. a transient 404 or 503, says nothing about the rules and is not worth a rules API call
+        if self.url in self._error_urls:
+            logger.warning(message + ", but the page is an error page", *args)
+            return False
+        # given rules are applied as is, and freshly fetched rules would not be any better
+        if self.given_rules is not None or self.rules_fetched:
+            logger.warning(message, *args)
+            return False
+        logger.warning(message + ", fetching them again", *args)
+        return True
+
+    def _load_page(self, url):
+        logger.info("Crawling URL: %s", url)
+        html = self._pop_prefetched_html(url)
+        if html is None:
+            html = self.fetch_html(url)
+        extracted = self._get_extracted(url, self._extraction_key)
+        if extracted is not None:
+            return (
+                url,
+                _ExtractedPage(html, extracted["rows"]),
+                extracted["next_page_url"],
+            )
+        if self.parse_workers:
+            # the parse stage covers the extraction in the worker process
+            with self.stats.time("parse"):
+                result = self._submit_parse(html).result()
+            return self._get_parsed_page(url, html, *result)
+        with self.stats.time("parse"):
+            document = self.plan.parse(html)
+        return url, document, self._get_next_page_url(url, document)
+
+    async def _aload_page(self, url):
+        logger.info("Crawling URL: %s", url)
+        html = self._pop_prefetched_html(url)
+        if html is None:
+            html = await self.aget_html(url)
+        extracted = self._get_extracted(url, self._extraction_key)
+        if extracted is not None:
+            return (
+                url,
+                _ExtractedPage(html, extracted["rows"]),
+                extracted["next_page_url"],
+            )
+        if self.parse_workers:
+            with self.stats.time("parse"):
+                result = await asyncio.wrap_future(self._submit_parse(html))
+            return self._get_parsed_page(url, html, *result)
+        with self.stats.time("parse"):
+            document = await asyncio.to_thread(self.plan.parse, html)
+        return url, document, self._get_next_page_url(url, document)
+
+    def _submit_parse(self, html: str):
+        return get_parse_pool(self.parse_workers).submit(
+            _extract_page,
+            self._extraction_key,
+            self.rules,
+            self.plan.backend.name,
+            html,
+        )
+
+    def _get_parsed_page(
+        self, url: str, html: str, rows: List[dict], next_page_href: Optional[str]
+    ) -> tuple[str, _ExtractedPage, Optional[str]]:
+        # the rows were extracted by a worker process, and the next page is followed from here
+        next_page_url = self._join_next_page_url(url, next_page_href)
+        self._set_extracted(
+            url, self._extraction_key, {"rows": rows, "next_page_url": next_page_url}
+        )
+        return url, _ExtractedPage(html, rows), next_page_url
+
+    def _get_document(self, document):
+        # pages extracted elsewhere are parsed here only if they need to be extracted again
+        if isinstance(document, _ExtractedPage):
+            return self.plan.parse(document.html)
+        return document
+
+    def _get_next_page_url(self, url, document):
+        return self._join_next_page_url(url, self.plan.get_next_page_href(document))
 
     @staticmethod
-    def _get_html(url):
-        res = requests.get(url)
-        return res.text
-
-    def _fetch_data(self, url):
-        logger.info("Crawling URL: " + url)
-        html = self.get_html(url)
-        soup = BeautifulSoup(html, "html.parser")
-        list_items = soup.select(self.list_element_css_selector)
-        for item in list_items:
-            row = {}
-            for field in self.item_fields:
-                name = field["name"]
-                field_element = item.select_one(field["element_css_selector"])
-                if not field_element:
-                    continue
-                if field["type"] == "text":
-                    value = field_element.text.strip()
-                else:
-                    value = field_element.get(field["attribute"])
-                row[name] = value
-            self.data.append(row)
-        logger.info("Fetched " + str(len(list_items)) + " items from URL: " + url)
-
-        if self.next_page_element_css_selector:
-            next_page_element = soup.select_one(self.next_page_element_css_selector)
-            if next_page_element:
-                logger.info("Next page found: " + next_page_element.get("href"))
-                next_page_href = next_page_element.get("href")
-                return urljoin(url, next_page_href)
+    def _join_next_page_url(url: str, next_page_href: Optional[str]) -> Optional[str]:
+        if next_page_href:
+            logger.info("Next page found: %s", next_page_href)
+            return urljoin(url, next_page_href)
+
+    def _extract_rows(
+        self, url, document, index: int = None, next_page_url: str = None
+    ) -> List[dict]:
+        if isinstance(document, _ExtractedPage):
+            rows = document.rows
+        else:
+            with self.stats.time("extract"):
+                rows = self.plan.extract_rows(document)
+            self._set_extracted(
+                url,
+                self._extraction_key,
+                {"rows": rows, "next_page_url": next_page_url},
+            )
+        logger.info("Fetched %s items from URL: %s", len(rows), url)
+        self.stats.incr("pages")
+        self.stats.incr("items", len(rows))
+        self.stats.observe("items_per_page", len(rows), COUNT_BUCKETS)
+        if index is not None:
+            health = get_page_health(
+                rows, self.plan.field_names, next_page_url is not None
+            )
+            self.page_health[index] = health
+            if (
+                index > 0
+                and rows
+                and self.drift_threshold is not None
+                and health.is_drifted(self.drift_threshold)
+            ):
+                logger.warning(
+                    "Low field fill rate of %.0f%% for URL: %s",
+                    health.fill_rate * 100,
+                    url,
+                )
+        return rows
+
+
+_LOAD = "load"
+_EXTRACT = "extract"
+
+
+def _get_order(step: tuple[str, int]) -> tuple[bool, int]:
+    stage, index = step
+    return stage != _EXTRACT, index
+
+
+class _ExtractedPage(NamedTuple):
+    """
+    A page that was extracted by a worker process, or not modified since an earlier crawl, in place of its parsed
+    document.
+    """
+
+    html: str
+    rows: List[dict]
+
+
+class _Pagination(object):
+    """
+    Decides which list pages to load next and collects the extracted rows in page order.
+
+    Pages are followed one by one through their next-page links, unless a page URL template is given or detected
+    from the first next-page link, in which case up to `concurrency` pages are loaded at the same time. In that mode
+    a page without items or without a next-page link marks the end of the list.
+    """
+
+    def __init__(self, spider: ListSpider):
+        self.spider = spider
+        self.template = spider.page_url_template
+        self.pages = {}
+        self.last_index = None
+        self.next_index = 1
+        self.next_ready_index = 0
+        self.visited = {spider.url}
+        self.site = get_site(spider.url)
+        self.fingerprints = {}
+        self.crawled_fingerprints = set()
+        self.links = {}
+
+    def restore(self, checkpoint: Checkpoint) -> tuple[int, str, Optional[str]]:
+        """
+        Restores the pages completed by an interrupted crawl, to be returned again without loading them.
+
+        Returns:
+            tuple[int, str, Optional[str]]: The index, URL and next-page URL of the last completed page, from which
+                the next pages are loaded.
+        """
+        if checkpoint.page_url_template is not None:
+            self.template = self.spider.page_url_template = checkpoint.page_url_template
+        for page in checkpoint.pages:
+            self.pages[page.index] = page.rows
+            self.visited.add(page.url)
+            if not page.rows and self.template and page.index > 0:
+                self._set_last_index(page.index - 1)
+        last = checkpoint.pages[-1]
+        self.next_index = last.index + 1
+        return last.index, last.url, last.next_page_url
+
+    def set_links(self, index: int, url: str, next_page_url: Optional[str]):
+        self.links[index] = (url, next_page_url)
+
+    def add_rows(self, index: int, rows: List[dict]):
+        if self.spider.incremental:
+            rows = self._filter_new_rows(index, rows)
+        self.pages[index] = rows
+        if not rows and self.template and index > 0:
+            self._set_last_index(index - 1)
+
+    def get_next_pages(
+        self, index: int, url: str, next_page_url: Optional[str], loading: int
+    ) -> List[tuple[int, str]]:
+        if self.template is None and index == 0 and next_page_url:
+            self.template = detect_page_url_template(url, next_page_url)
+            self.spider.page_url_template = self.template
+            if self.template:
+                logger.info("Page URL template detected: %s", self.template)
+
+        next_pages = []
+        if self.template:
+            if index > 0 and not next_page_url:
+                self._set_last_index(index)
+            # keep up to `concurrency` page loads in flight
+            while (
+                self._is_within_max_pages(self.next_index)
+                and (self.last_index is None or self.next_index <= self.last_index)
+                and loading + len(next_pages) < self.spider.concurrency
+            ):
+                next_pages.append(
+                    (self.next_index, self.template.get_url(self.next_index))
+                )
+                self.next_index += 1
+        elif (
+            next_page_url
+            and next_page_url not in self.visited
+            and self._is_within_max_pages(index + 1)
+            and (self.last_index is None or index < self.last_index)
+        ):
+            self.visited.add(next_page_url)
+            next_pages.append((index + 1, next_page_url))
+        return next_pages
+
+    def pop_ready_pages(self) -> List[tuple[int, List[dict]]]:
+        """
+        Returns the pages that are extracted and whose preceding pages are all extracted, in order, and forgets them.
+
+        A page is final once all pages up to it are extracted, since only an empty page or a page without a next-page
+        link can mark the end of the list, and only for the pages after it.
+        """
+        ready = []
+        while self.next_ready_index in self.pages:
+            if self.last_index is not None and self.next_ready_index > self.last_index:
+                break
+            rows = self.pages.pop(self.next_ready_index)
+            # restored pages have no links, and are not recorded again
+            links = self.links.pop(self.next_ready_index, None)
+            if self.spider.checkpoint and links is not None:
+                self.spider._add_checkpoint_page(
+                    CheckpointPage(self.next_ready_index, *links, rows)
+                )
+            ready.append((self.next_ready_index, rows))
+            # items are only marked as seen once their page is returned
+            fingerprints = self.fingerprints.pop(self.next_ready_index, None)
+            if fingerprints:
+                self.spider.seen_store.add(self.site, fingerprints)
+            self.next_ready_index += 1
+        return ready
+
+    def save_ready_pages(self):
+        """
+        Records the pages ready to be returned when the crawl is interrupted, so that they are not loaded again when
+        it is resumed.
+        """
+        # in incremental mode, items are only marked as seen once returned, and pages not returned are loaded again
+        if not self.spider.checkpoint or self.spider.incremental:
+            return
+        index = self.next_ready_index
+        while index in self.pages and index in self.links:
+            if self.last_index is not None and index > self.last_index:
+                break
+            self.spider._add_checkpoint_page(
+                CheckpointPage(index, *self.links[index], self.pages[index])
+            )
+            index += 1
+
+    def _filter_new_rows(self, index: int, rows: List[dict]) -> List[dict]:
+        fingerprints = [
+            get_item_fingerprint(row, self.spider.key_fields) for row in rows
+        ]
+        seen = self.spider.seen_store.get_seen(self.site, fingerprints)
+        new_rows = []
+        new_fingerprints = []
+        for row, fingerprint in zip(rows, fingerprints):
+            # items moving to the next page while the list is crawled are kept once
+            if fingerprint in seen or fingerprint in self.crawled_fingerprints:
+                continue
+            self.crawled_fingerprints.add(fingerprint)
+            new_rows.append(row)
+            new_fingerprints.append(fingerprint)
+        self.fingerprints[index] = new_fingerprints
+        if rows and not new_rows:
+            logger.info(
+                "No new items on page %s of URL: %s, stopping",
+                index + 1,
+                self.spider.url,
+            )
+            self._set_last_index(index)
+        return new_rows
+
+    def _is_within_max_pages(self, index: int) -> bool:
+        return self.spider.max_pages is None or index < self.spider.max_pages
+
+    def _set_last_index(self, index: int):
+        if self.last_index is None or index < self.last_index:
+            self.last_index = index
 
 
 def _get_fields(fields: List[str] | dict = None) -> Optional[List[str] | List[dict]]:
@@ -130,6 +803,23 @@ def read_list(
     get_html=None,
     as_dataframe=True,
     return_rules=False,
+    use_cache=True,
+    refresh_rules=False,
+    concurrency=5,
+    max_pages=None,
+    page_url_template=None,
+    parser=None,
+    rules=None,
+    drift_threshold=DEFAULT_DRIFT_THRESHOLD,
+    scheduler=None,
+    http_cache=None,
+    incremental=False,
+    key_fields=None,
+    parse_workers=None,
+    stats=None,
+    fetcher=None,
+    checkpoint=False,
+    resume=False,
 ) -> DataFrame | List[dict] | tuple[DataFrame | List[dict], dict]:
     """
     Reads a list of items from a webpage and returns a DataFrame.
@@ -140,6 +830,37 @@ def read_list(
         get_html (function): A function to fetch the HTML content of a webpage. Defaults to the requests library.
         as_dataframe (bool): Whether to return the extracted data as a DataFrame. Defaults to True.
         return_rules (bool): Whether to return the rules used for extraction. Defaults to False.
+        use_cache (bool): Whether to use the on-disk rules cache. Defaults to True.
+        refresh_rules (bool): Whether to fetch fresh rules from the API even if cached ones exist. Defaults to False.
+        concurrency (int): The maximum number of pages fetched and extracted at the same time. Defaults to 5.
+        max_pages (int): The maximum number of pages to crawl. Defaults to no limit.
+        page_url_template (str): The URL template of the list pages with "{n}" as the page number, starting at 2 for
+            the page after the given URL. Detected from the next-page link if not given.
+        parser (str): The HTML parser backend, "lxml", "selectolax" or "html.parser". Defaults to lxml if installed.
+        rules (dict | str): Rules returned by an earlier call with return_rules=True, or the path of a JSON file
+            containing them. If given, the rules API is not called.
+        drift_threshold (float): The minimum field fill rate of the first page below which cached rules are fetched
+            again from the API. Defaults to 0.5. None disables the check.
+        scheduler (HostScheduler): A scheduler that fetches pages within per-host rate and concurrency limits, and
+            optionally robots.txt. Defaults to no limits beyond concurrency.
+        http_cache (HttpCache | bool): An HTTP cache, or True for the default on-disk one, to revalidate pages
+            fetched by earlier crawls with conditional requests and reuse the items of unchanged pages. Only used with
+            the default HTTP client. Defaults to no cache.
+        incremental (bool): Whether to only return the items not returned by earlier crawls of the site, stopping at
+            the first page made up of items already seen. Defaults to False.
+        key_fields (List[str]): The fields identifying an item in incremental mode, e.g. ["url"]. Defaults to its URL
+            field if it has one, else all its fields.
+        parse_workers (int): The number of processes that parse and extract the pages, to use several cores on
+            large crawls. Defaults to parsing in the fetching threads.
+        stats (CrawlStats): A stats object to record the timings and counters of the crawl in. See
+            crawlab_ai.utils.metrics.
+        fetcher (Fetcher): A fetcher of the pages, e.g. a BrowserFetcher from crawlab_ai.spider.fetchers for lists
+            rendered with JavaScript. Defaults to the HTTP client.
+        checkpoint (bool): Whether to record the progress of the crawl, page by page, so that it can be resumed with
+            resume=True if it is interrupted. Defaults to False.
+        resume (bool): Whether to resume the interrupted crawl of the same URL and fields, returning the items of the
+            recorded pages without fetching them or the rules again. Starts from the first page if there is nothing
+            to resume. Implies checkpoint. Defaults to False.
 
     Returns:
         DataFrame | List[dict] | tuple[DataFrame | List[dict], dict]: The extracted data as a DataFrame or a list of
@@ -147,23 +868,172 @@ def read_list(
         returned.
 
     """
-    spider = ListSpider(url=url, fields=_get_fields(fields), get_html=get_html)
+    spider = ListSpider(
+        url=url,
+        fields=_get_fields(fields),
+        get_html=get_html,
+        use_cache=use_cache,
+        refresh_rules=refresh_rules,
+        concurrency=concurrency,
+        max_pages=max_pages,
+        page_url_template=page_url_template,
+        parser=parser,
+        rules=rules,
+        drift_threshold=drift_threshold,
+        scheduler=scheduler,
+        http_cache=http_cache,
+        incremental=incremental,
+        key_fields=key_fields,
+        parse_workers=parse_workers,
+        stats=stats,
+        fetcher=fetcher,
+        checkpoint=checkpoint,
+        resume=resume,
+    )
     spider.crawl()
+    return _get_return_data(spider, as_dataframe, return_rules)
+
+
+def iter_list(
+    url: str,
+    fields: List[str] | dict = None,
+    get_html=None,
+    batch: bool = False,
+    **kwargs,
+) -> Iterator[dict] | Iterator[List[dict]]:
+    """
+    Crawls a list and yields the extracted items as soon as their page is extracted, without keeping them in memory.
+
+    Args:
+        url (str): The URL to be crawled.
+        fields (List[str] | dict): A list of fields to be extracted from each list element.
+        get_html (function): A function to fetch the HTML content of a webpage. Defaults to the requests library.
+        batch (bool): Whether to yield the items of each page as one list instead of one by one. Defaults to False.
+        **kwargs: Other arguments of read_list, e.g. concurrency, max_pages, parser or rules.
+
+    Returns:
+        Iterator[dict] | Iterator[List[dict]]: The items, or the lists of items of each page, in page order.
+    """
+    spider = ListSpider(
+        url=url, fields=_get_fields(fields), get_html=get_html, **kwargs
+    )
+    for _, rows in spider.iter_pages():
+        if batch:
+            yield rows
+        else:
+            yield from rows
+
+
+async def aread_list(
+    url: str,
+    fields: List[str] | dict = None,
+    get_html=None,
+    as_dataframe=True,
+    return_rules=False,
+    use_cache=True,
+    refresh_rules=False,
+    concurrency=5,
+    max_pages=None,
+    page_url_template=None,
+    parser=None,
+    rules=None,
+    drift_threshold=DEFAULT_DRIFT_THRESHOLD,
+    scheduler=None,
+    http_cache=None,
+    incremental=False,
+    key_fields=None,
+    parse_workers=None,
+    stats=None,
+    fetcher=None,
+    checkpoint=False,
+    resume=False,
+) -> DataFrame | List[dict] | tuple[DataFrame | List[dict], dict]:
+    """
+    Async counterpart of read_list. Pages and rules are fetched with the pooled async HTTP client of the running
+    event loop, which is closed on return unless the call is made within an async_http_session block, and get_html
+    may be either a regular or an async function.
+
+    Args:
+        See read_list.
+
+    Returns:
+        See read_list.
+    """
+    spider = ListSpider(
+        url=url,
+        fields=_get_fields(fields),
+        get_html=get_html,
+        use_cache=use_cache,
+        refresh_rules=refresh_rules,
+        concurrency=concurrency,
+        max_pages=max_pages,
+        page_url_template=page_url_template,
+        parser=parser,
+        rules=rules,
+        drift_threshold=drift_threshold,
+        scheduler=scheduler,
+        http_cache=http_cache,
+        incremental=incremental,
+        key_fields=key_fields,
+        parse_workers=parse_workers,
+        stats=stats,
+        fetcher=fetcher,
+        checkpoint=checkpoint,
+        resume=resume,
+    )
+    async with async_http_session():
+        await spider.acrawl()
+    return _get_return_data(spider, as_dataframe, return_rules)
+
+
+def _get_return_data(spider: ListSpider, as_dataframe: bool, return_rules: bool):
     if as_dataframe:
-        return_data = DataFrame(spider.data)
+        with spider.stats.time("dataframe"):
+            return_data = spider.data.to_dataframe()
     else:
-        return_data = spider.data
+        return_data = spider.data.to_list()
     if return_rules:
         return return_data, spider.rules
     return return_data
 
 
-def extract_list_rules(url: str, fields: List[str] | dict = None) -> dict:
-    spider = ListSpider(url=url, fields=_get_fields(fields))
+def extract_list_rules(
+    url: str,
+    fields: List[str] | dict = None,
+    use_cache: bool = True,
+    refresh_rules: bool = False,
+    stats: CrawlStats = None,
+) -> dict:
+    spider = ListSpider(
+        url=url,
+        fields=_get_fields(fields),
+        use_cache=use_cache,
+        refresh_rules=refresh_rules,
+        stats=stats,
+    )
     spider.fetch_rules()
     return spider.rules
 
 
+async def aextract_list_rules(
+    url: str,
+    fields: List[str] | dict = None,
+    use_cache: bool = True,
+    refresh_rules: bool = False,
+    stats: CrawlStats = None,
+) -> dict:
+    spider = ListSpider(
+        url=url,
+        fields=_get_fields(fields),
+        use_cache=use_cache,
+        refresh_rules=refresh_rules,
+        stats=stats,
+    )
+    async with async_http_session():
+        await spider.afetch_rules()
+    return spider.rules
+
+
 if __name__ == "__main__":
     df = read_list("https://quotes.toscrape.com")
     print(df)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator
+
+from crawlab_ai.utils.http import RETRY_STATUS_CODES, get_http_setting, get_retry_delay
+
+if TYPE_CHECKING:
+    import aiohttp
+
+DEFAULT_LIMIT = 100
+
+# aiohttp sessions are bound to the event loop they were created in, so one session is kept per loop, along with the
+# number of async_http_session blocks open in the loop
+_sessions = weakref.WeakKeyDictionary()
+_session_users = weakref.WeakKeyDictionary()
+
+
+def get_async_session() -> aiohttp.ClientSession:
+    """
+    Returns the pooled aiohttp session of the running event loop, creating it on first use. Requests time out after
+    the timeout of the synchronous client, and at most pool_maxsize connections are open per host (see
+    configure_http, which applies to the sessions created after it is called).
+
+    Connections are kept alive and reused across page fetches and rules API calls, until the session is closed with
+    close_async_session or at the end of the async_http_session blocks of the loop.
+    """
+    import aiohttp
+
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=DEFAULT_LIMIT, limit_per_host=get_http_setting("pool_maxsize")
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=get_http_setting("timeout")),
+        )
+        _sessions[loop] = session
+    return session
+
+
+@asynccontextmanager
+async def async_http_session() -> AsyncIterator[None]:
+    """
+    Keeps the pooled aiohttp session of the running event loop open within the block, and closes it when the last
+    block open in the loop ends. The session is still created on first use, if any request is sent.
+
+    aread_list and aread_article open a block around each call, so that their session is closed before the loop
+    ends. Calls made within an outer block share its session and its connections:
+
+        async with async_http_session():
+            lists = await asyncio.gather(*(aread_list(url) for url in urls))
+    """
+    loop = asyncio.get_running_loop()
+    _session_users[loop] = _session_users.get(loop, 0) + 1
+    try:
+        yield
+    finally:
+        _session_users[loop] -= 1
+        if not _session_users[loop]:
+            del _session_users[loop]
+            await close_async_session()
+
+
+async def close_async_session():
+    """
+    Closes the pooled aiohttp session of the running event loop. Call it before the loop shuts down.
+    """
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+async def _request(method: str, url: str, read, raise_for_status: bool, **kwargs):
+    """
+    Sends a request with the pooled session, retrying connection errors and 429/5xx responses with the same
+    exponential backoff and Retry-After handling as the synchronous client.
+    """
+    import aiohttp
+
+    retries = get_http_setting("retries")
+    attempt = 0
+    while True:
+        retry_after = None
+        try:
+            async with get_async_session().request(method, url, **kwargs) as res:
+                if res.status not in RETRY_STATUS_CODES or attempt >= retries:
+                    if raise_for_status:
+                        res.raise_for_status()
+                    return await read(res)
+                retry_after = res.headers.get("Retry-After")
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt >= retries:
+                raise
+        # the response is released before the backoff, so that its connection is not held while waiting
+        attempt += 1
+        await asyncio.sleep(get_retry_delay(attempt, retry_after))
+
+
+async def async_get_text(url: str, on_status=None, **kwargs) -> str:
+    """
+    Fetches the body of a page, whatever the status of the response. on_status, if given, is called with the URL and
+    the status.
+    """
+
+    async def read(res) -> str:
+        if on_status is not None:
+            on_status(url, res.status)
+        return await res.text()
+
+    return await _request("GET", url, read, raise_for_status=False, **kwargs)
+
+
+async def async_post_json(url: str, **kwargs) -> dict:
+    return await _request(
+        "POST", url, lambda res: res.json(), raise_for_status=True, **kwargs
+    )
@@ -0,0 +1,202 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+from crawlab_ai.utils.pagination import PageUrlTemplate
+from crawlab_ai.utils.rules_cache import get_cache_key, normalize_url
+
+
+def get_checkpoint_store_path() -> str:
+    if os.getenv("CRAWLAB_AI_CHECKPOINT_PATH"):
+        return os.getenv("CRAWLAB_AI_CHECKPOINT_PATH")
+    return os.path.join(os.path.expanduser("~"), ".crawlab", "checkpoints.db")
+
+
+class CheckpointPage(NamedTuple):
+    """
+    A list page completed by an interrupted crawl, along with the rows extracted from it.
+    """
+
+    index: int
+    url: str
+    next_page_url: Optional[str]
+    rows: List[dict]
+
+
+class Checkpoint(NamedTuple):
+    """
+    The state of an interrupted list crawl: the rules it used, the URL template of its pages if any, and the pages it
+    completed, in order.
+    """
+
+    url: str
+    rules: dict
+    page_url_template: Optional[PageUrlTemplate]
+    pages: List[CheckpointPage]
+
+
+class CheckpointStore(object):
+    """
+    An on-disk store of the progress of list crawls, so that an interrupted crawl can be resumed.
+
+    Checkpoints are stored in a SQLite database (by default ``~/.crawlab/checkpoints.db``) and keyed on the kind of
+    crawl ("list"), the normalized start URL and the requested fields, like cached rules. Each page is recorded with
+    its rows once it and all pages before it are extracted, in the same transaction as the rules and page URL
+    template of the crawl. The pages after the last recorded one make up the frontier of the crawl: the page its
+    next-page link points to, or the following pages of its URL template.
+
+    Attributes:
+        path (str): Path of the SQLite database file.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or get_checkpoint_store_path()
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            with self._lock:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS checkpoints ("
+                    "key TEXT PRIMARY KEY, "
+                    "url TEXT NOT NULL, "
+                    "rules TEXT NOT NULL, "
+                    "page_url_template TEXT, "
+                    "updated_at REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS checkpoint_pages ("
+                    "key TEXT NOT NULL, "
+                    "page_index INTEGER NOT NULL, "
+                    "url TEXT NOT NULL, "
+                    "next_page_url TEXT, "
+                    "rows TEXT NOT NULL, "
+                    "PRIMARY KEY (key, page_index))"
+                )
+                conn.commit()
+                self._initialized = True
+        return conn
+
+    def get(self, kind: str, url: str, fields=None) -> Optional[Checkpoint]:
+        if not os.path.exists(self.path):
+            return None
+        key = get_cache_key(kind, url, fields)
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT url, rules, page_url_template FROM checkpoints WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            pages = [
+                CheckpointPage(index, page_url, next_page_url, json.loads(rows))
+                for index, page_url, next_page_url, rows in conn.execute(
+                    "SELECT page_index, url, next_page_url, rows FROM checkpoint_pages "
+                    "WHERE key = ? ORDER BY page_index",
+                    (key,),
+                )
+            ]
+        finally:
+            conn.close()
+        template = json.loads(row[2]) if row[2] else None
+        return Checkpoint(
+            url=row[0],
+            rules=json.loads(row[1]),
+            page_url_template=PageUrlTemplate(**template) if template else None,
+            pages=pages,
+        )
+
+    def add_page(
+        self,
+        kind: str,
+        url: str,
+        fields,
+        rules: dict,
+        page_url_template: Optional[PageUrlTemplate],
+        page: CheckpointPage,
+    ):
+        """
+        Records a completed page of a crawl, along with the current rules and page URL template of the crawl.
+        """
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        key = get_cache_key(kind, url, fields)
+        template = None
+        if page_url_template is not None:
+            template = json.dumps(
+                {
+                    "template": page_url_template.template,
+                    "start": page_url_template.start,
+                    "step": page_url_template.step,
+                }
+            )
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (key, url, rules, page_url_template, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    key,
+                    normalize_url(url),
+                    json.dumps(rules, ensure_ascii=False),
+                    template,
+                    time.time(),
+                ),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoint_pages (key, page_index, url, next_page_url, rows) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    key,
+                    page.index,
+                    page.url,
+                    page.next_page_url,
+                    json.dumps(page.rows, ensure_ascii=False),
+                ),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def delete(self, kind: str, url: str, fields=None):
+        if not os.path.exists(self.path):
+            return
+        key = get_cache_key(kind, url, fields)
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM checkpoints WHERE key = ?", (key,))
+            conn.execute("DELETE FROM checkpoint_pages WHERE key = ?", (key,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def clear(self):
+        if not os.path.exists(self.path):
+            return
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM checkpoints")
+            conn.execute("DELETE FROM checkpoint_pages")
+            conn.commit()
+        finally:
+            conn.close()
+
+
+_checkpoint_store: Optional[CheckpointStore] = None
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    global _checkpoint_store
+    if (
+        _checkpoint_store is None
+        or _checkpoint_store.path != get_checkpoint_store_path()
+    ):
+        _checkpoint_store = CheckpointStore()
+    return _checkpoint_store
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from crawlab_ai.utils.rules_cache import (
+    DEFAULT_MAX_ENTRIES,
+    get_rules_cache_path,
+    normalize_url,
+)
+
+
+def get_rules_hash(rules: dict) -> str:
+    payload = json.dumps(rules, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def get_code_key(kind: str, url: str, rules: dict) -> str:
+    payload = json.dumps([kind, normalize_url(url), get_rules_hash(rules)])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class CodeCache(object):
+    """
+    An on-disk cache of the spider source code generated by the Crawlab AI API.
+
+    Entries are stored in the SQLite database of the rules cache and keyed on the kind of rules ("list" or
+    "article"), the normalized URL and the hash of the rules the code was generated from. The generated code embeds
+    the URL it was generated for, so code is only reused for the same URL, and generated again whenever its rules
+    change. The least recently used entries are evicted once the cache holds more than ``max_entries`` entries.
+
+    Attributes:
+        path (str): Path of the SQLite database file.
+        max_entries (int): Maximum number of entries kept in the cache.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path or get_rules_cache_path()
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            with self._lock:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS code ("
+                    "key TEXT PRIMARY KEY, "
+                    "kind TEXT NOT NULL, "
+                    "url TEXT NOT NULL, "
+                    "rules_hash TEXT NOT NULL, "
+                    "source_code TEXT NOT NULL, "
+                    "created_at REAL NOT NULL, "
+                    "accessed_at REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_code_accessed_at ON code (accessed_at)"
+                )
+                conn.commit()
+                self._initialized = True
+        return conn
+
+    def get(self, kind: str, url: str, rules: dict) -> Optional[str]:
+        if not os.path.exists(self.path):
+            return None
+        key = get_code_key(kind, url, rules)
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT source_code FROM code WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE code SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            conn.commit()
+            return row[0]
+        finally:
+            conn.close()
+
+    def set(self, kind: str, url: str, rules: dict, source_code: str):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO code "
+                "(key, kind, url, rules_hash, source_code, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    get_code_key(kind, url, rules),
+                    kind,
+                    normalize_url(url),
+                    get_rules_hash(rules),
+                    source_code,
+                    now,
+                    now,
+                ),
+            )
+            self._evict(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def clear(self):
+        if not os.path.exists(self.path):
+            return
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM code")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def __len__(self):
+        if not os.path.exists(self.path):
+            return 0
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM code").fetchone()[0]
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection):
+        if self.max_entries:
+            conn.execute(
+                "DELETE FROM code WHERE key NOT IN "
+                "(SELECT key FROM code ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+
+_code_cache: Optional[CodeCache] = None
+
+
+def get_code_cache() -> CodeCache:
+    global _code_cache
+    if _code_cache is None or _code_cache.path != get_rules_cache_path():
+        _code_cache = CodeCache()
+    return _code_cache
@@ -0,0 +1,468 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Iterable, NamedTuple, Optional
+
+from crawlab_ai.utils.rules_cache import normalize_url
+
+DEFAULT_FRONTIER_NAME = "default"
+DEFAULT_LEASE_TIMEOUT = 300
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+class Task(NamedTuple):
+    """
+    A page to crawl in a distributed crawl.
+
+    Attributes:
+        kind (str): "list" for a list page, "article" for an article.
+        url (str): The URL of the page.
+        source (str): The start URL of the list the page belongs to, or the URL of the article.
+        index (int): The zero-based index of the page in its list.
+        id (str): The identifier of the task in the frontier, set when it is pushed.
+        attempts (int): The number of failed attempts to crawl the page so far.
+    """
+
+    kind: str
+    url: str
+    source: str
+    index: int = 0
+    id: Optional[str] = None
+    attempts: int = 0
+
+    def to_json(self) -> str:
+        return json.dumps(list(self), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, payload: str | bytes) -> "Task":
+        return cls(*json.loads(payload))
+
+
+class Frontier(ABC):
+    """
+    The state shared by the workers of a distributed crawl: a queue of the pages to crawl, the set of the URLs pushed
+    so far and a store of the rules of each site.
+
+    A URL is only pushed once, whichever worker pushes it. Popped tasks are leased to their worker for
+    ``lease_timeout`` seconds, and pushed back to the queue if they are not done by then, e.g. because the worker
+    died. A task whose crawl failed can be requeued by its worker to be attempted again later. Only one worker at a
+    time can lock the rules of a site, so that the rules API is called once per site while the other workers wait for
+    the rules to be stored.
+    """
+
+    @abstractmethod
+    def push(self, tasks: Iterable[Task]) -> int:
+        """
+        Pushes the tasks whose URLs were never pushed before, and returns their number.
+        """
+        ...
+
+    @abstractmethod
+    def pop(self, lease_timeout: float = DEFAULT_LEASE_TIMEOUT) -> Optional[Task]:
+        """
+        Leases the oldest pending task, or returns None if no task is pending.
+        """
+        ...
+
+    @abstractmethod
+    def done(self, task: Task): ...
+
+    @abstractmethod
+    def requeue(self, task: Task):
+        """
+        Pushes a leased task back to the end of the queue with one more failed attempt, unless its lease expired.
+        """
+        ...
+
+    @abstractmethod
+    def is_finished(self) -> bool:
+        """
+        Returns whether no task is pending or leased, i.e. whether the crawl is over.
+        """
+        ...
+
+    @abstractmethod
+    def get_rules(self, key: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    def set_rules(self, key: str, rules: dict): ...
+
+    @abstractmethod
+    def lock_rules(self, key: str, timeout: float) -> bool:
+        """
+        Locks the rules of a key for ``timeout`` seconds at most, and returns whether the lock was acquired.
+        """
+        ...
+
+    @abstractmethod
+    def unlock_rules(self, key: str): ...
+
+    @abstractmethod
+    def clear(self):
+        """
+        Deletes the tasks, the pushed URLs and the rules of the crawl.
+        """
+        ...
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class SqliteFrontier(Frontier):
+    """
+    A frontier stored in a SQLite database, for workers running on the same host or sharing a file system that
+    supports SQLite locking, and for tests.
+
+    Attributes:
+        path (str): Path of the SQLite database file.
+        name (str): The name of the crawl, so that several crawls can share a database.
+    """
+
+    def __init__(self, path: str, name: str = DEFAULT_FRONTIER_NAME):
+        self.path = path
+        self.name = name
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            with self._lock:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS frontier_tasks ("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                    "name TEXT NOT NULL, "
+                    "task TEXT NOT NULL, "
+                    "leased_until REAL)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_frontier_tasks_name ON frontier_tasks (name, leased_until)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS frontier_urls ("
+                    "name TEXT NOT NULL, "
+                    "url TEXT NOT NULL, "
+                    "PRIMARY KEY (name, url))"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS frontier_rules ("
+                    "name TEXT NOT NULL, "
+                    "key TEXT NOT NULL, "
+                    "rules TEXT, "
+                    "locked_until REAL, "
+                    "PRIMARY KEY (name, key))"
+                )
+                conn.commit()
+                self._initialized = True
+        return conn
+
+    def push(self, tasks: Iterable[Task]) -> int:
+        count = 0
+        conn = self._connect()
+        try:
+            for task in tasks:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO frontier_urls (name, url) VALUES (?, ?)",
+                    (self.name, normalize_url(task.url)),
+                )
+                if cursor.rowcount:
+                    conn.execute(
+                        "INSERT INTO frontier_tasks (name, task) VALUES (?, ?)",
+                        (self.name, task.to_json()),
+                    )
+                    count += 1
+            conn.commit()
+        finally:
+            conn.close()
+        return count
+
+    def pop(self, lease_timeout: float = DEFAULT_LEASE_TIMEOUT) -> Optional[Task]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            # the write lock is taken upfront, so that a task is leased to one worker only
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, task FROM frontier_tasks "
+                "WHERE name = ? AND (leased_until IS NULL OR leased_until < ?) "
+                "ORDER BY id LIMIT 1",
+                (self.name, now),
+            ).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+            conn.execute(
+                "UPDATE frontier_tasks SET leased_until = ? WHERE id = ?",
+                (now + lease_timeout, row[0]),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return Task.from_json(row[1])._replace(id=str(row[0]))
+
+    def done(self, task: Task):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM frontier_tasks WHERE id = ?", (int(task.id),))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def requeue(self, task: Task):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                "DELETE FROM frontier_tasks WHERE id = ? AND leased_until >= ?",
+                (int(task.id), time.time()),
+            )
+            # a new row goes to the end of the queue
+            if cursor.rowcount:
+                conn.execute(
+                    "INSERT INTO frontier_tasks (name, task) VALUES (?, ?)",
+                    (
+                        self.name,
+                        task._replace(id=None, attempts=task.attempts + 1).to_json(),
+                    ),
+                )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def is_finished(self) -> bool:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT 1 FROM frontier_tasks WHERE name = ? LIMIT 1", (self.name,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row is None
+
+    def get_rules(self, key: str) -> Optional[dict]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT rules FROM frontier_rules WHERE name = ? AND key = ?",
+                (self.name, key),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    def set_rules(self, key: str, rules: dict):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO frontier_rules (name, key, rules, locked_until) VALUES (?, ?, ?, NULL)",
+                (self.name, key, json.dumps(rules, ensure_ascii=False)),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def lock_rules(self, key: str, timeout: float) -> bool:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT rules, locked_until FROM frontier_rules WHERE name = ? AND key = ?",
+                (self.name, key),
+            ).fetchone()
+            if row is not None and (
+                row[0] is not None or (row[1] is not None and row[1] > now)
+            ):
+                conn.rollback()
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO frontier_rules (name, key, rules, locked_until) VALUES (?, ?, NULL, ?)",
+                (self.name, key, now + timeout),
+            )
+            conn.commit()
+            return True
+        finally:
+            conn.close()
+
+    def unlock_rules(self, key: str):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE frontier_rules SET locked_until = NULL WHERE name = ? AND key = ?",
+                (self.name, key),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def clear(self):
+        conn = self._connect()
+        try:
+            for table in ["frontier_tasks", "frontier_urls", "frontier_rules"]:
+                conn.execute("DELETE FROM " + table + " WHERE name = ?", (self.name,))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+# leases the oldest pending task atomically, so that a task popped by a worker that dies right after is not lost
+_REDIS_POP_SCRIPT = """
+local payload = redis.call('RPOP', KEYS[1])
+if payload then
+    redis.call('ZADD', KEYS[2], ARGV[1], payload)
+end
+return payload
+"""
+
+# pushes a failed task back only if it is still leased, so that it is not queued twice once its lease expired
+_REDIS_REQUEUE_SCRIPT = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 1 then
+    redis.call('LPUSH', KEYS[2], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# locks the rules of a key unless they are already stored, in one step, so that no worker locks rules just stored
+_REDIS_LOCK_RULES_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 1 then
+    return 0
+end
+if redis.call('SET', KEYS[2], 1, 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+
+class RedisFrontier(Frontier):
+    """
+    A frontier stored in Redis, or in a server compatible with it, for workers running on several hosts.
+
+    Pending tasks are kept in a list, leased tasks in a sorted set by lease deadline, pushed URLs in a set and rules
+    in a hash, all under keys prefixed with ``crawlab_ai:<name>:``. It requires the redis package.
+
+    Attributes:
+        url (str): The URL of the Redis server, e.g. "redis://localhost:6379/0".
+        name (str): The name of the crawl, so that several crawls can share a server.
+    """
+
+    def __init__(self, url: str, name: str = DEFAULT_FRONTIER_NAME):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError(
+                "redis is required for a Redis frontier. Install it with: pip install redis"
+            )
+        self.url = url
+        self.name = name
+        self.client = redis.Redis.from_url(url)
+        self._pop_script = self.client.register_script(_REDIS_POP_SCRIPT)
+        self._requeue_script = self.client.register_script(_REDIS_REQUEUE_SCRIPT)
+        self._lock_rules_script = self.client.register_script(_REDIS_LOCK_RULES_SCRIPT)
+        prefix = "crawlab_ai:" + name + ":"
+        self._pending_key = prefix + "pending"
+        self._leased_key = prefix + "leased"
+        self._urls_key = prefix + "urls"
+        self._rules_key = prefix + "rules"
+        self._lock_key_prefix = prefix + "rules_lock:"
+
+    def push(self, tasks: Iterable[Task]) -> int:
+        count = 0
+        for task in tasks:
+            if self.client.sadd(self._urls_key, normalize_url(task.url)):
+                task = task._replace(id=uuid.uuid4().hex)
+                self.client.lpush(self._pending_key, task.to_json())
+                count += 1
+        return count
+
+    def pop(self, lease_timeout: float = DEFAULT_LEASE_TIMEOUT) -> Optional[Task]:
+        self._requeue_expired()
+        payload = self._pop_script(
+            keys=[self._pending_key, self._leased_key],
+            args=[time.time() + lease_timeout],
+        )
+        if payload is None:
+            return None
+        return Task.from_json(payload)
+
+    def _requeue_expired(self):
+        for payload in self.client.zrangebyscore(self._leased_key, "-inf", time.time()):
+            # only the worker that removes the lease pushes the task back
+            if self.client.zrem(self._leased_key, payload):
+                self.client.rpush(self._pending_key, payload)
+
+    def done(self, task: Task):
+        self.client.zrem(self._leased_key, task.to_json())
+
+    def requeue(self, task: Task):
+        self._requeue_script(
+            keys=[self._leased_key, self._pending_key],
+            args=[task.to_json(), task._replace(attempts=task.attempts + 1).to_json()],
+        )
+
+    def is_finished(self) -> bool:
+        pipeline = self.client.pipeline()
+        pipeline.llen(self._pending_key)
+        pipeline.zcard(self._leased_key)
+        pending, leased = pipeline.execute()
+        return pending == 0 and leased == 0
+
+    def get_rules(self, key: str) -> Optional[dict]:
+        payload = self.client.hget(self._rules_key, key)
+        return json.loads(payload) if payload is not None else None
+
+    def set_rules(self, key: str, rules: dict):
+        self.client.hset(self._rules_key, key, json.dumps(rules, ensure_ascii=False))
+
+    def lock_rules(self, key: str, timeout: float) -> bool:
+        return bool(
+            self._lock_rules_script(
+                keys=[self._rules_key, self._lock_key_prefix + key],
+                args=[key, int(timeout * 1000)],
+            )
+        )
+
+    def unlock_rules(self, key: str):
+        self.client.delete(self._lock_key_prefix + key)
+
+    def clear(self):
+        keys = [self._pending_key, self._leased_key, self._urls_key, self._rules_key]
+        keys += list(self.client.scan_iter(self._lock_key_prefix + "*"))
+        self.client.delete(*keys)
+
+    def close(self):
+        self.client.close()
+
+
+def get_frontier(url: str, name: str = DEFAULT_FRONTIER_NAME) -> Frontier:
+    """
+    Returns the frontier of a distributed crawl.
+
+    Args:
+        url (str): A Redis URL ("redis://", "rediss://" or "unix://") for a Redis frontier, else the path of a SQLite
+            database file, optionally prefixed with "sqlite:///".
+        name (str): The name of the crawl. Defaults to "default".
+    """
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisFrontier(url, name)
+    if url.startswith("sqlite:///"):
+        url = url[len("sqlite:///") :]
+    return SqliteFrontier(url, name)
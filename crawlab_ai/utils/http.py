@@ -0,0 +1,134 @@
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = 60
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_MAX_BACKOFF = 60
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 20
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_settings = {
+    "timeout": DEFAULT_TIMEOUT,
+    "retries": DEFAULT_RETRIES,
+    "backoff_factor": DEFAULT_BACKOFF_FACTOR,
+    "pool_connections": DEFAULT_POOL_CONNECTIONS,
+    "pool_maxsize": DEFAULT_POOL_MAXSIZE,
+}
+
+# keyed on whether the session retries 429/5xx responses, besides connection errors
+_sessions: Dict[bool, requests.Session] = {}
+_session_lock = threading.Lock()
+
+
+def configure_http(
+    timeout: float = None,
+    retries: int = None,
+    backoff_factor: float = None,
+    pool_connections: int = None,
+    pool_maxsize: int = None,
+):
+    """
+    Configures the shared HTTP client used for rules API calls and page fetches. The retries, backoff, timeout and
+    pool_maxsize also apply to the async client of the async spiders, from the next session it creates.
+
+    Args:
+        timeout (float): Default timeout of a request in seconds.
+        retries (int): Number of retries on connection errors and 429/5xx responses.
+        backoff_factor (float): Base of the exponential backoff between retries in seconds. The n-th retry waits
+            backoff_factor * 2 ** (n - 1) seconds, unless the response sets a Retry-After header.
+        pool_connections (int): Number of hosts to keep connection pools for.
+        pool_maxsize (int): Maximum number of connections kept alive per host. The async client opens no more
+            connections than that to a host.
+    """
+    for key, value in (
+        ("timeout", timeout),
+        ("retries", retries),
+        ("backoff_factor", backoff_factor),
+        ("pool_connections", pool_connections),
+        ("pool_maxsize", pool_maxsize),
+    ):
+        if value is not None:
+            _settings[key] = value
+    with _session_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def get_http_setting(key: str):
+    return _settings[key]
+
+
+def _create_session(retry_status: bool = True) -> requests.Session:
+    retry = Retry(
+        total=_settings["retries"],
+        backoff_factor=_settings["backoff_factor"],
+        status_forcelist=RETRY_STATUS_CODES if retry_status else None,
+        # the rules and code APIs are POST endpoints without side effects, so they are safe to retry
+        allowed_methods=None,
+        respect_retry_after_header=retry_status,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=_settings["pool_connections"],
+        pool_maxsize=_settings["pool_maxsize"],
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session(retry_status: bool = True) -> requests.Session:
+    """
+    Returns the shared requests session, creating it on first use. The session pools connections per host and
+    retries failed requests with exponential backoff.
+
+    Args:
+        retry_status (bool): Whether 429/5xx responses are retried as well as connection errors. Callers that back
+            off on these responses themselves, like HostScheduler, turn it off so that retries do not stack.
+    """
+    session = _sessions.get(retry_status)
+    if session is None:
+        with _session_lock:
+            session = _sessions.get(retry_status)
+            if session is None:
+                session = _sessions[retry_status] = _create_session(retry_status)
+    return session
+
+
+def http_get(url: str, retry_status: bool = True, **kwargs) -> requests.Response:
+    kwargs.setdefault("timeout", _settings["timeout"])
+    return get_session(retry_status).get(url, **kwargs)
+
+
+def http_post(url: str, **kwargs) -> requests.Response:
+    kwargs.setdefault("timeout", _settings["timeout"])
+    return get_session().post(url, **kwargs)
+
+
+def get_retry_delay(attempt: int, retry_after: str = None) -> float:
+    """
+    Returns the number of seconds to wait before the given retry attempt (starting at 1), honoring the value of a
+    Retry-After header if present.
+    """
+    if retry_after:
+        retry_after = retry_after.strip()
+        if retry_after.isdigit():
+            return min(float(retry_after), DEFAULT_MAX_BACKOFF)
+        try:
+            date = parsedate_to_datetime(retry_after)
+            delay = (date - datetime.now(timezone.utc)).total_seconds()
+            return min(max(delay, 0.0), DEFAULT_MAX_BACKOFF)
+        except (TypeError, ValueError):
+            pass
+    return min(_settings["backoff_factor"] * (2 ** (attempt - 1)), DEFAULT_MAX_BACKOFF)
@@ -0,0 +1,264 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, NamedTuple, Optional
+
+from crawlab_ai.utils.http import http_get
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+
+def get_http_cache_path() -> str:
+    if os.getenv("CRAWLAB_AI_HTTP_CACHE_PATH"):
+        return os.getenv("CRAWLAB_AI_HTTP_CACHE_PATH")
+    return os.path.join(os.path.expanduser("~"), ".crawlab", "http_cache.db")
+
+
+class HttpCacheEntry(NamedTuple):
+    """
+    A cached page.
+
+    Attributes:
+        url (str): The URL of the page.
+        etag (str): The ETag header of the response, if any.
+        last_modified (str): The Last-Modified header of the response, if any.
+        text (str): The body of the response.
+    """
+
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    text: str
+
+
+class HttpCache(object):
+    """
+    An on-disk cache of fetched pages, revalidated with conditional requests.
+
+    Pages whose response has an ETag or a Last-Modified header are stored compressed in a SQLite database (by default
+    ``~/.crawlab/http_cache.db``). When such a page is fetched again, the request carries If-None-Match and
+    If-Modified-Since headers, and a 304 Not Modified response is answered from the cache. The data extracted from a
+    page can be stored along with it, so that unchanged pages are not parsed and extracted again. The least recently
+    used pages are evicted once the cache grows beyond ``max_size`` bytes.
+
+    Attributes:
+        path (str): Path of the SQLite database file.
+        max_size (int): Maximum total size of the cached bodies and extracted data in bytes. ``None`` or ``0``
+            disables eviction.
+    """
+
+    def __init__(self, path: str = None, max_size: Optional[int] = DEFAULT_MAX_SIZE):
+        self.path = path or get_http_cache_path()
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            with self._lock:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS http_cache ("
+                    "url TEXT PRIMARY KEY, "
+                    "etag TEXT, "
+                    "last_modified TEXT, "
+                    "body BLOB NOT NULL, "
+                    "extracted TEXT, "
+                    "size INTEGER NOT NULL, "
+                    "fetched_at REAL NOT NULL, "
+                    "accessed_at REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_http_cache_accessed_at "
+                    "ON http_cache (accessed_at)"
+                )
+                conn.commit()
+                self._initialized = True
+        return conn
+
+    def get(self, url: str) -> Optional[HttpCacheEntry]:
+        if not os.path.exists(self.path):
+            return None
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT etag, last_modified, body FROM http_cache WHERE url = ?",
+                (url,),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        etag, last_modified, body = row
+        return HttpCacheEntry(
+            url, etag, last_modified, zlib.decompress(body).decode("utf-8")
+        )
+
+    def set(self, url: str, etag: Optional[str], last_modified: Optional[str], text):
+        """
+        Stores the body of a page along with its validators, replacing the page and its extracted data if cached.
+        """
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        body = zlib.compress(text.encode("utf-8"))
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO http_cache "
+                "(url, etag, last_modified, body, extracted, size, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, NULL, ?, ?, ?)",
+                (url, etag, last_modified, body, len(body), now, now),
+            )
+            self._evict(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_extracted(self, url: str, key: str) -> Optional[Any]:
+        """
+        Returns the data extracted from a cached page with the extraction identified by key, if stored.
+        """
+        if not os.path.exists(self.path):
+            return None
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT extracted FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None or row[0] is None:
+            return None
+        extracted = json.loads(row[0])
+        return extracted["data"] if extracted["key"] == key else None
+
+    def set_extracted(self, url: str, key: str, data: Any):
+        """
+        Stores the data extracted from a cached page. Pages that are not cached are ignored.
+        """
+        if not os.path.exists(self.path):
+            return
+        extracted = json.dumps({"key": key, "data": data}, ensure_ascii=False)
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE http_cache SET extracted = ?, size = LENGTH(body) + ? WHERE url = ?",
+                (extracted, len(extracted.encode("utf-8")), url),
+            )
+            self._evict(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def delete(self, url: str):
+        if not os.path.exists(self.path):
+            return
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def clear(self):
+        if not os.path.exists(self.path):
+            return
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM http_cache")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_size(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM http_cache"
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+    def __len__(self):
+        if not os.path.exists(self.path):
+            return 0
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0]
+        finally:
+            conn.close()
+
+    def fetch(self, url: str, on_status=None, **kwargs) -> tuple[str, bool]:
+        """
+        Fetches a page with the shared HTTP client, revalidating the cached copy if any.
+
+        Args:
+            url (str): The URL of the page.
+            on_status (function): Called with the URL and the status of the response, if given.
+            **kwargs: Other arguments passed to http_get.
+
+        Returns:
+            tuple[str, bool]: The body of the page, and whether it was answered from the cache because the server
+            reported it as not modified.
+        """
+        entry = self.get(url)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        res = http_get(url, headers=headers, **kwargs)
+        if on_status is not None:
+            on_status(url, res.status_code)
+        if res.status_code == 304 and entry is not None:
+            self._touch(url)
+            return entry.text, True
+        etag = res.headers.get("ETag")
+        last_modified = res.headers.get("Last-Modified")
+        if res.status_code == 200 and (etag or last_modified):
+            self.set(url, etag, last_modified, res.text)
+        elif entry is not None and res.status_code < 400:
+            # the page can no longer be revalidated
+            self.delete(url)
+        return res.text, False
+
+    def _touch(self, url: str):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE http_cache SET accessed_at = ? WHERE url = ?",
+                (time.time(), url),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection):
+        if not self.max_size:
+            return
+        # keep the most recently used pages whose sizes add up to at most max_size
+        conn.execute(
+            "DELETE FROM http_cache WHERE url IN ("
+            "SELECT url FROM (SELECT url, SUM(size) OVER "
+            "(ORDER BY accessed_at DESC, url ROWS UNBOUNDED PRECEDING) AS total "
+            "FROM http_cache) WHERE total > ?)",
+            (self.max_size,),
+        )
+
+
+_http_cache: Optional[HttpCache] = None
+
+
+def get_http_cache() -> HttpCache:
+    global _http_cache
+    if _http_cache is None or _http_cache.path != get_http_cache_path():
+        _http_cache = HttpCache()
+    return _http_cache
@@ -0,0 +1,245 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000)
+DEFAULT_PREFIX = "crawlab_ai"
+
+# the histograms of the crawl stages, in seconds
+STAGES = ["rules_api", "fetch", "parse", "extract", "dataframe", "codegen_api"]
+
+# pairs of counters whose ratio is reported as a hit rate
+_HIT_RATES = {
+    "rules_cache": ("rules_cache_hits", "rules_cache_misses"),
+    "rules_template": ("rules_template_hits", "rules_template_misses"),
+    "http_cache": ("http_cache_hits", "http_cache_misses"),
+    "code_cache": ("code_cache_hits", "code_cache_misses"),
+}
+
+
+class Histogram(object):
+    """
+    A histogram of observed values with cumulative buckets, as in Prometheus.
+
+    Attributes:
+        buckets (Sequence[float]): The upper bounds of the buckets, in increasing order.
+        count (int): The number of observed values.
+        sum (float): The sum of the observed values.
+        min (float): The smallest observed value.
+        max (float): The largest observed value.
+    """
+
+    def __init__(self, buckets: Sequence[float] = TIME_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def get_cumulative_counts(self) -> List[int]:
+        cumulative, total = [], 0
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.mean,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+        }
+
+
+class CrawlStats(object):
+    """
+    Counters and histograms of a crawl, shared by the threads of the crawl.
+
+    Spiders record the time spent in each stage (rules API calls, page fetches, parsing, extraction, DataFrame
+    building and code generation) as histograms named after the stage with a "_seconds" suffix, along with counters
+    such as pages, items, bytes downloaded and cache hits and misses. The same object can be passed to several
+    spiders to aggregate their metrics.
+    """
+
+    def __init__(self):
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = None):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(buckets or TIME_BUCKETS)
+            histogram.observe(value)
+
+    @contextmanager
+    def time(self, stage: str):
+        """
+        Records the duration of the block in the histogram of the stage.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage + "_seconds", time.perf_counter() - start)
+
+    def get(self, name: str) -> float:
+        return self.counters.get(name, 0)
+
+    def get_hit_rate(self, name: str) -> Optional[float]:
+        hits, misses = (self.get(counter) for counter in _HIT_RATES[name])
+        total = hits + misses
+        return hits / total if total else None
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            data = {
+                "elapsed_seconds": time.time() - self.started_at,
+                "counters": dict(self.counters),
+                "histograms": {
+                    name: histogram.as_dict()
+                    for name, histogram in sorted(self.histograms.items())
+                },
+            }
+        data["hit_rates"] = {
+            name: self.get_hit_rate(name)
+            for name in _HIT_RATES
+            if self.get_hit_rate(name) is not None
+        }
+        return data
+
+    def to_openmetrics(self, prefix: str = DEFAULT_PREFIX) -> str:
+        """
+        Returns the metrics in the OpenMetrics text format, which Prometheus can scrape.
+        """
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                metric = prefix + "_" + name
+                lines.append("# TYPE " + metric + " counter")
+                lines.append(metric + "_total " + _format_value(value))
+            for name, histogram in sorted(self.histograms.items()):
+                metric = prefix + "_" + name
+                lines.append("# TYPE " + metric + " histogram")
+                if name.endswith("_seconds"):
+                    lines.append("# UNIT " + metric + " seconds")
+                cumulative = histogram.get_cumulative_counts()
+                for bound, count in zip(
+                    list(histogram.buckets) + [math.inf], cumulative
+                ):
+                    lines.append(
+                        metric
+                        + '_bucket{le="'
+                        + _format_value(bound)
+                        + '"} '
+                        + str(count)
+                    )
+                lines.append(metric + "_sum " + _format_value(histogram.sum))
+                lines.append(metric + "_count " + str(histogram.count))
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_openmetrics(self, path: str, prefix: str = DEFAULT_PREFIX):
+        """
+        Writes the metrics in the OpenMetrics text format to a file, e.g. for the textfile collector of the
+        Prometheus node exporter.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_openmetrics(prefix))
+
+    def format(self) -> str:
+        """
+        Returns a human-readable summary of the metrics.
+        """
+        from tabulate import tabulate
+
+        data = self.as_dict()
+        rows = [
+            [
+                name,
+                histogram["count"],
+                "%.3f" % histogram["sum"],
+                "%.4f" % histogram["mean"],
+                "%.4f" % histogram["max"],
+            ]
+            for name, histogram in data["histograms"].items()
+        ]
+        summary = tabulate(
+            rows, headers=["stage", "count", "total (s)", "mean (s)", "max (s)"]
+        )
+        counters = [
+            [name, _format_value(value)]
+            for name, value in sorted(data["counters"].items())
+        ]
+        counters += [
+            [name + "_hit_rate", "%.1f%%" % (rate * 100)]
+            for name, rate in data["hit_rates"].items()
+        ]
+        counters.append(["elapsed_seconds", "%.3f" % data["elapsed_seconds"]])
+        return summary + "\n\n" + tabulate(counters, headers=["counter", "value"])
+
+
+def serve_metrics(
+    stats: CrawlStats, port: int = 9100, host: str = "127.0.0.1", prefix=DEFAULT_PREFIX
+):
+    """
+    Serves the metrics in the OpenMetrics text format over HTTP from a daemon thread, for Prometheus to scrape during
+    long crawls.
+
+    Returns:
+        ThreadingHTTPServer: The server, to be stopped with its shutdown method.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            body = stats.to_openmetrics(prefix).encode("utf-8")
+            self.send_response(200)
+            self.send_header(
+                "Content-Type",
+                "application/openmetrics-text; version=1.0.0; charset=utf-8",
+            )
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
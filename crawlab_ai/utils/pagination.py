@@ -0,0 +1,149 @@
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, unquote_plus
+
+PAGE_PLACEHOLDER = "{n}"
+
+
+class PageUrlTemplate(object):
+    """
+    A URL template such as ``https://example.com/list?page={n}`` that yields the URL of any page of a paginated list.
+
+    Attributes:
+        template (str): The URL with the page number replaced by ``{n}``.
+        start (int): The page number of the second page of the list, i.e. the first page after the start URL.
+        step (int): The increment of the page number between consecutive pages.
+    """
+
+    def __init__(self, template: str, start: int = 2, step: int = 1):
+        if PAGE_PLACEHOLDER not in template:
+            raise ValueError("Page URL template must contain " + PAGE_PLACEHOLDER)
+        self.template = template
+        self.start = start
+        self.step = step
+
+    def get_url(self, index: int) -> str:
+        """
+        Returns the URL of the page at the given zero-based index, where index 0 is the start URL and index 1 is the
+        first page after it.
+        """
+        return self.template.replace(
+            PAGE_PLACEHOLDER, str(self.start + (index - 1) * self.step)
+        )
+
+    def __repr__(self):
+        return "PageUrlTemplate(%r, start=%d, step=%d)" % (
+            self.template,
+            self.start,
+            self.step,
+        )
+
+
+def _to_int(value: Optional[str]) -> Optional[int]:
+    if value is not None and value.isdigit():
+        return int(value)
+    return None
+
+
+def _get_step(current: Optional[int], next_: int) -> Optional[int]:
+    if current is None:
+        # the start URL usually omits the page parameter; page numbers start at 1 or 2, offsets at the page size
+        return 1 if next_ in (1, 2) else next_
+    if next_ > current:
+        return next_ - current
+    return None
+
+
+def _detect_query_template(current, next_) -> Optional[PageUrlTemplate]:
+    current_params = parse_qsl(current.query, keep_blank_values=True)
+    next_params = parse_qsl(next_.query, keep_blank_values=True)
+    current_dict = dict(current_params)
+    changed = [
+        (key, value)
+        for key, value in next_params
+        if current_dict.get(key) != value and _to_int(value) is not None
+    ]
+    if len(changed) != 1:
+        return None
+    key, value = changed[0]
+    others_next = [(k, v) for k, v in next_params if k != key]
+    others_current = [(k, v) for k, v in current_params if k != key]
+    if sorted(others_next) != sorted(others_current):
+        return None
+    step = _get_step(_to_int(current_dict.get(key)), int(value))
+    if step is None:
+        return None
+    parts = []
+    for part in next_.query.split("&"):
+        name = unquote_plus(part.partition("=")[0])
+        parts.append(name + "=" + PAGE_PLACEHOLDER if name == key else part)
+    query = "&".join(parts)
+    template = urlunsplit((next_.scheme, next_.netloc, next_.path, query, ""))
+    return PageUrlTemplate(template, start=int(value), step=step)
+
+
+def _detect_path_template(current, next_) -> Optional[PageUrlTemplate]:
+    if current.query != next_.query:
+        return None
+    current_segments = current.path.rstrip("/").split("/")
+    next_segments = next_.path.rstrip("/").split("/")
+    if len(next_segments) < len(current_segments):
+        return None
+    if next_segments[: len(current_segments)] == current_segments:
+        # e.g. /news -> /news/page/2
+        extra = next_segments[len(current_segments) :]
+        candidates = [
+            len(current_segments) + i
+            for i, segment in enumerate(extra)
+            if _to_int(segment) is not None
+        ]
+        if len(candidates) != 1:
+            return None
+        position = candidates[0]
+        current_value = None
+    else:
+        # e.g. /news/page/2 -> /news/page/3
+        if len(next_segments) != len(current_segments):
+            return None
+        differences = [
+            i for i, (a, b) in enumerate(zip(current_segments, next_segments)) if a != b
+        ]
+        if len(differences) != 1:
+            return None
+        position = differences[0]
+        current_value = _to_int(current_segments[position])
+        if current_value is None or _to_int(next_segments[position]) is None:
+            return None
+    value = int(next_segments[position])
+    step = _get_step(current_value, value)
+    if step is None:
+        return None
+    segments = list(next_segments)
+    segments[position] = PAGE_PLACEHOLDER
+    path = "/".join(segments)
+    if next_.path.endswith("/"):
+        path += "/"
+    template = urlunsplit((next_.scheme, next_.netloc, path, next_.query, ""))
+    return PageUrlTemplate(template, start=value, step=step)
+
+
+def detect_page_url_template(url: str, next_url: str) -> Optional[PageUrlTemplate]:
+    """
+    Detects a page URL template from the URL of a list page and the URL of its next page.
+
+    Only templates in which a single integer (a query parameter or a path segment) changes between the two URLs are
+    detected, since anything else (e.g. cursors or tokens) cannot be predicted.
+
+    Args:
+        url (str): The URL of the current page.
+        next_url (str): The URL of the next page.
+
+    Returns:
+        PageUrlTemplate | None: The detected template, or None if the URLs do not follow a numeric pattern.
+    """
+    current = urlsplit(url)
+    next_ = urlsplit(next_url)
+    if (current.scheme, current.netloc) != (next_.scheme, next_.netloc):
+        return None
+    if current.path == next_.path:
+        return _detect_query_template(current, next_)
+    return _detect_path_template(current, next_)
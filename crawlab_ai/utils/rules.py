@@ -0,0 +1,34 @@
+import json
+import os
+
+
+def load_rules(rules: dict | str) -> dict:
+    """
+    Loads extraction rules given either as a dict or as the path of a JSON file.
+
+    List rules may be given in the form returned by read_list(..., return_rules=True), or as the full response of the
+    rules API, in which case the first model of "model_list" is used.
+
+    Args:
+        rules (dict | str): The rules, or the path of a JSON file containing them.
+
+    Returns:
+        dict: The rules.
+    """
+    if isinstance(rules, (str, os.PathLike)):
+        with open(rules, "r", encoding="utf-8") as f:
+            rules = json.load(f)
+    if not isinstance(rules, dict):
+        raise ValueError("Rules must be a dict or the path of a JSON file")
+    if "model_list" in rules:
+        rules = rules["model_list"][0]
+    return rules
+
+
+def save_rules(rules: dict, path: str):
+    """
+    Saves extraction rules to a JSON file that can be passed back as rules to read_list, read_article or the extract
+    command.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(rules, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_TTL = 7 * 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MEMORY_MAX_ENTRIES = 256
+
+
+def get_rules_cache_path() -> str:
+    if os.getenv("CRAWLAB_AI_RULES_CACHE_PATH"):
+        return os.getenv("CRAWLAB_AI_RULES_CACHE_PATH")
+    return os.path.join(os.path.expanduser("~"), ".crawlab", "rules_cache.db")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so that trivially different spellings share a cache entry.
+
+    The scheme and host are lower-cased, default ports and fragments are dropped, trailing slashes are stripped from
+    the path and query parameters are sorted.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (
+        scheme == "https" and netloc.endswith(":443")
+    ):
+        netloc = netloc.rsplit(":", 1)[0]
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def get_cache_key(kind: str, url: str, fields=None) -> str:
+    payload = json.dumps(
+        [kind, normalize_url(url), fields], sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class RulesCache(object):
+    """
+    An on-disk cache of extraction rules returned by the Crawlab AI API.
+
+    Entries are stored in a SQLite database (by default ``~/.crawlab/rules_cache.db``) and keyed on the kind of rules
+    ("list" or "article"), the normalized URL and the requested fields. Entries older than ``ttl`` seconds are
+    treated as missing, and the least recently used entries are evicted once the cache holds more than
+    ``max_entries`` rules.
+
+    Attributes:
+        path (str): Path of the SQLite database file.
+        ttl (float): Time-to-live of an entry in seconds. ``None`` or ``0`` disables expiry.
+        max_entries (int): Maximum number of entries kept in the cache.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        ttl: Optional[float] = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = path or get_rules_cache_path()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            with self._lock:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS rules ("
+                    "key TEXT PRIMARY KEY, "
+                    "kind TEXT NOT NULL, "
+                    "url TEXT NOT NULL, "
+                    "rules TEXT NOT NULL, "
+                    "created_at REAL NOT NULL, "
+                    "accessed_at REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_rules_accessed_at ON rules (accessed_at)"
+                )
+                conn.commit()
+                self._initialized = True
+        return conn
+
+    def _ensure_directory(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, kind: str, url: str, fields=None) -> Optional[dict]:
+        if not os.path.exists(self.path):
+            return None
+        key = get_cache_key(kind, url, fields)
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT rules, created_at FROM rules WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            rules, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                conn.execute("DELETE FROM rules WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE rules SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return json.loads(rules)
+        finally:
+            conn.close()
+
+    def set(self, kind: str, url: str, fields, rules: dict):
+        self._ensure_directory()
+        key = get_cache_key(kind, url, fields)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO rules (key, kind, url, rules, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, normalize_url(url), json.dumps(rules), now, now),
+            )
+            self._evict(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def delete(self, kind: str, url: str, fields=None):
+        if not os.path.exists(self.path):
+            return
+        conn = self._connect()
+        try:
+            conn.execute(
+                "DELETE FROM rules WHERE key = ?", (get_cache_key(kind, url, fields),)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def clear(self):
+        if not os.path.exists(self.path):
+            return
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM rules")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def __len__(self):
+        if not os.path.exists(self.path):
+            return 0
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM rules").fetchone()[0]
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection):
+        if self.ttl:
+            conn.execute(
+                "DELETE FROM rules WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+        if self.max_entries:
+            conn.execute(
+                "DELETE FROM rules WHERE key NOT IN "
+                "(SELECT key FROM rules ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+
+_rules_cache: Optional[RulesCache] = None
+
+
+def get_rules_cache() -> RulesCache:
+    global _rules_cache
+    if _rules_cache is None or _rules_cache.path != get_rules_cache_path():
+        _rules_cache = RulesCache()
+    return _rules_cache
+
+
+class MemoryRulesCache(object):
+    """
+    A bounded in-memory cache of rules, or of rules compiled for a parser, shared by the threads of a process.
+
+    The least recently used entry is evicted once the cache holds more than ``max_entries`` entries.
+
+    Attributes:
+        max_entries (int): Maximum number of entries kept in the cache.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MEMORY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while self.max_entries and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,407 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from html.parser import HTMLParser
+from typing import List, NamedTuple, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from crawlab_ai.utils.rules_cache import (
+    DEFAULT_MAX_ENTRIES,
+    DEFAULT_TTL,
+    get_rules_cache_path,
+)
+
+DEFAULT_SIMILARITY = 0.9
+DEFAULT_MAX_DEPTH = 12
+
+_ID_PLACEHOLDER = "{id}"
+_VOID_TAGS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "source",
+    "track",
+    "wbr",
+}
+_SKIPPED_TAGS = {"script", "style", "noscript", "svg", "template"}
+# query parameters that page or sort a list without changing its layout
+_IGNORED_QUERY_KEYS = {
+    "page",
+    "p",
+    "pg",
+    "offset",
+    "start",
+    "limit",
+    "per_page",
+    "size",
+    "sort",
+    "order",
+}
+
+
+def get_url_template(url: str) -> str:
+    """
+    Returns the template of a URL: path segments containing digits (ids, dates, page numbers) are replaced with a
+    placeholder, query parameter values are dropped and paging or sorting parameters are ignored. For example, both
+    https://example.com/p/123?id=1&page=2 and https://example.com/p/456?id=2 have the template example.com/p/{id}?id.
+    """
+    parts = urlsplit(url.strip())
+    segments = []
+    for segment in parts.path.strip("/").split("/"):
+        name, dot, extension = segment.rpartition(".")
+        if not dot or not extension.isalpha():
+            name, extension = segment, ""
+        if any(c.isdigit() for c in name):
+            name = _ID_PLACEHOLDER
+        segments.append(name + ("." + extension if extension else ""))
+    template = parts.netloc.lower() + "/" + "/".join(segments)
+    keys = sorted(
+        {
+            key
+            for key, _ in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in _IGNORED_QUERY_KEYS
+        }
+    )
+    if keys:
+        template += "?" + "&".join(keys)
+    return template
+
+
+class _SkeletonParser(HTMLParser):
+    def __init__(self, max_depth: int):
+        super().__init__(convert_charrefs=False)
+        self.max_depth = max_depth
+        self.paths = set()
+        self._stack = []
+        self._skipping = None
+
+    def handle_starttag(self, tag, attrs):
+        if self._skipping is not None:
+            return
+        if tag in _SKIPPED_TAGS:
+            self._skipping = tag
+            return
+        if len(self._stack) >= self.max_depth:
+            if tag not in _VOID_TAGS:
+                self._stack.append(None)
+            return
+        classes = ""
+        for name, value in attrs:
+            if name == "class" and value:
+                # generated class names such as css-1x2y3z differ between builds of the same layout
+                classes = ".".join(
+                    sorted(c for c in value.split() if not re.search(r"\d", c))
+                )
+        node = tag + ("." + classes if classes else "")
+        path = "/".join(n for n in self._stack if n) + "/" + node
+        self.paths.add(zlib.crc32(path.encode("utf-8")))
+        if tag not in _VOID_TAGS:
+            self._stack.append(node)
+
+    def handle_endtag(self, tag):
+        if self._skipping is not None:
+            if tag == self._skipping:
+                self._skipping = None
+            return
+        # pop up to the matching start tag, tolerating unclosed elements
+        for i in range(len(self._stack) - 1, -1, -1):
+            node = self._stack[i]
+            if node is not None and node.split(".", 1)[0] == tag:
+                del self._stack[i:]
+                return
+
+
+def get_dom_fingerprint(html: str, max_depth: int = DEFAULT_MAX_DEPTH) -> List[int]:
+    """
+    Returns the fingerprint of the skeleton of a page: the sorted hashes of the distinct tag paths of its elements,
+    e.g. html/body/div.content/ul.list/li.item, ignoring text, attributes other than class, scripts and styles.
+    Pages rendered from the same template share most of their tag paths whatever their content.
+    """
+    parser = _SkeletonParser(max_depth)
+    parser.feed(html or "")
+    parser.close()
+    return sorted(parser.paths)
+
+
+def get_similarity(fingerprint: List[int], other: List[int]) -> float:
+    """
+    Returns the Jaccard similarity of two DOM fingerprints.
+    """
+    a, b = set(fingerprint), set(other)
+    if not a and not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class RulesTemplate(NamedTuple):
+    """
+    Rules learned for a page layout.
+
+    Attributes:
+        url (str): The URL the rules were generated for.
+        url_template (str): The template of the URL.
+        fingerprint (List[int]): The DOM fingerprint of the page, or None if it is unknown.
+        rules (dict): The rules.
+    """
+
+    url: str
+    url_template: str
+    fingerprint: Optional[List[int]]
+    rules: dict
+
+
+class RulesTemplateStats(object):
+    """
+    Counts of the rules lookups resolved by URL template, by DOM fingerprint or by the rules API.
+    """
+
+    def __init__(self):
+        self.url_hits = 0
+        self.dom_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def record(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.url_hits + self.dom_hits + self.misses
+        return (self.url_hits + self.dom_hits) / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "url_hits": self.url_hits,
+            "dom_hits": self.dom_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class RulesTemplates(object):
+    """
+    Rules learned per page layout, so that pages of a known layout reuse the rules of another page instead of calling
+    the rules API.
+
+    A page matches a known layout if its URL has the same template (see get_url_template), or else if the DOM
+    fingerprint of its HTML (see get_dom_fingerprint) is similar enough to the one of a page of the same host. The
+    templates are stored next to the rules cache in the same SQLite database, with the same expiry and size bound.
+
+    Attributes:
+        path (str): Path of the SQLite database file.
+        similarity (float): Minimum Jaccard similarity of two DOM fingerprints for the pages to share rules.
+        ttl (float): Time-to-live of a template in seconds. ``None`` or ``0`` disables expiry.
+        max_entries (int): Maximum number of templates kept.
+        stats (RulesTemplateStats): Hit and miss counts of the lookups.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        similarity: float = DEFAULT_SIMILARITY,
+        ttl: Optional[float] = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = path or get_rules_cache_path()
+        self.similarity = similarity
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = RulesTemplateStats()
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            with self._lock:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS rules_templates ("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                    "kind TEXT NOT NULL, "
+                    "host TEXT NOT NULL, "
+                    "fields TEXT NOT NULL, "
+                    "url TEXT NOT NULL, "
+                    "url_template TEXT NOT NULL, "
+                    "fingerprint TEXT, "
+                    "rules TEXT NOT NULL, "
+                    "created_at REAL NOT NULL, "
+                    "accessed_at REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_rules_templates_host "
+                    "ON rules_templates (kind, host, fields)"
+                )
+                # one template per URL template, keeping the latest of those recorded before it was enforced
+                conn.execute(
+                    "DELETE FROM rules_templates WHERE id NOT IN "
+                    "(SELECT MAX(id) FROM rules_templates GROUP BY kind, host, fields, url_template)"
+                )
+                conn.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS idx_rules_templates_url_template "
+                    "ON rules_templates (kind, host, fields, url_template)"
+                )
+                conn.commit()
+                self._initialized = True
+        return conn
+
+    def _get_templates(self, kind: str, url: str, fields) -> List[tuple]:
+        if not os.path.exists(self.path):
+            return []
+        conn = self._connect()
+        try:
+            min_created_at = time.time() - self.ttl if self.ttl else 0
+            return conn.execute(
+                "SELECT id, url, url_template, fingerprint, rules FROM rules_templates "
+                "WHERE kind = ? AND host = ? AND fields = ? AND created_at >= ? "
+                "ORDER BY created_at DESC",
+                (kind, _get_host(url), _get_fields_key(fields), min_created_at),
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def _touch(self, template_id: int):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE rules_templates SET accessed_at = ? WHERE id = ?",
+                (time.time(), template_id),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def match_url(self, kind: str, url: str, fields=None) -> Optional[RulesTemplate]:
+        """
+        Returns the rules of a known page whose URL has the same template as the given URL, if any.
+        """
+        url_template = get_url_template(url)
+        for (
+            template_id,
+            template_url,
+            template,
+            fingerprint,
+            rules,
+        ) in self._get_templates(kind, url, fields):
+            if template == url_template:
+                self._touch(template_id)
+                self.stats.record("url_hits")
+                return _to_template(template_url, template, fingerprint, rules)
+        return None
+
+    def match_dom(
+        self, kind: str, url: str, fields, html: str
+    ) -> Optional[RulesTemplate]:
+        """
+        Returns the rules of the known page of the same host whose DOM fingerprint is the most similar to the one of
+        the given HTML, if the similarity reaches the threshold.
+        """
+        fingerprint = get_dom_fingerprint(html)
+        best, best_similarity = None, self.similarity
+        for row in self._get_templates(kind, url, fields):
+            if row[3] is None:
+                continue
+            similarity = get_similarity(fingerprint, json.loads(row[3]))
+            if similarity >= best_similarity:
+                best, best_similarity = row, similarity
+        if best is None:
+            return None
+        self._touch(best[0])
+        self.stats.record("dom_hits")
+        return _to_template(*best[1:])
+
+    def add(self, kind: str, url: str, fields, rules: dict, html: str = None):
+        """
+        Records the rules fetched for a page, along with the DOM fingerprint of its HTML if given. They replace the
+        rules recorded for a page with the same URL template, e.g. rules fetched again because they were out of date.
+        """
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        fingerprint = json.dumps(get_dom_fingerprint(html)) if html else None
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO rules_templates "
+                "(kind, host, fields, url, url_template, fingerprint, rules, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    kind,
+                    _get_host(url),
+                    _get_fields_key(fields),
+                    url,
+                    get_url_template(url),
+                    fingerprint,
+                    json.dumps(rules),
+                    now,
+                    now,
+                ),
+            )
+            self._evict(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def clear(self):
+        if not os.path.exists(self.path):
+            return
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM rules_templates")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection):
+        if self.ttl:
+            conn.execute(
+                "DELETE FROM rules_templates WHERE created_at < ?",
+                (time.time() - self.ttl,),
+            )
+        if self.max_entries:
+            conn.execute(
+                "DELETE FROM rules_templates WHERE id NOT IN "
+                "(SELECT id FROM rules_templates ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+
+def _get_host(url: str) -> str:
+    return urlsplit(url.strip()).netloc.lower()
+
+
+def _get_fields_key(fields) -> str:
+    return json.dumps(fields, sort_keys=True, ensure_ascii=False)
+
+
+def _to_template(
+    url: str, url_template: str, fingerprint: Optional[str], rules: str
+) -> RulesTemplate:
+    return RulesTemplate(
+        url,
+        url_template,
+        json.loads(fingerprint) if fingerprint else None,
+        json.loads(rules),
+    )
+
+
+_rules_templates: Optional[RulesTemplates] = None
+
+
+def get_rules_templates() -> RulesTemplates:
+    global _rules_templates
+    if _rules_templates is None or _rules_templates.path != get_rules_cache_path():
+        _rules_templates = RulesTemplates()
+    return _rules_templates
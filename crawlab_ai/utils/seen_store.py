@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Set
+from urllib.parse import urlsplit
+
+DEFAULT_MAX_ITEMS_PER_SITE = 100000
+
+_URL_FIELD_NAMES = {"url", "link", "href", "permalink"}
+
+
+def get_seen_store_path() -> str:
+    if os.getenv("CRAWLAB_AI_SEEN_STORE_PATH"):
+        return os.getenv("CRAWLAB_AI_SEEN_STORE_PATH")
+    return os.path.join(os.path.expanduser("~"), ".crawlab", "seen_items.db")
+
+
+def get_site(url: str) -> str:
+    return urlsplit(url.strip()).netloc.lower()
+
+
+def get_item_fingerprint(row: dict, key_fields: List[str] = None) -> int:
+    """
+    Returns a 64-bit fingerprint of a list item.
+
+    The item is identified by the values of the key fields if given, else by its URL field (a field named like url,
+    link or href) if it has one, else by all its values.
+    """
+    if key_fields:
+        values = [row.get(name) for name in key_fields]
+    else:
+        values = [
+            value
+            for name, value in sorted(row.items())
+            if value and _is_url_field(name)
+        ][:1] or sorted(row.items())
+    payload = json.dumps(values, ensure_ascii=False, default=str)
+    digest = hashlib.blake2b(payload.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _is_url_field(name: str) -> bool:
+    name = name.lower()
+    return name in _URL_FIELD_NAMES or name.endswith("_url") or name.endswith("_link")
+
+
+class SeenStore(object):
+    """
+    An on-disk store of the fingerprints of the list items seen on each site, for incremental crawls.
+
+    Fingerprints are stored as 64-bit integers in a SQLite database (by default ``~/.crawlab/seen_items.db``). Only
+    the ``max_items_per_site`` most recently seen fingerprints of a site are kept, which is plenty for a feed whose
+    crawls stop at the first page of items already seen.
+
+    Attributes:
+        path (str): Path of the SQLite database file.
+        max_items_per_site (int): Maximum number of fingerprints kept per site. ``None`` or ``0`` keeps them all.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        max_items_per_site: Optional[int] = DEFAULT_MAX_ITEMS_PER_SITE,
+    ):
+        self.path = path or get_seen_store_path()
+        self.max_items_per_site = max_items_per_site
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            with self._lock:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS seen_items ("
+                    "site TEXT NOT NULL, "
+                    "fingerprint INTEGER NOT NULL, "
+                    "seen_at REAL NOT NULL, "
+                    "PRIMARY KEY (site, fingerprint))"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_seen_items_seen_at "
+                    "ON seen_items (site, seen_at)"
+                )
+                conn.commit()
+                self._initialized = True
+        return conn
+
+    def get_seen(self, site: str, fingerprints: Iterable[int]) -> Set[int]:
+        """
+        Returns the fingerprints among the given ones that were already seen on the site.
+        """
+        fingerprints = list(set(fingerprints))
+        if not fingerprints or not os.path.exists(self.path):
+            return set()
+        seen = set()
+        conn = self._connect()
+        try:
+            # stay below the limit on the number of SQL variables
+            for i in range(0, len(fingerprints), 500):
+                chunk = fingerprints[i : i + 500]
+                seen.update(
+                    fingerprint
+                    for fingerprint, in conn.execute(
+                        "SELECT fingerprint FROM seen_items WHERE site = ? AND fingerprint IN ("
+                        + ", ".join("?" * len(chunk))
+                        + ")",
+                        [site, *chunk],
+                    )
+                )
+        finally:
+            conn.close()
+        return seen
+
+    def add(self, site: str, fingerprints: Iterable[int]):
+        fingerprints = list(fingerprints)
+        if not fingerprints:
+            return
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO seen_items (site, fingerprint, seen_at) VALUES (?, ?, ?)",
+                [(site, fingerprint, now) for fingerprint in fingerprints],
+            )
+            self._evict(conn, site)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def clear(self, site: str = None):
+        if not os.path.exists(self.path):
+            return
+        conn = self._connect()
+        try:
+            if site is None:
+                conn.execute("DELETE FROM seen_items")
+            else:
+                conn.execute("DELETE FROM seen_items WHERE site = ?", (site,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def count(self, site: str) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT COUNT(*) FROM seen_items WHERE site = ?", (site,)
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection, site: str):
+        if not self.max_items_per_site:
+            return
+        conn.execute(
+            "DELETE FROM seen_items WHERE site = ? AND rowid IN ("
+            "SELECT rowid FROM seen_items WHERE site = ? ORDER BY seen_at DESC LIMIT -1 OFFSET ?)",
+            (site, site, self.max_items_per_site),
+        )
+
+
+_seen_store: Optional[SeenStore] = None
+
+
+def get_seen_store() -> SeenStore:
+    global _seen_store
+    if _seen_store is None or _seen_store.path != get_seen_store_path():
+        _seen_store = SeenStore()
+    return _seen_store
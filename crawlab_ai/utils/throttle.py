@@ -0,0 +1,292 @@
+import asyncio
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from crawlab_ai.utils.http import DEFAULT_MAX_BACKOFF, get_retry_delay, http_get
+from crawlab_ai.utils.logger import logger
+
+BACKOFF_STATUS_CODES = (429, 503)
+DEFAULT_BACKOFF = 1.0
+DEFAULT_ROBOTS_TTL = 24 * 60 * 60
+DEFAULT_ROBOTS_TIMEOUT = 10
+
+
+class RobotsDisallowedError(Exception):
+    """
+    Raised when robots.txt disallows fetching a URL.
+    """
+
+
+class RobotsCache(object):
+    """
+    Fetches and caches the robots.txt file of each site.
+
+    As with urllib.robotparser, a robots.txt answered with 401 or 403 disallows the whole site and any other client
+    error allows it. Sites whose robots.txt cannot be fetched are allowed.
+
+    Attributes:
+        user_agent (str): The user agent the rules are looked up for.
+        ttl (float): The number of seconds a robots.txt file is cached for.
+    """
+
+    def __init__(self, user_agent: str = "*", ttl: float = DEFAULT_ROBOTS_TTL):
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._parsers = {}
+        self._fetch_locks = {}
+
+    def get_parser(self, url: str) -> RobotFileParser:
+        parts = urlsplit(url)
+        key = parts.scheme + "://" + parts.netloc
+        with self._lock:
+            entry = self._parsers.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                return entry[0]
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+        # fetch each robots.txt once, while the other sites are not blocked
+        with fetch_lock:
+            with self._lock:
+                entry = self._parsers.get(key)
+                if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                    return entry[0]
+            parser = self._fetch(key + "/robots.txt")
+            with self._lock:
+                self._parsers[key] = (parser, time.monotonic())
+            return parser
+
+    @staticmethod
+    def _fetch(robots_url: str) -> RobotFileParser:
+        parser = RobotFileParser(robots_url)
+        try:
+            res = http_get(robots_url, timeout=DEFAULT_ROBOTS_TIMEOUT)
+        except Exception as e:
+            logger.warning("Failed to fetch %s: %s", robots_url, e)
+            parser.allow_all = True
+        else:
+            if res.status_code in (401, 403):
+                parser.disallow_all = True
+            elif res.status_code >= 400:
+                parser.allow_all = True
+            else:
+                parser.parse(res.text.splitlines())
+        # can_fetch() treats a parser that was never marked as read as disallowing everything
+        parser.modified()
+        return parser
+
+    def can_fetch(self, url: str) -> bool:
+        return self.get_parser(url).can_fetch(self.user_agent, url)
+
+    def get_crawl_delay(self, url: str) -> Optional[float]:
+        delay = self.get_parser(url).crawl_delay(self.user_agent)
+        return float(delay) if delay is not None else None
+
+
+class _HostState(object):
+    def __init__(self, concurrency: int, burst: int, delay: float):
+        self.semaphore = threading.Semaphore(concurrency)
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.delay = delay
+        self.next_start = 0.0
+        self.backoff = 0.0
+        self.blocked_until = 0.0
+
+
+class HostScheduler(object):
+    """
+    Schedules page fetches across many hosts politely: each host gets its own concurrency limit, token-bucket rate
+    limit, minimum delay and adaptive backoff, while a global limit bounds the fetches in flight over all hosts.
+
+    When a host answers 429 or 503, fetches to it are paused for the Retry-After delay, or else for an exponential
+    backoff that is halved again by each successful response. If robots.txt is respected, disallowed URLs raise
+    RobotsDisallowedError and the Crawl-delay of a site is used as its minimum delay if it is longer.
+
+    Attributes:
+        per_host_concurrency (int): The maximum number of concurrent fetches per host.
+        max_concurrency (int): The maximum number of concurrent fetches over all hosts. Defaults to no limit.
+        per_host_rate (float): The maximum number of fetches per second per host. Defaults to no limit.
+        burst (int): The number of fetches a host may get at once before the rate limit applies.
+        per_host_delay (float): The minimum number of seconds between the starts of two fetches from the same host.
+        respect_robots (bool): Whether to check robots.txt before fetching a URL.
+        retries (int): The number of times a fetch answered with 429 or 503 is retried after the backoff.
+        robots (RobotsCache): The cache of robots.txt files.
+    """
+
+    def __init__(
+        self,
+        per_host_concurrency: int = 2,
+        max_concurrency: int = None,
+        per_host_rate: float = None,
+        burst: int = 1,
+        per_host_delay: float = 0.0,
+        respect_robots: bool = False,
+        user_agent: str = "*",
+        retries: int = 2,
+    ):
+        self.per_host_concurrency = per_host_concurrency
+        self.max_concurrency = max_concurrency
+        self.per_host_rate = per_host_rate
+        self.burst = burst
+        self.per_host_delay = per_host_delay
+        self.respect_robots = respect_robots
+        self.retries = retries
+        self.robots = RobotsCache(user_agent)
+        self._lock = threading.Lock()
+        self._hosts = {}
+        self._global_semaphore = (
+            threading.Semaphore(max_concurrency) if max_concurrency else None
+        )
+
+    def _get_host(self, url: str) -> _HostState:
+        host = urlsplit(url).netloc
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is not None:
+                return state
+        delay = self.per_host_delay
+        if self.respect_robots:
+            crawl_delay = self.robots.get_crawl_delay(url)
+            if crawl_delay is not None and crawl_delay > delay:
+                delay = crawl_delay
+        with self._lock:
+            return self._hosts.setdefault(
+                host, _HostState(self.per_host_concurrency, self.burst, delay)
+            )
+
+    def _reserve(self, state: _HostState) -> float:
+        """
+        Reserves the next start time of a fetch from the host and returns the number of seconds to wait for it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, state.next_start, state.blocked_until)
+            if self.per_host_rate:
+                state.tokens = min(
+                    float(self.burst),
+                    state.tokens + (now - state.updated_at) * self.per_host_rate,
+                )
+                state.updated_at = now
+                # a negative balance is the number of tokens already promised to waiting fetches
+                state.tokens -= 1
+                if state.tokens < 0:
+                    start = max(start, now - state.tokens / self.per_host_rate)
+            state.next_start = start + state.delay
+            return start - now
+
+    def _wait_for_backoff(self, state: _HostState):
+        while True:
+            with self._lock:
+                wait = state.blocked_until - time.monotonic()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    @contextmanager
+    def limit(self, url: str):
+        state = self._get_host(url)
+        with state.semaphore:
+            time.sleep(self._reserve(state))
+            self._wait_for_backoff(state)
+            if self._global_semaphore is None:
+                yield
+            else:
+                with self._global_semaphore:
+                    yield
+
+    def record(self, url: str, status: int, retry_after: str = None):
+        """
+        Records the status of a response from the host of the URL, to adapt the backoff of the host.
+        """
+        state = self._get_host(url)
+        with self._lock:
+            if status in BACKOFF_STATUS_CODES:
+                state.backoff = min(
+                    max(state.backoff * 2, DEFAULT_BACKOFF), DEFAULT_MAX_BACKOFF
+                )
+                delay = (
+                    get_retry_delay(1, retry_after) if retry_after else state.backoff
+                )
+                state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+                logger.warning(
+                    "Backing off %s for %.1fs after HTTP status %s",
+                    urlsplit(url).netloc,
+                    delay,
+                    status,
+                )
+            elif status < 400 and state.backoff:
+                state.backoff = state.backoff / 2 if state.backoff > 0.1 else 0.0
+
+    def check_robots(self, url: str):
+        if self.respect_robots and not self.robots.can_fetch(url):
+            raise RobotsDisallowedError("Disallowed by robots.txt: " + url)
+
+    def wrap(self, get_html=None, on_status=None):
+        """
+        Returns a get_html function that fetches pages within the limits of their host.
+
+        Args:
+            get_html (function): The function to fetch a page with. Defaults to the shared HTTP client, whose response
+                statuses drive the backoff, without the retries of the client on these statuses. With a custom
+                function, the backoff is driven by the exceptions it raises with a 429 or 503 status, e.g.
+                requests.HTTPError. Pass a regular function: an async one is run in a new event loop for each page,
+                while the limit of its host is held.
+            on_status (function): Called with the URL and the status of each response of the shared HTTP client.
+        """
+
+        def scheduled_get_html(url):
+            self.check_robots(url)
+            attempt = 0
+            while True:
+                retry_after = None
+                try:
+                    with self.limit(url):
+                        if get_html is None:
+                            # 429/5xx responses are retried here only, after the backoff and outside the limits
+                            res = http_get(url, retry_status=False)
+                            status = res.status_code
+                            if on_status is not None:
+                                on_status(url, status)
+                            retry_after = res.headers.get("Retry-After")
+                            html = res.text
+                        else:
+                            html = get_html(url)
+                            if inspect.isawaitable(html):
+                                html = asyncio.run(html)
+                            status = 200
+                except Exception as e:
+                    status = _get_error_status(e)
+                    if status not in BACKOFF_STATUS_CODES:
+                        raise
+                    self.record(url, status, _get_error_retry_after(e))
+                    if attempt >= self.retries:
+                        raise
+                    attempt += 1
+                    continue
+                self.record(url, status, retry_after)
+                if status not in BACKOFF_STATUS_CODES or attempt >= self.retries:
+                    return html
+                attempt += 1
+
+        return scheduled_get_html
+
+
+def _get_error_status(e: Exception) -> Optional[int]:
+    # requests.HTTPError carries the response, aiohttp.ClientResponseError the status
+    response = getattr(e, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is None:
+        status = getattr(e, "status", None)
+    return status if isinstance(status, int) else None
+
+
+def _get_error_retry_after(e: Exception) -> Optional[str]:
+    headers = getattr(getattr(e, "response", None), "headers", None) or getattr(
+        e, "headers", None
+    )
+    return headers.get("Retry-After") if headers else None
@@ -0,0 +1,126 @@
+import csv
+import json
+import sys
+from typing import List, Optional
+
+FORMATS = ["jsonl", "csv", "parquet"]
+
+
+class JsonlWriter(object):
+    """
+    Writes rows as JSON lines, flushing after each batch.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._file = open(path, "w", encoding="utf-8") if path else sys.stdout
+
+    def write_rows(self, rows: List[dict]):
+        for row in rows:
+            self._file.write(json.dumps(row, ensure_ascii=False))
+            self._file.write("\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class CsvWriter(object):
+    """
+    Writes rows as CSV with a header of the given field names, flushing after each batch. Fields that are not in the
+    header are ignored.
+    """
+
+    def __init__(self, field_names: List[str], path: Optional[str] = None):
+        self._file = (
+            open(path, "w", encoding="utf-8", newline="") if path else sys.stdout
+        )
+        self._writer = csv.DictWriter(
+            self._file, fieldnames=field_names, extrasaction="ignore"
+        )
+        self._writer.writeheader()
+
+    def write_rows(self, rows: List[dict]):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class ParquetWriter(object):
+    """
+    Writes rows to a Parquet file of string columns, one row group per batch. Requires pyarrow.
+    """
+
+    def __init__(self, field_names: List[str], path: str):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError(
+                "pyarrow is required to write Parquet files. Install it with: pip install pyarrow"
+            )
+        if not path:
+            raise ValueError("An output file path is required to write Parquet files")
+        self._pyarrow = pyarrow
+        self._field_names = field_names
+        self._schema = pyarrow.schema(
+            [(name, pyarrow.string()) for name in field_names]
+        )
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+
+    def write_rows(self, rows: List[dict]):
+        if not rows:
+            return
+        columns = {
+            name: [_to_str(row.get(name)) for row in rows] for name in self._field_names
+        }
+        self._writer.write_table(
+            self._pyarrow.Table.from_pydict(columns, schema=self._schema)
+        )
+
+    def close(self):
+        self._writer.close()
+
+
+def _to_str(value) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return str(value)
+
+
+def get_writer(format_: str, field_names: List[str], path: Optional[str] = None):
+    """
+    Returns an incremental writer of the given format.
+
+    Args:
+        format_ (str): "jsonl", "csv" or "parquet".
+        field_names (List[str]): The names of the fields of the rows, used as CSV header and Parquet schema.
+        path (str): The output file path. Defaults to stdout for JSON lines and CSV.
+    """
+    if format_ == "jsonl":
+        return JsonlWriter(path)
+    elif format_ == "csv":
+        return CsvWriter(field_names, path)
+    elif format_ == "parquet":
+        return ParquetWriter(field_names, path)
+    raise ValueError(
+        "Unknown format: %s. Available formats: %s" % (format_, ", ".join(FORMATS))
+    )
+
+
+def get_format(path: Optional[str]) -> Optional[str]:
+    """
+    Returns the format matching the extension of the given file path, if any.
+    """
+    if not path:
+        return None
+    if path.endswith(".csv"):
+        return "csv"
+    if path.endswith(".parquet"):
+        return "parquet"
+    if path.endswith(".jsonl") or path.endswith(".json"):
+        return "jsonl"
+    return None
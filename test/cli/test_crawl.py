@@ -0,0 +1,77 @@
+import csv
+
+import pytest
+
+import crawlab_ai.spider.batch
+from crawlab_ai.cli import parser
+from crawlab_ai.spider.batch import BatchResult
+
+
+def _rules(*names):
+    return {"list_model": {"fields": [{"name": name} for name in names]}}
+
+
+def test_batch_crawl_to_csv_keeps_the_fields_of_all_sites(tmp_path, monkeypatch):
+    monkeypatch.setenv("CRAWLAB_TOKEN", "token")
+    monkeypatch.setenv("CRAWLAB_AI_RULES_CACHE_PATH", str(tmp_path / "cache.db"))
+
+    def iter_lists(urls, **kwargs):
+        yield BatchResult(
+            0, urls[0], [{"title": "a", "price": "1"}], _rules("title", "price"), None
+        )
+        yield BatchResult(
+            1, urls[1], [{"title": "b", "author": "c"}], _rules("title", "author"), None
+        )
+
+    monkeypatch.setattr(crawlab_ai.spider.batch, "iter_lists", iter_lists)
+    (tmp_path / "urls.txt").write_text("https://example.com/\nhttps://example.org/\n")
+    args = parser.parse_args(
+        ["crawl", "-i", str(tmp_path / "urls.txt"), "-o", str(tmp_path / "items.csv")]
+    )
+    args.func(args)
+
+    with open(tmp_path / "items.csv", newline="") as f:
+        reader = csv.DictReader(f)
+        assert reader.fieldnames == ["source_url", "title", "price", "author"]
+        rows = list(reader)
+    assert rows == [
+        {
+            "source_url": "https://example.com/",
+            "title": "a",
+            "price": "1",
+            "author": "",
+        },
+        {
+            "source_url": "https://example.org/",
+            "title": "b",
+            "price": "",
+            "author": "c",
+        },
+    ]
+
+
+def test_batch_crawl_fails_when_a_url_fails(tmp_path, monkeypatch):
+    monkeypatch.setenv("CRAWLAB_TOKEN", "token")
+    monkeypatch.setenv("CRAWLAB_AI_RULES_CACHE_PATH", str(tmp_path / "cache.db"))
+
+    def iter_articles(urls, **kwargs):
+        yield BatchResult(0, urls[0], {"url": urls[0], "title": "a"}, {}, None)
+        yield BatchResult(1, urls[1], None, None, ValueError("No article found"))
+
+    monkeypatch.setattr(crawlab_ai.spider.batch, "iter_articles", iter_articles)
+    (tmp_path / "urls.txt").write_text("https://example.com/\nhttps://example.org/\n")
+    args = parser.parse_args(
+        [
+            "crawl",
+            "-i",
+            str(tmp_path / "urls.txt"),
+            "-t",
+            "article",
+            "-o",
+            str(tmp_path / "items.jsonl"),
+        ]
+    )
+    with pytest.raises(SystemExit, match="Failed to crawl 1 URLs"):
+        args.func(args)
+    # the items of the other URLs are still written
+    assert len((tmp_path / "items.jsonl").read_text().splitlines()) == 1
@@ -0,0 +1,39 @@
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = [
+    "pandas",
+    "scrapy",
+    "twisted",
+    "aiohttp",
+    "bs4",
+    "tabulate",
+    "requests",
+    "urllib3",
+]
+
+
+def _get_loaded_modules(code: str) -> list:
+    script = (
+        code
+        + "\nimport json, sys\nprint(json.dumps([m for m in %r if m in sys.modules]))"
+        % HEAVY_MODULES
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def test_package_import_does_not_load_heavy_dependencies():
+    assert _get_loaded_modules("import crawlab_ai") == []
+
+
+def test_cli_import_does_not_load_heavy_dependencies():
+    assert _get_loaded_modules("import crawlab_ai.cli") == []
+
+
+def test_exports_are_loaded_on_access():
+    assert "scrapy" not in _get_loaded_modules("from crawlab_ai import read_list")
+    assert "scrapy" in _get_loaded_modules("from crawlab_ai import ScrapyListSpider")
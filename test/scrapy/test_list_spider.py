@@ -0,0 +1,62 @@
+import json
+
+from scrapy.http import HtmlResponse, JsonRequest, Request, TextResponse
+
+from crawlab_ai.scrapy.list_spider import ScrapyListSpider
+from test.spider.test_list_spider import RULES, _render_page
+
+
+class _Spider(ScrapyListSpider):
+    name = "test_list_spider"
+    use_cache = False
+    start_urls = [
+        "https://a.example.com/list/1",
+        "https://a.example.com/list/2",
+        "https://b.example.com/list",
+    ]
+
+
+def test_start_requests_fetch_rules_once_per_domain(monkeypatch):
+    monkeypatch.setenv("CRAWLAB_TOKEN", "test-token")
+    spider = _Spider()
+    requests = list(spider.start_requests())
+    assert all(isinstance(request, JsonRequest) for request in requests)
+    assert [json.loads(request.body)["url"] for request in requests] == [
+        "https://a.example.com/list/1",
+        "https://b.example.com/list",
+    ]
+
+    rules_response = TextResponse(
+        requests[0].url,
+        body=json.dumps({"model_list": [RULES]}).encode(),
+        request=requests[0],
+    )
+    start_requests = list(spider._parse_rules(rules_response, **requests[0].cb_kwargs))
+    assert [request.url for request in start_requests] == [
+        "https://a.example.com/list/1",
+        "https://a.example.com/list/2",
+    ]
+
+    page = HtmlResponse(
+        start_requests[0].url,
+        body=_render_page(1, 2).encode(),
+        request=start_requests[0],
+    )
+    results = list(spider.parse(page, **start_requests[0].cb_kwargs))
+    items = [result for result in results if isinstance(result, dict)]
+    assert [item["text"] for item in items] == [
+        " quote 1-0 ",
+        " quote 1-1 ",
+        " quote 1-2 ",
+    ]
+    next_request = results[-1]
+    assert isinstance(next_request, Request)
+    assert next_request.url == "https://a.example.com/page/2/"
+    assert next_request.cb_kwargs == {"rules_domain": "a.example.com"}
+
+
+def test_given_rules_skip_the_rules_api():
+    spider = _Spider(rules=RULES)
+    requests = list(spider.start_requests())
+    assert [request.url for request in requests] == _Spider.start_urls
+    assert not any(isinstance(request, JsonRequest) for request in requests)
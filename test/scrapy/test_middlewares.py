@@ -0,0 +1,77 @@
+import asyncio
+
+from scrapy import Request, Spider
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from crawlab_ai.scrapy.middlewares import CrawlabRulesMiddleware
+from crawlab_ai.scrapy.rules import CompiledRules, get_compiled_rules_cache
+from test.spider.test_list_spider import RULES, _render_page
+
+
+class _Spider(Spider):
+    name = "test_plain_spider"
+
+    def parse(self, response, **kwargs):
+        yield {"url": response.url}
+
+
+def _get_response(meta: dict = None) -> HtmlResponse:
+    request = Request("https://example.com/page/1/", meta=meta or {})
+    return HtmlResponse(request.url, body=_render_page(1, 2).encode(), request=request)
+
+
+def _process(middleware, response, spider) -> list:
+    async def spider_output():
+        for output in spider.parse(response):
+            yield output
+
+    async def run():
+        return [
+            output
+            async for output in middleware.process_spider_output(
+                response, spider_output(), spider
+            )
+        ]
+
+    return asyncio.run(run())
+
+
+def test_compiled_rules_extract_like_css_selectors():
+    response = _get_response()
+    compiled_rules = CompiledRules(RULES)
+    items = list(compiled_rules.extract_items(response))
+    expected = [
+        {
+            "text": item.css(".text::text").get(),
+            "link": item.css("a::attr(href)").get(),
+        }
+        for item in response.css(".quote")
+    ]
+    assert items == expected
+    assert compiled_rules.get_next_page_href(response) == "/page/2/"
+
+
+def test_middleware_adds_items_to_spider_output():
+    get_compiled_rules_cache().clear()
+    crawler = get_crawler(
+        _Spider,
+        {"CRAWLAB_AI_ENABLED": True, "CRAWLAB_AI_FOLLOW_NEXT_PAGE": True},
+    )
+    spider = _Spider()
+    middleware = CrawlabRulesMiddleware.from_crawler(crawler)
+    spider.crawlab_ai_rules = RULES
+
+    outputs = _process(middleware, _get_response(), spider)
+    assert outputs[0] == {"url": "https://example.com/page/1/"}
+    assert [output["text"] for output in outputs[1:4]] == [
+        " quote 1-0 ",
+        " quote 1-1 ",
+        " quote 1-2 ",
+    ]
+    assert outputs[4].url == "https://example.com/page/2/"
+    assert len(get_compiled_rules_cache()) == 1
+
+    # requests can opt out
+    outputs = _process(middleware, _get_response({"crawlab_ai": False}), spider)
+    assert outputs == [{"url": "https://example.com/page/1/"}]
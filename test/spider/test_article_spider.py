@@ -0,0 +1,79 @@
+from unittest.mock import patch
+
+from crawlab_ai.spider.article_spider import ArticleSpider, read_article
+from crawlab_ai.spider.batch import read_articles
+
+RULES = {
+    "title": "Hello world",
+    "author": "Jane",
+    "publish_date": "2024-01-01",
+    "content": "First paragraph",
+    "title_css_selector": "h1.title",
+    "author_css_selector": ".meta .author",
+    "publish_date_css_selector": ".meta time",
+    "content_css_selector": "article p",
+}
+
+
+def _render_article(title: str, author: str = None) -> str:
+    author_html = '<span class="author"> %s </span>' % author if author else ""
+    return (
+        '<html><body><h1 class="title">%s</h1>'
+        '<div class="meta">%s<time>2024-02-02</time></div>'
+        "<article><p>First <b>paragraph</b></p><p>Second paragraph</p></article>"
+        "</body></html>" % (title, author_html)
+    )
+
+
+def test_read_article_extracts_locally():
+    data = read_article(
+        "https://example.com/p/1",
+        get_html=lambda url: _render_article("Title 1", "John"),
+        rules=RULES,
+    )
+    assert data == {
+        "url": "https://example.com/p/1",
+        "title": "Title 1",
+        "author": "John",
+        "publish_date": "2024-02-02",
+        "content": "First\nparagraph\nSecond paragraph",
+    }
+
+
+def test_read_article_falls_back_to_api_values():
+    def fetch_rules(self):
+        self.rules = RULES
+
+    with patch.object(ArticleSpider, "fetch_rules", fetch_rules):
+        data = read_article(
+            "https://example.com/p/1",
+            get_html=lambda url: _render_article("Title 1"),
+        )
+    assert data["title"] == "Title 1"
+    assert data["author"] == "Jane"
+
+
+def test_read_articles_fetches_rules_once_per_site():
+    fetched = []
+
+    def fetch_rules(self):
+        if self._load_local_rules():
+            return
+        fetched.append(self.url)
+        self.rules = RULES
+
+    urls = [
+        "https://example.com/p/1",
+        "https://example.com/p/2",
+        "https://other.com/a/1",
+        "https://example.com/p/3",
+    ]
+    with patch.object(ArticleSpider, "fetch_rules", fetch_rules):
+        articles = read_articles(
+            urls,
+            get_html=lambda url: _render_article(url.rsplit("/", 1)[1]),
+            use_cache=False,
+        )
+    assert sorted(fetched) == ["https://example.com/p/1", "https://other.com/a/1"]
+    assert [article["url"] for article in articles] == urls
+    assert [article["title"] for article in articles] == ["1", "2", "1", "3"]
@@ -0,0 +1,123 @@
+import threading
+import time
+from unittest.mock import patch
+
+from crawlab_ai.spider.batch import iter_lists, read_lists
+from crawlab_ai.spider.list_spider import ListSpider
+from crawlab_ai.utils.throttle import HostScheduler
+
+RULES = {
+    "list_model": {
+        "list_element_css_selector": "li",
+        "fields": [{"name": "name", "element_css_selector": "span", "type": "text"}],
+    },
+    "next_page_element_css_selector": None,
+}
+
+
+def _get_html(url):
+    return "<ul><li><span>%s</span></li></ul>" % url.rsplit("/", 1)[1]
+
+
+def test_read_lists_fetches_rules_once_per_site():
+    fetched = []
+
+    def fetch_rules(self):
+        if self._load_local_rules():
+            return
+        fetched.append(self.url)
+        self.rules = RULES
+
+    urls = [
+        "https://a.com/1",
+        "https://a.com/2",
+        "https://b.com/1",
+        "https://a.com/3",
+    ]
+    with patch.object(ListSpider, "fetch_rules", fetch_rules):
+        data = read_lists(urls, get_html=_get_html, as_dataframe=False)
+    assert sorted(fetched) == ["https://a.com/1", "https://b.com/1"]
+    assert data == [[{"name": "1"}], [{"name": "2"}], [{"name": "1"}], [{"name": "3"}]]
+
+
+def test_shared_rules_are_fetched_again_when_out_of_date(monkeypatch):
+    monkeypatch.setenv("CRAWLAB_TOKEN", "test-token")
+    new_rules = {
+        "list_model": {
+            "list_element_css_selector": "p",
+            "fields": RULES["list_model"]["fields"],
+        },
+        "next_page_element_css_selector": None,
+    }
+    calls = []
+
+    class _Response(object):
+        def __init__(self, rules):
+            self.rules = rules
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"model_list": [self.rules]}
+
+    def http_post(url, **kwargs):
+        calls.append(kwargs["json"]["url"])
+        return _Response(RULES if len(calls) == 1 else new_rules)
+
+    def get_html(url):
+        if url.endswith("/new"):
+            return "<div><p><span>new</span></p></div>"
+        return _get_html(url)
+
+    urls = ["https://a.com/1", "https://a.com/new"]
+    with patch("crawlab_ai.spider.list_spider.http_post", http_post):
+        data = read_lists(urls, get_html=get_html, as_dataframe=False, use_cache=False)
+    # the rules of the site match no item of the second page, which gets its own
+    assert calls == urls
+    assert data == [[{"name": "1"}], [{"name": "new"}]]
+
+
+def test_iter_lists_reports_errors_and_continues():
+    def get_html(url):
+        if url.endswith("/bad"):
+            raise IOError("boom")
+        return _get_html(url)
+
+    urls = ["https://a.com/bad", "https://a.com/2", "https://b.com/1"]
+    results = sorted(
+        iter_lists(urls, get_html=get_html, rules=RULES), key=lambda r: r.index
+    )
+    assert [r.url for r in results] == urls
+    assert isinstance(results[0].error, IOError)
+    assert results[1].data == [{"name": "2"}]
+    assert results[2].error is None
+
+
+def test_scheduler_bounds_concurrency_per_host():
+    scheduler = HostScheduler(per_host_concurrency=2)
+    active = {}
+    peak = {}
+    lock = threading.Lock()
+
+    def get_html(url):
+        host = url.split("/")[2]
+        with lock:
+            active[host] = active.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), active[host])
+        time.sleep(0.02)
+        with lock:
+            active[host] -= 1
+        return ""
+
+    limited = scheduler.wrap(get_html)
+    threads = [
+        threading.Thread(target=limited, args=("https://%s/%d" % (host, i),))
+        for host in ("a.com", "b.com")
+        for i in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == {"a.com": 2, "b.com": 2}
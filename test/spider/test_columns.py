@@ -0,0 +1,59 @@
+import pytest
+
+from crawlab_ai.spider.columns import INTERN_MIN_VALUES, ColumnarRows
+
+
+def test_columnar_rows_sequence():
+    rows = ColumnarRows(["title", "author"])
+    rows.extend([{"title": "A", "author": "Jo"}, {"title": "B"}])
+    rows.append({"title": "C", "author": "Jo", "url": "https://example.com/c"})
+
+    assert len(rows) == 3
+    assert rows.field_names == ["title", "author", "url"]
+    # missing fields are left out of the rows, as in the extracted rows
+    assert rows[1] == {"title": "B"}
+    assert rows[-1] == {"title": "C", "author": "Jo", "url": "https://example.com/c"}
+    assert rows[:2] == [{"title": "A", "author": "Jo"}, {"title": "B"}]
+    assert rows == rows.to_list()
+    assert rows.get_column("author") == ["Jo", None, "Jo"]
+    assert rows.get_column("url") == [None, None, "https://example.com/c"]
+    assert ColumnarRows() == []
+    with pytest.raises(IndexError):
+        rows[3]
+
+
+def test_columnar_rows_interning():
+    rows = ColumnarRows(["title", "category"])
+    rows.extend(
+        {"title": "Title %d" % i, "category": "".join(["news"])}
+        for i in range(INTERN_MIN_VALUES * 2)
+    )
+
+    category = rows.get_column("category")
+    assert all(value is category[0] for value in category)
+    assert rows.is_categorical("category")
+    # interning stops for columns of mostly distinct values
+    assert not rows.is_categorical("title")
+
+
+def test_columnar_rows_to_dataframe():
+    rows = ColumnarRows(["title", "category", "empty"])
+    rows.extend([{"title": "A", "category": "x"}, {"title": "B", "category": "x"}])
+
+    df = rows.to_dataframe()
+    assert list(df.columns) == ["title", "category", "empty"]
+    assert df["title"].tolist() == ["A", "B"]
+    assert df["empty"].isna().all()
+
+    df = rows.to_dataframe(categorical=True)
+    assert df["category"].dtype.name == "category"
+
+
+def test_columnar_rows_to_arrow():
+    pytest.importorskip("pyarrow")
+    rows = ColumnarRows(["title", "category"])
+    rows.extend([{"title": "A", "category": "x"}, {"title": "B"}])
+
+    table = rows.to_arrow()
+    assert table.column_names == ["title", "category"]
+    assert table.column("category").to_pylist() == ["x", None]
@@ -0,0 +1,116 @@
+import threading
+from unittest.mock import patch
+
+import crawlab_ai.spider.distributed
+from crawlab_ai.spider.distributed import DistributedWorker
+from crawlab_ai.spider.list_spider import ListSpider
+from crawlab_ai.utils.frontier import SqliteFrontier, Task
+from test.spider.test_list_spider import RULES, _render_page
+
+
+def _get_html(url):
+    # two sites with a list of 4 pages each
+    parts = url.rstrip("/").split("/")
+    page = int(parts[-1]) if parts[-2] == "page" else 1
+    return _render_page(page, 4)
+
+
+def test_workers_share_frontier_and_rules(tmp_path):
+    frontier_path = str(tmp_path / "frontier.db")
+    fetched = []
+    lock = threading.Lock()
+    items = {}
+
+    def get_html(url):
+        with lock:
+            fetched.append(url)
+        return _get_html(url)
+
+    def on_items(task, rows):
+        with lock:
+            items.setdefault(task.source, []).extend(row["text"] for row in rows)
+
+    def fetch_rules(self):
+        with lock:
+            rules_calls.append(self.url)
+        self.rules = RULES
+
+    rules_calls = []
+    workers = [
+        DistributedWorker(
+            SqliteFrontier(frontier_path),
+            get_html=get_html,
+            concurrency=2,
+            poll_interval=0.01,
+            on_items=on_items,
+            use_cache=False,
+        )
+        for _ in range(2)
+    ]
+    urls = ["https://a.example.com/", "https://b.example.com/"]
+    with patch.object(ListSpider, "fetch_rules", fetch_rules):
+        # every worker seeds the same URLs
+        assert workers[0].seed(urls) == 2
+        assert workers[1].seed(urls) == 0
+        threads = [threading.Thread(target=worker.run) for worker in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    # each page is fetched once, and the rules once per site
+    assert len(fetched) == len(set(fetched)) == 8
+    assert sorted(rules_calls) == urls
+    for url in urls:
+        assert sorted(items[url]) == sorted(
+            "quote %d-%d" % (page, i) for page in range(1, 5) for i in range(3)
+        )
+    assert SqliteFrontier(frontier_path).is_finished()
+
+
+def test_failed_pages_are_attempted_again(tmp_path):
+    failures = {"https://a.example.com/page/2/": 1, "https://a.example.com/page/3/": 3}
+    items = []
+
+    def get_html(url):
+        if failures.get(url):
+            failures[url] -= 1
+            raise ConnectionError("connection reset")
+        return _get_html(url)
+
+    worker = DistributedWorker(
+        SqliteFrontier(str(tmp_path / "frontier.db")),
+        get_html=get_html,
+        rules=RULES,
+        concurrency=1,
+        poll_interval=0.01,
+        on_items=lambda task, rows: items.extend(row["text"] for row in rows),
+    )
+    worker.seed(["https://a.example.com/"])
+    worker.run()
+
+    # page 2 succeeds on its second attempt, page 3 is given up after three
+    assert sorted(items) == sorted(
+        "quote %d-%d" % (page, i) for page in (1, 2) for i in range(3)
+    )
+    assert worker.stats.get("retried_tasks") == 3
+    assert worker.stats.get("failed_tasks") == 1
+    assert worker.frontier.is_finished()
+    # the spider of a list is dropped with its last page
+    assert not worker._list_spiders
+
+
+def test_list_spiders_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(crawlab_ai.spider.distributed, "_MAX_LIST_SPIDERS", 2)
+    worker = DistributedWorker(
+        SqliteFrontier(str(tmp_path / "frontier.db")), rules=RULES
+    )
+    for site in ("a", "b", "a", "c"):
+        url = "https://%s.example.com/" % site
+        worker._get_list_spider(Task("list", url, url), RULES)
+
+    # the least recently used list is evicted
+    assert list(worker._list_spiders) == [
+        "https://a.example.com/",
+        "https://c.example.com/",
+    ]
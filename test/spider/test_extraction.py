@@ -0,0 +1,94 @@
+import pytest
+
+from crawlab_ai.spider.extraction import ExtractionPlan, PARSER_HTML, PARSER_LXML
+
+RULES = {
+    "list_model": {
+        "list_element_css_selector": "div.quote",
+        "fields": [
+            {"name": "text", "element_css_selector": ".text", "type": "text"},
+            {"name": "author", "element_css_selector": ".author", "type": "text"},
+            {
+                "name": "tags",
+                "element_css_selector": ".tags",
+                "type": "attribute",
+                "attribute": "class",
+            },
+            {
+                "name": "link",
+                "element_css_selector": "a, span.link",
+                "type": "attribute",
+                "attribute": "href",
+            },
+        ],
+    },
+    "next_page_element_css_selector": "li.next",
+}
+
+HTML = """
+<html><body>
+<div class="quote">
+  <span class="text">  The world <b>as we</b> created it </span>
+  <small class="author">Albert</small>
+  <div class="tags foo">tags</div>
+  <a href="/author/albert">about</a>
+</div>
+<div class="quote">
+  <span class="text">Second</span>
+  <a href="/author/jane">about</a>
+</div>
+<ul><li class="next"><a href="/page/2/">Next</a></li></ul>
+</body></html>
+"""
+
+
+@pytest.mark.parametrize("parser", [PARSER_LXML, PARSER_HTML])
+def test_extract_rows(parser):
+    plan = ExtractionPlan(RULES, parser)
+    document = plan.parse(HTML)
+    assert plan.extract_rows(document) == [
+        {
+            "text": "The world as we created it",
+            "author": "Albert",
+            "tags": "tags foo",
+            "link": "/author/albert",
+        },
+        {"text": "Second", "link": "/author/jane"},
+    ]
+    assert plan.get_next_page_href(document) == "/page/2/"
+
+
+@pytest.mark.parametrize("parser", [PARSER_LXML, PARSER_HTML])
+def test_extract_rows_from_empty_page(parser):
+    plan = ExtractionPlan(RULES, parser)
+    document = plan.parse("")
+    assert plan.extract_rows(document) == []
+    assert plan.get_next_page_href(document) is None
+
+
+def test_unknown_parser():
+    with pytest.raises(ValueError):
+        ExtractionPlan(RULES, "unknown")
+
+
+def test_extract_rows_with_selectolax():
+    pytest.importorskip("selectolax")
+    plan = ExtractionPlan(RULES, "selectolax")
+    document = plan.parse(HTML)
+    assert plan.extract_rows(document) == ExtractionPlan(RULES).extract_rows(
+        ExtractionPlan(RULES).parse(HTML)
+    )
+    assert plan.get_next_page_href(document) == "/page/2/"
+
+
+def test_extract_files(tmp_path):
+    from crawlab_ai.spider.extraction import extract_files
+
+    paths = []
+    for i in range(3):
+        path = tmp_path / ("page_%d.html" % i)
+        path.write_text(HTML, encoding="utf-8")
+        paths.append(str(path))
+    results = list(extract_files(paths, RULES, max_workers=2))
+    assert [path for path, _ in results] == paths
+    assert all(len(rows) == 2 for _, rows in results)
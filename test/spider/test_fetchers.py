@@ -0,0 +1,168 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawlab_ai.spider.fetchers import BrowserFetcher, Fetcher, HttpFetcher
+from crawlab_ai.spider.list_spider import aread_list, read_list
+from crawlab_ai.utils.async_http import close_async_session
+
+RULES = {
+    "list_model": {
+        "list_element_css_selector": ".item",
+        "fields": [{"name": "name", "element_css_selector": "span", "type": "text"}],
+    },
+    "next_page_element_css_selector": ".next",
+}
+
+PAGES = {
+    "/list/one": '<div class="item"><span>a</span></div><a class="next" href="/list/two">next</a>',
+    "/list/two": '<div class="item"><span>b</span></div>',
+    # the items are rendered by a script after the page is loaded
+    "/list/rendered": (
+        '<img src="/image.png"><div id="list"></div><script>setTimeout(function () {'
+        "document.getElementById('list').innerHTML = "
+        "'<div class=\"item\"><span>c</span></div>';}, 200);</script>"
+    ),
+}
+
+
+class _StaticHandler(BaseHTTPRequestHandler):
+    paths = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        type(self).paths.append(self.path)
+        body = PAGES.get(self.path, "").encode()
+        self.send_response(200 if self.path in PAGES else 404)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def static_server():
+    _StaticHandler.paths = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StaticHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%d" % server.server_port
+    server.shutdown()
+
+
+class _RecordingFetcher(HttpFetcher):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def fetch(self, url, wait_for=None):
+        self.calls.append(("fetch", url, wait_for))
+        return super().fetch(url, wait_for)
+
+    async def afetch(self, url, wait_for=None):
+        self.calls.append(("afetch", url, wait_for))
+        return await super().afetch(url, wait_for)
+
+
+def test_spider_fetches_pages_with_fetcher(static_server):
+    fetcher = _RecordingFetcher()
+    data = read_list(
+        static_server + "/list/one", rules=RULES, as_dataframe=False, fetcher=fetcher
+    )
+    assert data == [{"name": "a"}, {"name": "b"}]
+    assert fetcher.calls == [
+        ("fetch", static_server + "/list/one", ".item"),
+        ("fetch", static_server + "/list/two", ".item"),
+    ]
+
+
+def test_async_spider_fetches_pages_with_fetcher(static_server):
+    fetcher = _RecordingFetcher()
+
+    async def main():
+        try:
+            return await aread_list(
+                static_server + "/list/one",
+                rules=RULES,
+                as_dataframe=False,
+                fetcher=fetcher,
+            )
+        finally:
+            await close_async_session()
+
+    data = asyncio.run(main())
+    assert data == [{"name": "a"}, {"name": "b"}]
+    assert [call[0] for call in fetcher.calls] == ["afetch", "afetch"]
+
+
+def test_fetcher_interface_defaults_to_threads(static_server):
+    class SyncFetcher(Fetcher):
+        def fetch(self, url, wait_for=None):
+            return "<p>%s</p>" % threading.current_thread().name
+
+    with SyncFetcher() as fetcher:
+        html = asyncio.run(fetcher.afetch(static_server))
+    assert html != "<p>%s</p>" % threading.current_thread().name
+
+
+def test_browser_fetcher_waits_for_rendered_items(static_server):
+    pytest.importorskip("playwright")
+    with BrowserFetcher(pool_size=2, wait_timeout=5) as fetcher:
+        data = read_list(
+            static_server + "/list/rendered",
+            rules=RULES,
+            as_dataframe=False,
+            fetcher=fetcher,
+        )
+        html = fetcher.fetch(static_server + "/list/rendered")
+    assert data == [{"name": "c"}]
+    # without waiting, the page is returned before the script renders the items
+    assert 'class="item"' not in html
+    assert "/image.png" not in _StaticHandler.paths
+
+
+def test_browser_fetcher_keeps_its_pool_full_after_failures():
+    class _Page(object):
+        async def goto(self, url, **kwargs):
+            if url.endswith("/bad"):
+                raise RuntimeError("navigation failed")
+
+        async def content(self):
+            return "<p>ok</p>"
+
+        async def close(self):
+            raise RuntimeError("target closed")
+
+    class _Context(object):
+        opened = 0
+
+        async def new_page(self):
+            self.opened += 1
+            if self.opened == 2:
+                raise RuntimeError("browser crashed")
+            return _Page()
+
+    async def main():
+        # the pool of a fetcher started without a browser
+        fetcher = BrowserFetcher.__new__(BrowserFetcher)
+        fetcher.timeout = fetcher.wait_timeout = 1
+        context = _Context()
+        fetcher._pages = asyncio.Queue()
+        fetcher._pages.put_nowait((context, await context.new_page()))
+        results = []
+        for path in ("/bad", "/ok", "/ok", "/ok"):
+            try:
+                results.append(await fetcher._fetch("https://example.com" + path))
+            except RuntimeError as e:
+                results.append(str(e))
+            assert fetcher._pages.qsize() == 1
+        return results, context.opened
+
+    results, opened = asyncio.run(main())
+    # the failed page is replaced on the next fetch, and again if opening it failed
+    assert results == ["navigation failed", "browser crashed", "<p>ok</p>", "<p>ok</p>"]
+    assert opened == 3
@@ -0,0 +1,390 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from crawlab_ai.spider.health import PageHealth
+from crawlab_ai.spider.list_spider import ListSpider, iter_list
+from crawlab_ai.utils.checkpoint import CheckpointStore
+from crawlab_ai.utils.rules_cache import get_rules_cache
+from crawlab_ai.utils.seen_store import SeenStore
+
+RULES = {
+    "list_model": {
+        "list_element_css_selector": ".quote",
+        "fields": [
+            {"name": "text", "element_css_selector": ".text", "type": "text"},
+            {
+                "name": "link",
+                "element_css_selector": "a",
+                "type": "attribute",
+                "attribute": "href",
+            },
+        ],
+    },
+    "next_page_element_css_selector": ".next > a",
+}
+
+
+def _render_page(page: int, total: int, per_page: int = 3) -> str:
+    items = "".join(
+        '<div class="quote"><span class="text"> quote %d-%d </span>'
+        '<a href="/q/%d/%d">link</a></div>' % (page, i, page, i)
+        for i in range(per_page)
+    )
+    next_link = (
+        '<li class="next"><a href="/page/%d/">Next</a></li>' % (page + 1)
+        if page < total
+        else ""
+    )
+    return "<html><body>%s<ul>%s</ul></body></html>" % (items, next_link)
+
+
+def _get_html_factory(total: int, requested: list):
+    def get_html(url):
+        requested.append(url)
+        if url.rstrip("/") == "https://example.com":
+            return _render_page(1, total)
+        page = int(url.rstrip("/").split("/")[-1])
+        if page > total:
+            return "<html><body></body></html>"
+        return _render_page(page, total)
+
+    return get_html
+
+
+def _crawl(spider: ListSpider):
+    with patch.object(ListSpider, "fetch_rules", lambda self: None):
+        spider.rules = RULES
+        spider.crawl()
+    return spider.data
+
+
+def test_crawl_follows_all_pages_in_order():
+    requested = []
+    spider = ListSpider(
+        "https://example.com/",
+        get_html=_get_html_factory(10, requested),
+        concurrency=4,
+    )
+    data = _crawl(spider)
+    assert len(data) == 30
+    assert [row["text"] for row in data[:4]] == [
+        "quote 1-0",
+        "quote 1-1",
+        "quote 1-2",
+        "quote 2-0",
+    ]
+    assert data[-1] == {"text": "quote 10-2", "link": "/q/10/2"}
+    assert spider.page_url_template.template == "https://example.com/page/{n}/"
+
+
+def test_crawl_respects_max_pages():
+    requested = []
+    spider = ListSpider(
+        "https://example.com/",
+        get_html=_get_html_factory(10, requested),
+        max_pages=3,
+    )
+    data = _crawl(spider)
+    assert len(data) == 9
+    assert len(requested) <= 3 + spider.concurrency
+
+
+def test_crawl_follows_next_links_without_template():
+    pages = {
+        "https://example.com/": _render_page(1, 2).replace(
+            "/page/2/", "/next?cursor=abc"
+        ),
+        "https://example.com/next?cursor=abc": _render_page(2, 2),
+    }
+    requested = []
+
+    def get_html(url):
+        requested.append(url)
+        return pages[url]
+
+    spider = ListSpider("https://example.com/", get_html=get_html)
+    data = _crawl(spider)
+    assert len(data) == 6
+    assert spider.page_url_template is None
+    assert requested == list(pages)
+
+
+def test_acrawl_accepts_async_get_html():
+    import asyncio
+
+    requested = []
+    get_html = _get_html_factory(5, requested)
+
+    async def aget_html(url):
+        await asyncio.sleep(0)
+        return get_html(url)
+
+    spider = ListSpider("https://example.com/", get_html=aget_html, concurrency=3)
+
+    async def afetch_rules(self):
+        self.rules = RULES
+
+    with patch.object(ListSpider, "afetch_rules", afetch_rules):
+        asyncio.run(spider.acrawl())
+    assert len(spider.data) == 15
+    assert spider.data[0]["text"] == "quote 1-0"
+    assert spider.data[-1]["text"] == "quote 5-2"
+
+
+def test_iter_list_yields_rows_page_by_page():
+    pages = list(
+        iter_list(
+            "https://example.com/",
+            get_html=_get_html_factory(4, []),
+            rules=RULES,
+            batch=True,
+            use_cache=False,
+        )
+    )
+    assert [len(rows) for rows in pages] == [3, 3, 3, 3]
+    assert [rows[0]["text"] for rows in pages] == [
+        "quote %d-0" % page for page in range(1, 5)
+    ]
+
+    rows = iter_list(
+        "https://example.com/",
+        get_html=_get_html_factory(4, []),
+        rules=RULES,
+        use_cache=False,
+    )
+    assert next(rows)["text"] == "quote 1-0"
+    rows.close()
+
+
+def test_fetch_rules_reuses_rules_of_the_same_layout(tmp_path, monkeypatch):
+    monkeypatch.setenv("CRAWLAB_AI_RULES_CACHE_PATH", str(tmp_path / "cache.db"))
+    monkeypatch.setenv("CRAWLAB_TOKEN", "test-token")
+    calls = []
+
+    class _Response(object):
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"model_list": [RULES]}
+
+    def http_post(url, **kwargs):
+        calls.append(kwargs["json"]["url"])
+        return _Response()
+
+    requested = []
+
+    def get_html(url):
+        requested.append(url)
+        return _render_page(1, 1)
+
+    with patch("crawlab_ai.spider.list_spider.http_post", http_post):
+        for url in [
+            "https://example.com/list/1",
+            "https://example.com/list/2",
+            "https://example.com/category/quotes",
+        ]:
+            spider = ListSpider(url, get_html=get_html)
+            spider.crawl()
+            assert len(spider.data) == 3
+    # the second URL has the same template, the third one the same DOM structure
+    assert calls == ["https://example.com/list/1"]
+    assert spider.rules_url == "https://example.com/list/1"
+    # the page fetched to fingerprint it is not fetched again
+    assert len(requested) == 3
+
+    # pages are only fetched to be fingerprinted when they are crawled
+    requested.clear()
+    with patch("crawlab_ai.spider.list_spider.http_post", http_post):
+        ListSpider("https://example.com/tags/quotes", get_html=get_html).fetch_rules()
+    assert requested == []
+    assert calls == ["https://example.com/list/1", "https://example.com/tags/quotes"]
+
+
+def test_outdated_cached_rules_are_fetched_again(tmp_path, monkeypatch):
+    monkeypatch.setenv("CRAWLAB_AI_RULES_CACHE_PATH", str(tmp_path / "cache.db"))
+    monkeypatch.setenv("CRAWLAB_TOKEN", "test-token")
+    outdated_rules = {
+        "list_model": {
+            "list_element_css_selector": ".old-quote",
+            "fields": RULES["list_model"]["fields"],
+        },
+        "next_page_element_css_selector": ".old-next > a",
+    }
+    calls = []
+
+    class _Response(object):
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"model_list": [RULES]}
+
+    def http_post(url, **kwargs):
+        calls.append(kwargs["json"]["url"])
+        return _Response()
+
+    get_rules_cache().set("list", "https://example.com/", None, outdated_rules)
+    with patch("crawlab_ai.spider.list_spider.http_post", http_post):
+        spider = ListSpider("https://example.com/", get_html=_get_html_factory(3, []))
+        spider.crawl()
+    assert calls == ["https://example.com/"]
+    assert len(spider.data) == 9
+    assert spider.page_health[0] == PageHealth(3, 1.0, True)
+    assert spider.page_health[2] == PageHealth(3, 1.0, False)
+    assert get_rules_cache().get("list", "https://example.com/") == RULES
+
+    # given rules are not replaced
+    with patch("crawlab_ai.spider.list_spider.http_post", http_post):
+        spider = ListSpider(
+            "https://example.com/",
+            get_html=_get_html_factory(3, []),
+            rules=outdated_rules,
+        )
+        spider.crawl()
+    assert len(calls) == 1
+    assert spider.data == []
+    assert spider.page_health[0].is_drifted()
+
+
+class _NotFoundHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = b"<html><body>Not found</body></html>"
+        self.send_response(404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def test_error_page_does_not_refresh_cached_rules(tmp_path, monkeypatch):
+    monkeypatch.setenv("CRAWLAB_AI_RULES_CACHE_PATH", str(tmp_path / "cache.db"))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _NotFoundHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:%d/" % server.server_port
+    get_rules_cache().set("list", url, None, RULES)
+    try:
+        with patch("crawlab_ai.spider.list_spider.http_post") as mock_post:
+            spider = ListSpider(url)
+            spider.crawl()
+            mock_post.assert_not_called()
+    finally:
+        server.shutdown()
+    assert spider.data == []
+    assert spider.page_health[0].is_drifted()
+
+
+def _get_feed_html_factory(newest: int, requested: list):
+    # a feed of 30 items or more, newest first, 3 items per page
+    def get_html(url):
+        requested.append(url)
+        page = (
+            1 if url.rstrip("/") == "https://example.com" else int(url.split("/")[-2])
+        )
+        ids = [
+            i for i in range(newest - (page - 1) * 3, newest - page * 3, -1) if i > 0
+        ]
+        items = "".join(
+            '<div class="quote"><span class="text">%d</span><a href="/q/%d">link</a></div>'
+            % (i, i)
+            for i in ids
+        )
+        next_link = '<li class="next"><a href="/page/%d/">Next</a></li>' % (page + 1)
+        return "<html><body>%s<ul>%s</ul></body></html>" % (
+            items,
+            next_link if ids and ids[-1] > 1 else "",
+        )
+
+    return get_html
+
+
+def test_incremental_crawl_stops_at_seen_items(tmp_path):
+    store = SeenStore(str(tmp_path / "seen.db"))
+
+    def crawl(newest: int, requested: list) -> list:
+        spider = ListSpider(
+            "https://example.com/",
+            get_html=_get_feed_html_factory(newest, requested),
+            concurrency=1,
+            incremental=True,
+            seen_store=store,
+        )
+        return [row["text"] for row in _crawl(spider)]
+
+    requested = []
+    assert len(crawl(30, requested)) == 30
+    assert store.count("example.com") == 30
+
+    # nothing new: only the first page is fetched
+    requested = []
+    assert crawl(30, requested) == []
+    assert requested == ["https://example.com/"]
+
+    # two new items push the others down by two places
+    requested = []
+    assert crawl(32, requested) == ["32", "31"]
+    assert requested == ["https://example.com/", "https://example.com/page/2/"]
+
+
+def test_crawl_parses_pages_in_worker_processes():
+    spider = ListSpider(
+        "https://example.com/",
+        get_html=_get_html_factory(6, []),
+        concurrency=3,
+        parse_workers=2,
+    )
+    data = _crawl(spider)
+    assert len(data) == 18
+    assert data[0] == {"text": "quote 1-0", "link": "/q/1/0"}
+    assert data[-1] == {"text": "quote 6-2", "link": "/q/6/2"}
+    assert spider.page_url_template.template == "https://example.com/page/{n}/"
+
+
+def test_interrupted_crawl_is_resumed_from_checkpoint(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"))
+    requested = []
+    get_html = _get_html_factory(6, requested)
+
+    def get_html_failing_at_page_4(url):
+        if url.endswith("/page/4/"):
+            raise ConnectionError("connection reset")
+        return get_html(url)
+
+    spider = ListSpider(
+        "https://example.com/",
+        get_html=get_html_failing_at_page_4,
+        concurrency=1,
+        checkpoint=True,
+        checkpoint_store=store,
+    )
+    with pytest.raises(ConnectionError):
+        _crawl(spider)
+    checkpoint = store.get("list", "https://example.com/")
+    assert [page.index for page in checkpoint.pages] == [0, 1, 2]
+    assert checkpoint.rules == RULES
+
+    # the rules and the completed pages come from the checkpoint
+    requested.clear()
+    spider = ListSpider(
+        "https://example.com/",
+        get_html=get_html,
+        use_cache=False,
+        concurrency=1,
+        resume=True,
+        checkpoint_store=store,
+    )
+    with patch("crawlab_ai.spider.list_spider.http_post") as mock_post:
+        spider.crawl()
+        mock_post.assert_not_called()
+    assert requested == ["https://example.com/page/%d/" % page for page in (4, 5, 6)]
+    assert [row["text"] for row in spider.data] == [
+        "quote %d-%d" % (page, i) for page in range(1, 7) for i in range(3)
+    ]
+    assert spider.stats.get("resumed_pages") == 3
+    # the checkpoint of a completed crawl is deleted
+    assert store.get("list", "https://example.com/") is None
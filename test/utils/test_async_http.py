@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawlab_ai.spider.list_spider import aread_list
+from crawlab_ai.utils import async_http
+from crawlab_ai.utils.http import DEFAULT_POOL_MAXSIZE, configure_http
+
+RULES = {
+    "list_model": {
+        "list_element_css_selector": ".item",
+        "fields": [{"name": "name", "element_css_selector": "span", "type": "text"}],
+    },
+    "next_page_element_css_selector": None,
+}
+
+
+class _ListHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = b'<div class="item"><span>a</span></div>'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def list_server():
+    pytest.importorskip("aiohttp")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ListHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield "http://127.0.0.1:%d" % server.server_port
+    server.shutdown()
+
+
+def test_async_session_is_closed_after_the_last_block(list_server):
+    async def main():
+        loop = asyncio.get_running_loop()
+        data = await aread_list(list_server, rules=RULES, as_dataframe=False)
+        # a call on its own closes the session it opened
+        assert loop not in async_http._sessions
+
+        async with async_http.async_http_session():
+            await asyncio.gather(
+                *(
+                    aread_list(list_server + "/%d" % i, rules=RULES, as_dataframe=False)
+                    for i in range(2)
+                )
+            )
+            session = async_http._sessions[loop]
+            assert not session.closed
+        assert session.closed
+        assert loop not in async_http._sessions
+        return data
+
+    assert asyncio.run(main()) == [{"name": "a"}]
+
+
+class _BusyHandler(BaseHTTPRequestHandler):
+    retried = set()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/busy" and self.path not in self.retried:
+            self.retried.add(self.path)
+            # the body of the error page is still being sent when the client backs off
+            self.send_response(503)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "8")
+            self.end_headers()
+            self.wfile.write(b"busy")
+            self.wfile.flush()
+            time.sleep(2)
+            try:
+                self.wfile.write(b"busy")
+            except OSError:
+                pass
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+
+def test_connection_is_released_while_backing_off():
+    pytest.importorskip("aiohttp")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _BusyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = "http://127.0.0.1:%d" % server.server_port
+
+    async def main():
+        async with async_http.async_http_session():
+            busy = asyncio.ensure_future(async_http.async_get_text(base_url + "/busy"))
+            await asyncio.sleep(0.2)
+            # the only connection to the host is free while the busy page waits for its retry
+            start = time.monotonic()
+            assert await async_http.async_get_text(base_url + "/free") == "ok"
+            assert time.monotonic() - start < 0.5
+            assert await busy == "ok"
+
+    configure_http(pool_maxsize=1)
+    try:
+        asyncio.run(main())
+    finally:
+        configure_http(pool_maxsize=DEFAULT_POOL_MAXSIZE)
+        server.shutdown()
@@ -0,0 +1,91 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+import crawlab_ai.code.base
+import crawlab_ai.code.batch
+from crawlab_ai.cli import parser
+from crawlab_ai.code.batch import get_module_name, iter_code, write_code
+from crawlab_ai.code.list import get_code_list
+from crawlab_ai.utils.code_cache import CodeCache
+from crawlab_ai.utils.metrics import CrawlStats
+
+RULES = {
+    "list_model": {"list_element_css_selector": ".item", "fields": []},
+    "next_page_element_css_selector": ".next > a",
+}
+
+
+def _mock_codegen_api(monkeypatch):
+    calls = []
+
+    def http_post(url, json=None, **kwargs):
+        calls.append(json["url"])
+        res = MagicMock()
+        res.json.return_value = {"source_code": "# spider for %s\n" % json["url"]}
+        return res
+
+    monkeypatch.setenv("CRAWLAB_TOKEN", "token")
+    monkeypatch.setattr(crawlab_ai.code.base, "http_post", http_post)
+    return calls
+
+
+def test_code_cache_is_keyed_on_rules(tmp_path):
+    cache = CodeCache(str(tmp_path / "cache.db"))
+    cache.set("list", "https://example.com/", RULES, "code")
+    assert cache.get("list", "https://EXAMPLE.com", RULES) == "code"
+    assert cache.get("article", "https://example.com/", RULES) is None
+    changed = {**RULES, "next_page_element_css_selector": ".more"}
+    assert cache.get("list", "https://example.com/", changed) is None
+
+
+def test_get_code_list_reuses_code_of_identical_rules(tmp_path, monkeypatch):
+    monkeypatch.setenv("CRAWLAB_AI_RULES_CACHE_PATH", str(tmp_path / "cache.db"))
+    calls = _mock_codegen_api(monkeypatch)
+    stats = CrawlStats()
+    first = get_code_list("https://example.com/", rules=RULES, stats=stats)
+    second = get_code_list("https://example.com/", rules=dict(RULES), stats=stats)
+    assert first == second == "# spider for https://example.com/\n"
+    assert calls == ["https://example.com/"]
+    assert stats.get_hit_rate("code_cache") == 0.5
+
+
+def test_batch_codegen_writes_one_module_per_url(tmp_path, monkeypatch):
+    monkeypatch.setenv("CRAWLAB_AI_RULES_CACHE_PATH", str(tmp_path / "cache.db"))
+    calls = _mock_codegen_api(monkeypatch)
+    urls = [
+        "https://www.example.com/news",
+        "https://shop.example.org:8080/",
+        "https://example.com/blog",
+    ]
+    results = iter_code(urls, rules=RULES, max_workers=2)
+    paths, errors = write_code(results, str(tmp_path / "spiders"), urls)
+
+    assert sorted(calls) == sorted(urls)
+    assert sorted(p.name for p in (tmp_path / "spiders").iterdir()) == [
+        "example_com.py",
+        "example_com_2.py",
+        "shop_example_org_8080.py",
+    ]
+    with open(paths["https://example.com/blog"]) as f:
+        assert f.read() == "# spider for https://example.com/blog\n"
+    assert errors == {}
+    assert get_module_name("http://127.0.0.1:8000/") == "site_127_0_0_1_8000"
+
+
+def test_batch_codegen_fails_when_a_url_fails(tmp_path, monkeypatch):
+    monkeypatch.setenv("CRAWLAB_TOKEN", "token")
+
+    def get_code_list(url, fields=None, **kwargs):
+        if url == "https://example.org/":
+            raise ValueError("No list found")
+        return "# spider for %s\n" % url, RULES
+
+    monkeypatch.setattr(crawlab_ai.code.batch, "get_code_list", get_code_list)
+    (tmp_path / "urls.txt").write_text("https://example.com/\nhttps://example.org/\n")
+    args = parser.parse_args(
+        ["codegen", "-i", str(tmp_path / "urls.txt"), "-d", str(tmp_path / "spiders")]
+    )
+    with pytest.raises(SystemExit, match="Failed to generate code for 1 URLs"):
+        args.func(args)
+    assert [p.name for p in (tmp_path / "spiders").iterdir()] == ["example_com.py"]
@@ -0,0 +1,76 @@
+import time
+
+from crawlab_ai.utils.frontier import SqliteFrontier, Task, get_frontier
+
+
+def test_sqlite_frontier_deduplicates_and_leases_tasks(tmp_path):
+    frontier = get_frontier("sqlite:///" + str(tmp_path / "frontier.db"), "test")
+    assert isinstance(frontier, SqliteFrontier)
+    assert frontier.is_finished()
+
+    tasks = [
+        Task("list", "https://example.com/page/%d/" % i, "https://example.com/")
+        for i in (1, 2)
+    ]
+    assert frontier.push(tasks) == 2
+    # URLs are pushed once, in any spelling
+    assert (
+        frontier.push(
+            [Task("list", "https://EXAMPLE.com/page/1", "https://example.com/")]
+        )
+        == 0
+    )
+
+    first = frontier.pop()
+    second = frontier.pop()
+    assert [first.url, second.url] == [task.url for task in tasks]
+    assert frontier.pop() is None
+    assert not frontier.is_finished()
+
+    frontier.done(first)
+    frontier.done(second)
+    assert frontier.is_finished()
+
+
+def test_sqlite_frontier_hands_expired_leases_to_other_workers(tmp_path):
+    frontier = SqliteFrontier(str(tmp_path / "frontier.db"))
+    frontier.push([Task("article", "https://example.com/a", "https://example.com/a")])
+
+    task = frontier.pop(lease_timeout=0.05)
+    assert frontier.pop() is None
+    time.sleep(0.1)
+    assert frontier.pop().url == task.url
+
+
+def test_sqlite_frontier_locks_rules_until_they_are_set(tmp_path):
+    frontier = SqliteFrontier(str(tmp_path / "frontier.db"))
+    assert frontier.get_rules("key") is None
+    assert frontier.lock_rules("key", 60)
+    assert not frontier.lock_rules("key", 60)
+
+    frontier.set_rules("key", {"title_css_selector": "h1"})
+    assert frontier.get_rules("key") == {"title_css_selector": "h1"}
+    assert not frontier.lock_rules("key", 60)
+
+    # a failed fetch releases the lock for other workers
+    assert frontier.lock_rules("other", 60)
+    frontier.unlock_rules("other")
+    assert frontier.lock_rules("other", 60)
+
+
+def test_sqlite_frontier_requeues_failed_tasks_last(tmp_path):
+    frontier = SqliteFrontier(str(tmp_path / "frontier.db"))
+    frontier.push(
+        [
+            Task("article", "https://example.com/%s" % name, "https://example.com/")
+            for name in ("a", "b")
+        ]
+    )
+
+    failed = frontier.pop()
+    frontier.requeue(failed)
+    assert frontier.pop().url == "https://example.com/b"
+    retried = frontier.pop()
+    assert retried.url == failed.url
+    assert retried.attempts == 1
+    assert frontier.pop() is None
@@ -0,0 +1,76 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawlab_ai.utils import http
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    failures = 2
+    requests = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self):
+        type(self).requests += 1
+        if type(self).requests <= type(self).failures:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._respond()
+
+
+@pytest.fixture
+def flaky_server():
+    _FlakyHandler.requests = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    http.configure_http(backoff_factor=0)
+    yield "http://127.0.0.1:%d" % server.server_port
+    server.shutdown()
+    http.configure_http(backoff_factor=http.DEFAULT_BACKOFF_FACTOR)
+
+
+def test_http_post_retries_on_service_unavailable(flaky_server):
+    res = http.http_post(flaky_server + "/rules/list", json={"url": "x"})
+    assert res.status_code == 200
+    assert res.json() == {"ok": True}
+    assert _FlakyHandler.requests == 3
+
+
+def test_http_get_gives_up_after_retries(flaky_server):
+    http.configure_http(retries=1)
+    try:
+        res = http.http_get(flaky_server)
+    finally:
+        http.configure_http(retries=http.DEFAULT_RETRIES)
+    assert res.status_code == 503
+    assert _FlakyHandler.requests == 2
+
+
+def test_get_session_is_shared():
+    assert http.get_session() is http.get_session()
+
+
+def test_get_retry_delay():
+    assert http.get_retry_delay(1) == http.DEFAULT_BACKOFF_FACTOR
+    assert http.get_retry_delay(3) == http.DEFAULT_BACKOFF_FACTOR * 4
+    assert http.get_retry_delay(1, "7") == 7
+    assert http.get_retry_delay(1, "Wed, 21 Oct 2015 07:28:00 GMT") == 0
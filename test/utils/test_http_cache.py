@@ -0,0 +1,102 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawlab_ai.spider.extraction import ExtractionPlan
+from crawlab_ai.spider.list_spider import read_list
+from crawlab_ai.utils.http_cache import HttpCache
+
+RULES = {
+    "list_model": {
+        "list_element_css_selector": ".item",
+        "fields": [{"name": "name", "element_css_selector": "span", "type": "text"}],
+    },
+    "next_page_element_css_selector": ".next",
+}
+
+
+# page names without numbers, so that pages are followed through their next-page links
+_NEXT_PAGES = {"one": "two", "two": "three"}
+
+
+class _ETagHandler(BaseHTTPRequestHandler):
+    statuses = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        name = self.path.strip("/").split("/")[-1]
+        etag = '"%s"' % name
+        if self.headers.get("If-None-Match") == etag:
+            type(self).statuses.append(304)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        next_page = _NEXT_PAGES.get(name)
+        body = '<div class="item"><span>%s</span></div>' % name
+        if next_page:
+            body += '<a class="next" href="/list/%s">next</a>' % next_page
+        body = body.encode()
+        type(self).statuses.append(200)
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def etag_server():
+    _ETagHandler.statuses = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ETagHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%d" % server.server_port
+    server.shutdown()
+
+
+def test_http_cache_revalidates_with_etag(etag_server, tmp_path):
+    cache = HttpCache(str(tmp_path / "http_cache.db"))
+    url = etag_server + "/list/three"
+
+    assert cache.fetch(url) == ('<div class="item"><span>three</span></div>', False)
+    assert cache.fetch(url) == ('<div class="item"><span>three</span></div>', True)
+    assert _ETagHandler.statuses == [200, 304]
+    assert cache.get(url).etag == '"three"'
+
+
+def test_http_cache_evicts_least_recently_used_pages(tmp_path):
+    cache = HttpCache(str(tmp_path / "http_cache.db"), max_size=60)
+    for i in range(5):
+        # 17 bytes each once compressed
+        cache.set("https://example.com/%d" % i, '"v"', None, str(i) + "x" * 1000)
+    assert len(cache) == 3
+    assert cache.get_size() <= 60
+    assert cache.get("https://example.com/0") is None
+    assert cache.get("https://example.com/4") is not None
+
+
+def test_read_list_reuses_items_of_unchanged_pages(etag_server, tmp_path, monkeypatch):
+    cache = HttpCache(str(tmp_path / "http_cache.db"))
+    first = read_list(
+        etag_server + "/list/one", rules=RULES, as_dataframe=False, http_cache=cache
+    )
+    assert first == [{"name": "one"}, {"name": "two"}, {"name": "three"}]
+
+    parsed = []
+    parse = ExtractionPlan.parse
+    monkeypatch.setattr(
+        ExtractionPlan,
+        "parse",
+        lambda self, html: parsed.append(html) or parse(self, html),
+    )
+    second = read_list(
+        etag_server + "/list/one", rules=RULES, as_dataframe=False, http_cache=cache
+    )
+    assert second == first
+    assert parsed == []
+    assert _ETagHandler.statuses == [200, 200, 200, 304, 304, 304]
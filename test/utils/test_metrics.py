@@ -0,0 +1,87 @@
+from unittest.mock import patch
+from urllib.request import urlopen
+
+from crawlab_ai.spider.list_spider import ListSpider
+from crawlab_ai.utils.metrics import COUNT_BUCKETS, CrawlStats, Histogram, serve_metrics
+
+RULES = {
+    "list_model": {
+        "list_element_css_selector": ".item",
+        "fields": [{"name": "name", "element_css_selector": "span", "type": "text"}],
+    },
+    "next_page_element_css_selector": ".next",
+}
+
+PAGES = {
+    "https://example.com/one": '<div class="item"><span>a</span></div>'
+    '<div class="item"><span>b</span></div><a class="next" href="/two">next</a>',
+    "https://example.com/two": '<div class="item"><span>c</span></div>',
+}
+
+
+def test_histogram_counts_values_in_buckets():
+    histogram = Histogram(buckets=(1, 5))
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value)
+    assert histogram.get_cumulative_counts() == [2, 3, 4]
+    assert histogram.as_dict() == {
+        "count": 4,
+        "sum": 14.5,
+        "mean": 3.625,
+        "min": 0.5,
+        "max": 10,
+    }
+
+
+def test_stats_export_openmetrics():
+    stats = CrawlStats()
+    stats.incr("pages", 2)
+    stats.incr("rules_cache_hits")
+    stats.incr("rules_cache_misses", 3)
+    stats.observe("fetch_seconds", 0.02)
+    stats.observe("items_per_page", 7, COUNT_BUCKETS)
+
+    assert stats.get_hit_rate("rules_cache") == 0.25
+    assert stats.get_hit_rate("http_cache") is None
+    text = stats.to_openmetrics()
+    assert "# TYPE crawlab_ai_pages counter\ncrawlab_ai_pages_total 2\n" in text
+    assert "# UNIT crawlab_ai_fetch_seconds seconds\n" in text
+    assert 'crawlab_ai_fetch_seconds_bucket{le="0.01"} 0\n' in text
+    assert 'crawlab_ai_fetch_seconds_bucket{le="0.025"} 1\n' in text
+    assert 'crawlab_ai_items_per_page_bucket{le="+Inf"} 1\n' in text
+    assert "crawlab_ai_items_per_page_sum 7\n" in text
+    assert text.endswith("# EOF\n")
+    assert "rules_cache_hit_rate" in stats.format()
+
+
+def test_crawl_records_stats():
+    stats = CrawlStats()
+    spider = ListSpider(
+        "https://example.com/one", get_html=PAGES.__getitem__, stats=stats
+    )
+    with patch.object(ListSpider, "fetch_rules", lambda self: None):
+        spider.rules = RULES
+        spider.crawl()
+
+    assert len(spider.data) == 3
+    assert stats.get("pages") == 2
+    assert stats.get("items") == 3
+    assert stats.get("bytes_downloaded") == sum(len(html) for html in PAGES.values())
+    histograms = stats.as_dict()["histograms"]
+    for stage in ("fetch", "parse", "extract"):
+        assert histograms[stage + "_seconds"]["count"] == 2
+    assert histograms["items_per_page"]["sum"] == 3
+
+
+def test_serve_metrics():
+    stats = CrawlStats()
+    stats.incr("pages")
+    server = serve_metrics(stats, port=0)
+    try:
+        with urlopen("http://127.0.0.1:%d/metrics" % server.server_port) as res:
+            assert res.headers["Content-Type"].startswith(
+                "application/openmetrics-text"
+            )
+            assert b"crawlab_ai_pages_total 1" in res.read()
+    finally:
+        server.shutdown()
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from crawlab_ai.utils.rules import load_rules, save_rules
+
+RULES = {
+    "list_model": {"list_element_css_selector": ".quote", "fields": []},
+    "next_page_element_css_selector": ".next > a",
+}
+
+
+def test_load_rules_from_dict():
+    assert load_rules(RULES) == RULES
+
+
+def test_load_rules_from_api_response():
+    assert load_rules({"model_list": [RULES]}) == RULES
+
+
+def test_save_and_load_rules_from_file(tmp_path):
+    path = str(tmp_path / "rules.json")
+    save_rules(RULES, path)
+    with open(path) as f:
+        assert json.load(f) == RULES
+    assert load_rules(path) == RULES
+
+
+def test_load_rules_rejects_other_types():
+    with pytest.raises(ValueError):
+        load_rules(["not", "rules"])
+
+
+def test_list_spider_uses_given_rules():
+    from unittest.mock import patch
+
+    from crawlab_ai.spider.list_spider import read_list
+
+    html = '<div class="quote">a</div><div class="quote">b</div>'
+    with patch("crawlab_ai.spider.list_spider.http_post") as mock_post:
+        data = read_list(
+            "https://example.com",
+            get_html=lambda url: html,
+            rules=RULES,
+            as_dataframe=False,
+        )
+        mock_post.assert_not_called()
+    assert data == [{}, {}]
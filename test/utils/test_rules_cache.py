@@ -0,0 +1,69 @@
+from unittest.mock import patch
+
+from crawlab_ai.utils.rules_cache import MemoryRulesCache, RulesCache, normalize_url
+
+RULES = {
+    "list_model": {"list_element_css_selector": ".quote", "fields": []},
+    "next_page_element_css_selector": ".next > a",
+}
+
+
+def test_normalize_url_ignores_trivial_differences():
+    assert normalize_url("HTTPS://Example.com:443/list/?b=2&a=1#top") == (
+        "https://example.com/list?a=1&b=2"
+    )
+
+
+def test_get_returns_cached_rules(tmp_path):
+    cache = RulesCache(path=str(tmp_path / "rules.db"))
+    cache.set("list", "https://example.com/list", ["title"], RULES)
+    assert cache.get("list", "https://example.com/list/", ["title"]) == RULES
+    assert cache.get("list", "https://example.com/list", ["author"]) is None
+    assert cache.get("article", "https://example.com/list", ["title"]) is None
+
+
+def test_get_drops_expired_rules(tmp_path):
+    cache = RulesCache(path=str(tmp_path / "rules.db"), ttl=60)
+    with patch("time.time", return_value=1000):
+        cache.set("list", "https://example.com", None, RULES)
+    with patch("time.time", return_value=1061):
+        assert cache.get("list", "https://example.com") is None
+    assert len(cache) == 0
+
+
+def test_set_evicts_least_recently_used(tmp_path):
+    cache = RulesCache(path=str(tmp_path / "rules.db"), ttl=None, max_entries=2)
+    with patch("time.time", return_value=1000):
+        cache.set("list", "https://example.com/a", None, RULES)
+    with patch("time.time", return_value=1001):
+        cache.set("list", "https://example.com/b", None, RULES)
+    with patch("time.time", return_value=1002):
+        cache.get("list", "https://example.com/a")
+    with patch("time.time", return_value=1003):
+        cache.set("list", "https://example.com/c", None, RULES)
+    assert len(cache) == 2
+    assert cache.get("list", "https://example.com/a") == RULES
+    assert cache.get("list", "https://example.com/b") is None
+
+
+def test_list_spider_uses_cached_rules(tmp_path, monkeypatch):
+    from crawlab_ai.spider.list_spider import ListSpider
+
+    monkeypatch.setenv("CRAWLAB_AI_RULES_CACHE_PATH", str(tmp_path / "rules.db"))
+    RulesCache().set("list", "https://example.com", None, RULES)
+    with patch("crawlab_ai.spider.list_spider.http_post") as mock_post:
+        spider = ListSpider("https://example.com")
+        spider.fetch_rules()
+        mock_post.assert_not_called()
+    assert spider.rules == RULES
+
+
+def test_memory_rules_cache_evicts_least_recently_used():
+    cache = MemoryRulesCache(max_entries=2)
+    cache.set("a", {"rules": "a"})
+    cache.set("b", {"rules": "b"})
+    assert cache.get("a") == {"rules": "a"}
+    cache.set("c", {"rules": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"rules": "a"}
+    assert len(cache) == 2
@@ -0,0 +1,108 @@
+from crawlab_ai.utils.rules_templates import (
+    RulesTemplates,
+    get_dom_fingerprint,
+    get_similarity,
+    get_url_template,
+)
+
+RULES = {
+    "list_model": {"list_element_css_selector": ".item", "fields": []},
+    "next_page_element_css_selector": ".next > a",
+}
+
+
+def _render(items: list, layout: str = "list") -> str:
+    if layout == "list":
+        body = (
+            "<ul class='items'>%s</ul><div class='next'><a href='/2'>next</a></div>"
+            % (
+                "".join(
+                    "<li class='item'><a href='/%s'>%s</a></li>" % (i, i) for i in items
+                )
+            )
+        )
+    else:
+        body = (
+            "<article><h1>%s</h1><p class='meta'>by</p><div class='body'><p>text</p></div></article>"
+            % (items[0])
+        )
+    return (
+        "<html><head><script>var x = '<div>';</script></head><body>"
+        "<nav class='nav'><a href='/'>home</a></nav>%s<footer>footer</footer></body></html>"
+        % body
+    )
+
+
+def test_url_template_replaces_ids_and_query_values():
+    assert get_url_template("https://Example.com/p/123?id=1&page=2&sort=asc") == (
+        "example.com/p/{id}?id"
+    )
+    assert get_url_template("https://example.com/p/456/?sort=desc&id=2") == (
+        "example.com/p/{id}?id"
+    )
+    assert get_url_template("https://example.com/2024-01-02/post-1.html") == (
+        "example.com/{id}/{id}.html"
+    )
+    assert get_url_template("https://example.com/category/shoes") != (
+        get_url_template("https://example.com/category/bags")
+    )
+
+
+def test_dom_fingerprint_ignores_content():
+    page_1 = get_dom_fingerprint(_render(["a", "b", "c"]))
+    page_2 = get_dom_fingerprint(_render(["d", "e"]))
+    article = get_dom_fingerprint(_render(["title"], layout="article"))
+    assert get_similarity(page_1, page_2) == 1.0
+    assert get_similarity(page_1, article) < 0.9
+
+
+def test_rules_templates_match_by_url_then_dom(tmp_path):
+    templates = RulesTemplates(path=str(tmp_path / "cache.db"))
+    templates.add(
+        "list", "https://example.com/category/shoes", None, RULES, html=_render(["a"])
+    )
+
+    template = templates.match_url(
+        "list", "https://example.com/category/shoes?page=2", None
+    )
+    assert template.rules == RULES
+    assert template.url == "https://example.com/category/shoes"
+    assert (
+        templates.match_url("list", "https://example.com/category/bags", None) is None
+    )
+    assert templates.match_url("list", "https://other.com/category/shoes", None) is None
+    assert (
+        templates.match_url("article", "https://example.com/category/shoes", None)
+        is None
+    )
+
+    html = _render(["x", "y"])
+    assert (
+        templates.match_dom(
+            "list", "https://example.com/category/bags", None, html
+        ).rules
+        == RULES
+    )
+    article_html = _render(["title"], layout="article")
+    assert (
+        templates.match_dom("list", "https://example.com/a/1", None, article_html)
+        is None
+    )
+    assert templates.stats.as_dict() == {
+        "url_hits": 1,
+        "dom_hits": 1,
+        "misses": 0,
+        "hit_rate": 1.0,
+    }
+
+
+def test_rules_templates_replace_rules_of_the_same_url_template(tmp_path):
+    templates = RulesTemplates(path=str(tmp_path / "cache.db"))
+    new_rules = dict(RULES, next_page_element_css_selector=".pager > a")
+    templates.add("list", "https://example.com/p/1", None, RULES)
+    templates.add("list", "https://example.com/p/2", None, new_rules)
+
+    assert len(templates._get_templates("list", "https://example.com/", None)) == 1
+    template = templates.match_url("list", "https://example.com/p/3", None)
+    assert template.url == "https://example.com/p/2"
+    assert template.rules == new_rules
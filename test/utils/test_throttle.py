@@ -0,0 +1,166 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from crawlab_ai.utils.throttle import HostScheduler, RobotsDisallowedError
+
+
+class _RateLimitedHandler(BaseHTTPRequestHandler):
+    requests = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        type(self).requests += 1
+        self.send_response(429)
+        self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class _RobotsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/robots.txt":
+            body = b"User-agent: *\nDisallow: /private\nCrawl-delay: 1\n"
+        else:
+            body = b"<html></html>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def robots_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RobotsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%d" % server.server_port
+    server.shutdown()
+
+
+def _get_rate_limited_error(retry_after: str = None) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = 429
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+    return requests.HTTPError("429 Too Many Requests", response=response)
+
+
+def test_scheduler_limits_rate_per_host():
+    scheduler = HostScheduler(per_host_concurrency=4, per_host_rate=20)
+    started = []
+
+    def get_html(url):
+        started.append((url.split("/")[2], time.monotonic()))
+        return ""
+
+    scheduled = scheduler.wrap(get_html)
+    threads = [
+        threading.Thread(target=scheduled, args=("https://%s/%d" % (host, i),))
+        for host in ("a.com", "b.com")
+        for i in range(5)
+    ]
+    begin = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - begin
+    # 5 fetches per host at 20 per second take 4 intervals of 50ms, whatever the number of hosts
+    assert 0.18 <= elapsed < 0.6
+    for host in ("a.com", "b.com"):
+        times = sorted(t for h, t in started if h == host)
+        assert times[-1] - times[0] >= 0.18
+
+
+def test_scheduler_bounds_global_concurrency():
+    scheduler = HostScheduler(per_host_concurrency=4, max_concurrency=3)
+    active = [0]
+    peak = [0]
+    lock = threading.Lock()
+
+    def get_html(url):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return ""
+
+    scheduled = scheduler.wrap(get_html)
+    threads = [
+        threading.Thread(target=scheduled, args=("https://%s/%d" % (host, i),))
+        for host in ("a.com", "b.com", "c.com")
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 3
+
+
+def test_scheduler_backs_off_and_retries_rate_limited_fetches():
+    scheduler = HostScheduler(retries=2)
+    calls = []
+
+    def get_html(url):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise _get_rate_limited_error("0.2")
+        return "<html>ok</html>"
+
+    assert scheduler.wrap(get_html)("https://a.com/1") == "<html>ok</html>"
+    assert len(calls) == 2
+    # the Retry-After delay is used instead of the default backoff of one second
+    assert 0.19 <= calls[1] - calls[0] < 0.9
+    # the successful retry halves the backoff of the host again
+    assert scheduler._get_host("https://a.com/1").backoff == 0.5
+
+
+def test_scheduler_gives_up_after_retries():
+    scheduler = HostScheduler(retries=1)
+    calls = []
+
+    def get_html(url):
+        calls.append(url)
+        raise _get_rate_limited_error("0")
+
+    with pytest.raises(requests.HTTPError):
+        scheduler.wrap(get_html)("https://a.com/1")
+    assert len(calls) == 2
+
+
+def test_scheduler_retries_are_not_stacked_on_client_retries():
+    _RateLimitedHandler.requests = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RateLimitedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    scheduler = HostScheduler(retries=1)
+    try:
+        scheduler.wrap()("http://127.0.0.1:%d/1" % server.server_port)
+    finally:
+        server.shutdown()
+    # one fetch and one retry of the scheduler, none of the HTTP client
+    assert _RateLimitedHandler.requests == 2
+
+
+def test_scheduler_respects_robots(robots_server):
+    scheduler = HostScheduler(respect_robots=True)
+    scheduled = scheduler.wrap(lambda url: "<html>" + url + "</html>")
+
+    with pytest.raises(RobotsDisallowedError):
+        scheduled(robots_server + "/private/1")
+    assert scheduled(robots_server + "/public/1") == (
+        "<html>" + robots_server + "/public/1</html>"
+    )
+    # the Crawl-delay of robots.txt is longer than the default delay
+    assert scheduler._get_host(robots_server + "/public/1").delay == 1.0
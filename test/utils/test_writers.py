@@ -0,0 +1,36 @@
+import csv
+import json
+
+import pytest
+
+from crawlab_ai.utils.writers import get_format, get_writer
+
+
+def test_jsonl_writer_writes_each_batch(tmp_path):
+    path = tmp_path / "out.jsonl"
+    writer = get_writer("jsonl", ["title"], str(path))
+    writer.write_rows([{"title": "a"}, {"title": "b"}])
+    # rows are flushed per batch, before the writer is closed
+    assert len(path.read_text().splitlines()) == 2
+    writer.write_rows([{"title": "c"}])
+    writer.close()
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["title"] for line in lines] == ["a", "b", "c"]
+
+
+def test_csv_writer_uses_field_names_as_header(tmp_path):
+    path = tmp_path / "out.csv"
+    writer = get_writer("csv", ["title", "url"], str(path))
+    writer.write_rows([{"title": "a", "url": "/a", "extra": 1}, {"title": "b"}])
+    writer.close()
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert rows == [{"title": "a", "url": "/a"}, {"title": "b", "url": ""}]
+
+
+def test_get_format_and_unknown_format():
+    assert get_format("out.parquet") == "parquet"
+    assert get_format("out.jsonl") == "jsonl"
+    assert get_format("out.txt") is None
+    with pytest.raises(ValueError):
+        get_writer("xml", ["title"])